@@ -0,0 +1,132 @@
+"""进度浮层微基准：对比样式表驱动的 QProgressBar + QLabel 与自绘浮层
+
+统计进度逐格推进一整个周期时的总耗时和重绘面积（逻辑像素），
+重绘面积近似反映合成器需要重新混合的区域。
+
+运行方式（无需显示器）：
+    python benchmarks/bench_overlay.py [宽度]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtWidgets, QtCore  # noqa: E402
+
+from water_reminder import overlay, theme  # noqa: E402
+
+
+class PaintCounter(QtCore.QObject):
+    """统计被监视控件收到的绘制事件和重绘面积"""
+
+    def __init__(self):
+        super().__init__()
+        self.paints = 0
+        self.pixels = 0
+
+    def eventFilter(self, watched, event):
+        if event.type() == QtCore.QEvent.Paint:
+            self.paints += 1
+            self.pixels += sum(rect.width() * rect.height() for rect in event.region().rects())
+        return False
+
+
+# 改为自绘之前进度条和计数标签的样式，只在这里作为对照使用
+LEGACY_BAR_QSS = """
+QLabel#counterLabel {
+    color: #2196F3;
+    background-color: rgba(255, 255, 255, 0.85);
+    border-radius: 15px;
+    padding: 0 15px;
+    font-size: 14px;
+    font-weight: bold;
+    font-family: 'Microsoft YaHei', Arial;
+}
+QProgressBar#progressBar {
+    background-color: rgba(255, 255, 255, 0.5);
+    border-radius: 15px;
+    text-align: center;
+    border: none;
+}
+QProgressBar#progressBar::chunk {
+    background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                                stop:0 #2196F3, stop:1 #00BCD4);
+    border-radius: 15px;
+}
+"""
+
+
+def make_window(width):
+    window = QtWidgets.QWidget()
+    window.setWindowFlags(QtCore.Qt.FramelessWindowHint | QtCore.Qt.Tool)
+    window.setAttribute(QtCore.Qt.WA_TranslucentBackground)
+    window.resize(width, 40)
+    return window
+
+
+def run_cycle(app, window, set_value, set_count, steps):
+    """推进一个完整周期，中途更新一次计数"""
+    window.show()
+    app.processEvents()
+    start = time.perf_counter()
+    for value in range(steps + 1):
+        set_value(value)
+        if value == steps // 2:
+            set_count(value)
+        app.processEvents()
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_legacy(app, width, steps):
+    window = make_window(width)
+    window.setStyleSheet(LEGACY_BAR_QSS)
+    bar = QtWidgets.QProgressBar(window)
+    bar.setObjectName("progressBar")
+    bar.setTextVisible(False)
+    bar.setGeometry(10, 5, width - 170, 30)
+    label = QtWidgets.QLabel(window)
+    label.setObjectName("counterLabel")
+    label.setGeometry(width - 150, 5, 140, 30)
+    counter = PaintCounter()
+    for widget in (window, bar, label):
+        widget.installEventFilter(counter)
+    elapsed = run_cycle(app, window, bar.setValue,
+                        lambda count: label.setText(f"💧 今日喝水: {count}"), steps)
+    window.close()
+    return elapsed, counter
+
+
+def bench_strip(app, width, steps, thin):
+    window = make_window(width)
+    strip = overlay.ProgressStrip(window, thin=thin, maximum=steps)
+    strip.setGeometry(0, 5, width, overlay.BAR_HEIGHT)
+    counter = PaintCounter()
+    for widget in (window, strip):
+        widget.installEventFilter(counter)
+    elapsed = run_cycle(app, window, strip.setValue,
+                        lambda count: strip.set_counter_text(f"💧 今日喝水: {count}"), steps)
+    window.close()
+    return elapsed, counter
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 1920
+    steps = 100
+    app = QtWidgets.QApplication(sys.argv[:1])
+    theme.install(app, dark=False)
+
+    print(f"{'方案':<16}{'总耗时(ms)':>12}{'每格(us)':>12}{'绘制次数':>10}{'重绘面积(px)':>16}")
+    results = (
+        ("样式表控件", bench_legacy(app, width, steps)),
+        ("自绘浮层", bench_strip(app, width, steps, thin=False)),
+        ("自绘细进度条", bench_strip(app, width, steps, thin=True)),
+    )
+    for name, (elapsed, counter) in results:
+        print(f"{name:<16}{elapsed:>12.1f}{elapsed * 1000 / steps:>12.1f}"
+              f"{counter.paints:>10}{counter.pixels:>16}")
+
+
+if __name__ == "__main__":
+    main()
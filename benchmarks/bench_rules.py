@@ -0,0 +1,66 @@
+"""提醒时段规则基准：对比每次查询都按规则计算当天时段与查询预先展开的索引
+
+运行方式：
+    python benchmarks/bench_rules.py [查询次数] [节假日数]
+"""
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from water_reminder import rules  # noqa: E402
+
+
+def sample_rules(holidays):
+    """工作日 9-18 点提醒、午休免打扰、上午缩短间隔，外加一批节假日"""
+    today = datetime.date.today()
+    return {
+        "active": {"mon-fri": [["09:00", "18:00"]], "sat": [], "sun": []},
+        "quiet_hours": [["12:00", "13:30"], ["22:00", "07:00"]],
+        "holidays": [(today + datetime.timedelta(days=3 * i)).isoformat() for i in range(holidays)],
+        "bands": [{"from": "09:00", "to": "11:00", "interval": 3600},
+                  {"from": "15:00", "to": "17:00", "interval": 5400}],
+    }
+
+
+def evaluate(parsed, ts):
+    """不建索引：按规则算出当天的时段再线性查找"""
+    moment = datetime.datetime.fromtimestamp(ts)
+    minute = moment.hour * 60 + moment.minute
+    for start, end, quiet, interval in parsed.day_segments(moment.date()):
+        if start <= minute < end:
+            return quiet, interval
+
+
+def main():
+    queries = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    holidays = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    data = sample_rules(holidays)
+    now = time.time()
+    rng = random.Random(1)
+    moments = [now + rng.uniform(0, 10 * 86400) for _ in range(queries)]
+
+    parsed = rules.Rules(data)
+    start = time.perf_counter()
+    expected = [evaluate(parsed, ts) for ts in moments]
+    naive = time.perf_counter() - start
+
+    schedule = rules.Schedule(parsed)
+    start = time.perf_counter()
+    schedule.compile(now)
+    compiled = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    found = [schedule.segment_at(ts) for ts in moments]
+    indexed = time.perf_counter() - start
+
+    assert [(s.quiet, s.interval) for s in found] == expected
+    print(f"规则展开：{len(schedule.segments)} 个时段，{compiled:.2f} ms")
+    print(f"逐次按规则计算：{naive / queries * 1e6:.2f} µs/次")
+    print(f"二分查找索引：  {indexed / queries * 1e6:.2f} µs/次（{naive / indexed:.0f} 倍）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""喝水统计基准：生成多年的合成历史，测量重建、增量更新和查询耗时
+
+同时在有夏令时的时区里检查切换日的向量化重建与逐条回放是否一致。
+
+运行方式：
+    python benchmarks/bench_stats.py [年数] [每天提醒次数]
+"""
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from water_reminder import events, stats  # noqa: E402
+
+
+def synthetic_history(years, reminders_per_day, seed=1):
+    """生成按时间排序的 (时间戳, 类型) 历史，工作日 9 点到 18 点之间提醒"""
+    rng = random.Random(seed)
+    rows = []
+    today = datetime.date.today()
+    start = today - datetime.timedelta(days=int(years * 365))
+    for offset in range((today - start).days):
+        date = start + datetime.timedelta(days=offset)
+        if date.weekday() >= 5 and rng.random() < 0.7:
+            continue
+        base = time.mktime(date.timetuple()) + 9 * 3600
+        for index in range(reminders_per_day):
+            ts = base + index * 9 * 3600 / reminders_per_day + rng.uniform(0, 600)
+            rows.append((ts, events.REMINDER_SHOWN))
+            answer = ts + rng.expovariate(1 / 120)
+            rows.append((answer, events.DRINK if rng.random() < 0.75 else events.SNOOZE))
+    return rows
+
+
+def dst_consistency(zone="Europe/Berlin", step=420):
+    """在 zone 时区中，对今年夏令时切换日全天每 step 秒一条的喝水事件，
+    比较向量化重建和逐条回放的结果，返回检查的切换日数；无法检查时返回 None"""
+    if stats.numpy is None or not hasattr(time, "tzset"):
+        return None
+    old_zone = os.environ.get("TZ")
+    os.environ["TZ"] = zone
+    time.tzset()
+    numpy_module = stats.numpy
+    try:
+        first = datetime.date(datetime.date.today().year, 1, 1)
+        midnights = [time.mktime((first + datetime.timedelta(days=i)).timetuple()) for i in range(367)]
+        offsets = [time.localtime(midnight).tm_gmtoff for midnight in midnights]
+        days = [i for i in range(366) if offsets[i] != offsets[i + 1]]
+        rows = []
+        for i in days:
+            ts = midnights[i]
+            while ts < midnights[i + 1]:
+                rows.append((ts, events.DRINK))
+                ts += step
+        vectorized = stats.HydrationStats()
+        vectorized.rebuild(rows)
+        stats.numpy = None
+        reference = stats.HydrationStats()
+        reference.rebuild(rows)
+        assert vectorized.daily == reference.daily, "夏令时切换日的每日汇总不一致"
+        assert vectorized.heatmap == reference.heatmap, "夏令时切换日的热力图不一致"
+        return len(days)
+    finally:
+        stats.numpy = numpy_module
+        if old_zone is None:
+            os.environ.pop("TZ", None)
+        else:
+            os.environ["TZ"] = old_zone
+        time.tzset()
+
+
+def timed(func, *args):
+    """返回 (结果, 耗时毫秒)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    years = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    rows, generate_ms = timed(synthetic_history, years, per_day)
+    print(f"合成历史：{years:g} 年，{len(rows)} 条事件（生成 {generate_ms:.0f} ms）")
+
+    engine = stats.HydrationStats()
+    numpy_module = stats.numpy
+    if numpy_module is not None:
+        _, ms = timed(engine.rebuild, rows)
+        print(f"向量化重建（NumPy）：{ms:.1f} ms")
+    else:
+        print("向量化重建（NumPy）：未安装 NumPy，跳过")
+
+    stats.numpy = None
+    try:
+        reference = stats.HydrationStats()
+        _, ms = timed(reference.rebuild, rows)
+        print(f"逐条回放重建：{ms:.1f} ms")
+    finally:
+        stats.numpy = numpy_module
+
+    if numpy_module is not None:
+        assert engine.daily == reference.daily, "向量化结果与逐条回放不一致"
+        assert engine.heatmap == reference.heatmap, "热力图不一致"
+        checked = dst_consistency()
+        if checked is not None:
+            print(f"夏令时切换日一致性：{checked} 天，向量化与逐条回放一致")
+
+    now = time.time()
+    rounds = 10000
+    start = time.perf_counter()
+    for index in range(rounds):
+        reference.add(now + index, events.DRINK if index % 2 else events.REMINDER_SHOWN)
+    print(f"增量更新：{(time.perf_counter() - start) / rounds * 1e6:.2f} us/事件")
+
+    def summary():
+        return (reference.day_totals(), reference.week_totals(), reference.streak(),
+                reference.snooze_ratio(), reference.mean_response(), reference.recent_days(14))
+
+    _, ms = timed(summary)
+    print(f"统计面板查询：{ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
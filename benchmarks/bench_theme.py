@@ -0,0 +1,146 @@
+"""样式表微基准：对比逐控件重建样式表与应用级主题 + 动态属性
+
+运行方式（无需显示器）：
+    python benchmarks/bench_theme.py [次数]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtWidgets  # noqa: E402
+
+from water_reminder import theme  # noqa: E402
+from water_reminder.reminder_window import ReminderWindow  # noqa: E402
+
+LEGACY_PROGRESS_QSS = """
+    QProgressBar {{
+        background-color: rgba(255, 255, 255, {opacity});
+        border-radius: 15px;
+        text-align: center;
+        border: none;
+    }}
+    QProgressBar::chunk {{
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                                  stop:0 #2196F3, stop:1 #00BCD4);
+        border-radius: 15px;
+    }}
+"""
+
+# 应用级主题 + 动态属性的做法：每档透明度一条规则，随主题一次性安装
+THEMED_PROGRESS_QSS = """
+QProgressBar#progressBar {
+    border-radius: 15px;
+    text-align: center;
+    border: none;
+}
+QProgressBar#progressBar::chunk {
+    background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                                stop:0 #2196F3, stop:1 #00BCD4);
+    border-radius: 15px;
+}
+""" + "".join(
+    f'QProgressBar#progressBar[opacityLevel="{level}"] {{ background-color: rgba(255, 255, 255, {level / 10:.1f}); }}\n'
+    for level in range(1, theme.OPACITY_LEVELS + 1)
+)
+
+LEGACY_BUTTON_QSS = """
+    QPushButton {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+                                  stop:0 #4CAF50, stop:1 #45A049);
+        color: white;
+        border: none;
+        border-radius: 40px;
+        padding: 25px 60px;
+        font-size: 28px;
+        font-weight: bold;
+        font-family: 'Microsoft YaHei', Arial;
+    }
+"""
+
+
+def set_style_property(widget, name, value):
+    """修改控件的动态样式属性，值变化时只重新 polish 这个控件"""
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
+    widget.update()
+
+
+def measure(func, rounds):
+    """返回单次调用的平均耗时（微秒）"""
+    start = time.perf_counter()
+    for i in range(rounds):
+        func(i)
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def bench_opacity(app, rounds):
+    """进度条透明度切换"""
+    legacy_bar = QtWidgets.QProgressBar()
+    legacy_bar.resize(1700, 30)
+    legacy_bar.show()
+
+    themed_bar = QtWidgets.QProgressBar()
+    themed_bar.setObjectName("progressBar")
+    themed_bar.resize(1700, 30)
+    themed_bar.show()
+
+    def legacy(i):
+        legacy_bar.setStyleSheet(LEGACY_PROGRESS_QSS.format(opacity=(i % 10 + 1) / 10))
+        legacy_bar.repaint()
+
+    def themed(i):
+        set_style_property(themed_bar, "opacityLevel", theme.opacity_level((i % 10 + 1) / 10))
+        themed_bar.repaint()
+
+    return measure(legacy, rounds), measure(themed, rounds)
+
+
+def bench_reminder(app, rounds):
+    """提醒窗口弹出（构建 + 样式 + 首次绘制）"""
+
+    def legacy(i):
+        dialog = QtWidgets.QDialog()
+        layout = QtWidgets.QVBoxLayout(dialog)
+        for text in ("喝水", "稍后"):
+            button = QtWidgets.QPushButton(text)
+            button.setStyleSheet(LEGACY_BUTTON_QSS)
+            layout.addWidget(button)
+            button.setStyleSheet(LEGACY_BUTTON_QSS)
+        dialog.resize(1920, 1080)
+        dialog.show()
+        dialog.repaint()
+        dialog.hide()
+        dialog.deleteLater()
+        app.processEvents()
+
+    window = ReminderWindow()
+
+    def themed(i):
+        window.present("该喝水了！")
+        window.repaint()
+        window.hide()
+        app.processEvents()
+
+    return measure(legacy, rounds), measure(themed, rounds)
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    app = QtWidgets.QApplication(sys.argv[:1])
+    app.setStyleSheet(theme.compile_stylesheet(dark=False) + THEMED_PROGRESS_QSS)
+
+    print(f"{'场景':<12}{'逐控件样式表(us)':>18}{'应用级主题(us)':>18}{'加速比':>10}")
+    for name, bench in (("透明度切换", bench_opacity), ("提醒弹出", bench_reminder)):
+        legacy, themed = bench(app, rounds)
+        print(f"{name:<12}{legacy:>18.1f}{themed:>18.1f}{legacy / themed:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""调度服务负载测试：一个服务进程对大量模拟会话
+
+启动一个独立的服务进程（临时数据目录），在本进程中创建若干模拟会话
+连接上去，统计订阅（hello → 收到完整状态）和操作（drink → 收到周期
+变化）的往返延迟，以及服务进程的常驻内存和 CPU 时间。
+
+运行方式（Linux，无需显示器）：
+    python benchmarks/load_service.py [会话数] [用户数]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtCore  # noqa: E402
+
+from water_reminder import ipc  # noqa: E402
+
+
+def process_usage(pid):
+    """返回 (常驻内存 MB, CPU 秒)，只支持 Linux"""
+    with open(f"/proc/{pid}/status") as f:
+        rss = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:")) / 1024
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    ticks = os.sysconf("SC_CLK_TCK")
+    return rss, (int(fields[11]) + int(fields[12])) / ticks
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000 if ordered else float("nan")
+
+
+def wait_until(app, predicate, timeout):
+    deadline = time.perf_counter() + timeout
+    while not predicate() and time.perf_counter() < deadline:
+        app.processEvents(QtCore.QEventLoop.AllEvents, 50)
+    return predicate()
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else sessions
+    app = QtCore.QCoreApplication(sys.argv[:1])
+
+    with tempfile.TemporaryDirectory() as directory:
+        name = os.path.join(directory, "service")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "water_reminder.service", "--name", name, "--data-dir", directory,
+             "--trust-hello"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stdout=subprocess.PIPE, text=True,
+        )
+        try:
+            server.stdout.readline()  # 等待服务就绪
+            idle_rss, _ = process_usage(server.pid)
+
+            channels = []
+            subscribed = {}
+            acted = {}
+            sent = {}
+
+            def on_message(index, message):
+                if message.get("type") == "state" and index not in subscribed:
+                    subscribed[index] = time.perf_counter() - sent[index]
+                elif message.get("type") == "cycle" and index in acted and acted[index] is None:
+                    acted[index] = time.perf_counter() - sent[index]
+
+            start = time.perf_counter()
+            for index in range(sessions):
+                socket = ipc.connect(name, 5000)
+                if socket is None:
+                    raise SystemExit(f"第 {index} 个会话连接失败")
+                channel = ipc.Channel(socket)
+                channel.message.connect(lambda message, index=index: on_message(index, message))
+                sent[index] = time.perf_counter()
+                channel.send({"type": "hello", "user": f"user{index % users}"})
+                channels.append(channel)
+            wait_until(app, lambda: len(subscribed) == sessions, 30)
+            subscribe_seconds = time.perf_counter() - start
+            _, cpu_before = process_usage(server.pid)
+
+            for index, channel in enumerate(channels):
+                acted[index] = None
+                sent[index] = time.perf_counter()
+                channel.send({"type": "drink"})
+            wait_until(app, lambda: all(value is not None for value in acted.values()), 30)
+            loaded_rss, cpu_after = process_usage(server.pid)
+
+            round_trips = [value for value in acted.values() if value is not None]
+            print(f"会话数 {sessions}，用户数 {users}")
+            print(f"订阅完成   {len(subscribed)}/{sessions}，总耗时 {subscribe_seconds * 1000:.1f} ms，"
+                  f"p50 {percentile(list(subscribed.values()), 0.5):.2f} ms，"
+                  f"p99 {percentile(list(subscribed.values()), 0.99):.2f} ms")
+            print(f"操作往返   {len(round_trips)}/{sessions}，"
+                  f"p50 {percentile(round_trips, 0.5):.2f} ms，p99 {percentile(round_trips, 0.99):.2f} ms")
+            print(f"服务内存   空闲 {idle_rss:.1f} MB，负载后 {loaded_rss:.1f} MB，"
+                  f"每会话 {(loaded_rss - idle_rss) * 1024 / sessions:.1f} KB")
+            print(f"服务 CPU   处理 {sessions} 次操作共 {(cpu_after - cpu_before) * 1000:.0f} ms")
+        finally:
+            server.terminate()
+            server.wait(10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""长时间运行的对象生命周期浸泡测试
+
+在 offscreen 平台上创建完整的 WaterReminderApp，反复模拟提醒、喝水、
+稍后、各个设置对话框、统计面板和提示框，每隔一段时间统计：
+
+- 存活的 QObject 数和控件数（按类名分组）
+- Python 堆（tracemalloc）
+- 常驻内存（RSS）
+
+预热之后的增长超过阈值时以非零状态退出，并输出增长最多的类名和
+分配位置。数据目录使用临时目录，不会改动真实的设置和事件日志。
+
+运行方式（无需显示器）：
+    python benchmarks/soak.py [--cycles 5000] [--sample-every 500]
+"""
+import argparse
+import collections
+import gc
+import importlib.util
+import os
+import sys
+import tempfile
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PyQt5 import QtWidgets, QtCore  # noqa: E402
+
+from water_reminder.metrics import object_counts, resident_memory  # noqa: E402
+
+
+def load_app_module():
+    """按文件路径导入主脚本（文件名不是合法的模块名）"""
+    spec = importlib.util.spec_from_file_location("water_reminder_app", os.path.join(ROOT, "喝水提醒小助手.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def settle(app):
+    """处理挂起的事件，并执行 deleteLater 的删除"""
+    app.processEvents()
+    QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+    app.processEvents()
+
+
+def class_counts(app):
+    """按类名统计存活的 QObject"""
+    counts = collections.Counter(type(obj).__name__ for obj in app.findChildren(QtCore.QObject))
+    for widget in app.topLevelWidgets():
+        counts[type(widget).__name__] += 1
+        counts.update(type(obj).__name__ for obj in widget.findChildren(QtCore.QObject))
+    return counts
+
+
+def accept(dialog):
+    """点击对话框的确定按钮"""
+    buttons = dialog.findChild(QtWidgets.QDialogButtonBox)
+    buttons.button(QtWidgets.QDialogButtonBox.Ok).click()
+
+
+def run_cycle(app, reminder, index):
+    """一轮操作：提醒 → 喝水/稍后，再轮流打开一种临时窗口"""
+    reminder.show_reminder()
+    settle(app)
+    # 逐级升级到全屏提醒窗口，覆盖每一级的显示和收起
+    for _ in reminder.escalator.steps:
+        reminder.escalator.escalate()
+        settle(app)
+    if index % 3:
+        reminder.drink_water()
+    else:
+        reminder.no_drink()
+
+    kind = index % 6
+    if kind == 0:
+        reminder.show_options()
+        settle(app)
+        reminder.dialogs["options"].findChild(QtWidgets.QPushButton, "saveButton").click()
+    elif kind == 1:
+        reminder.show_interval_dialog()
+        accept(reminder.dialogs["interval"])
+    elif kind == 2:
+        reminder.show_text_dialog()
+        accept(reminder.dialogs["text"])
+    elif kind == 3:
+        reminder.show_opacity_dialog()
+        reminder.dialogs["opacity"].reject()
+    elif kind == 4:
+        reminder.show_history()
+        settle(app)
+        reminder.dialogs["history"].close()
+    else:
+        reminder.show_message(QtWidgets.QMessageBox.Information, "提示", "浸泡测试").close()
+    reminder.flush_events()
+    settle(app)
+
+
+def sample(app):
+    gc.collect()
+    objects, widgets = object_counts()
+    return {
+        "objects": objects,
+        "widgets": widgets,
+        "heap": tracemalloc.get_traced_memory()[0],
+        "rss": resident_memory(),
+        "classes": class_counts(app),
+        "snapshot": tracemalloc.take_snapshot(),
+    }
+
+
+def report(base, last, top):
+    """输出预热后到结束的增长，返回各项增长"""
+    growth = {
+        "objects": last["objects"] - base["objects"],
+        "widgets": last["widgets"] - base["widgets"],
+        "heap": last["heap"] - base["heap"],
+        "rss": (last["rss"] - base["rss"]) if base["rss"] is not None and last["rss"] is not None else None,
+    }
+    print(f"QObject: {base['objects']} -> {last['objects']} ({growth['objects']:+d})")
+    print(f"控件:    {base['widgets']} -> {last['widgets']} ({growth['widgets']:+d})")
+    print(f"Python 堆: {base['heap'] / 1024:.1f} KB -> {last['heap'] / 1024:.1f} KB ({growth['heap'] / 1024:+.1f} KB)")
+    if growth["rss"] is not None:
+        print(f"RSS: {base['rss'] / 2**20:.1f} MB -> {last['rss'] / 2**20:.1f} MB ({growth['rss'] / 2**20:+.1f} MB)")
+
+    grown = (last["classes"] - base["classes"]).most_common(top)
+    if grown:
+        print("增长的 QObject 类：")
+        for name, count in grown:
+            print(f"  {name}: +{count}")
+    print("Python 堆增长最多的位置：")
+    for stat in last["snapshot"].compare_to(base["snapshot"], "lineno")[:top]:
+        if stat.size_diff > 0:
+            print(f"  {stat.size_diff / 1024:+.1f} KB  {stat.traceback}")
+    return growth
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="对象生命周期浸泡测试")
+    parser.add_argument("--cycles", type=int, default=5000, help="模拟的操作轮数")
+    parser.add_argument("--warmup", type=int, default=200, help="预热轮数，之后开始计算增长")
+    parser.add_argument("--sample-every", type=int, default=500, help="每隔多少轮采样一次")
+    parser.add_argument("--max-objects", type=int, default=0, help="允许的 QObject 增长数")
+    parser.add_argument("--max-heap-kb", type=float, default=512, help="允许的 Python 堆增长（KB）")
+    parser.add_argument("--max-rss-mb", type=float, default=16, help="允许的 RSS 增长（MB）")
+    parser.add_argument("--top", type=int, default=10, help="报告中列出的条目数")
+    args = parser.parse_args(argv)
+
+    data = tempfile.TemporaryDirectory()
+    os.environ["WATER_REMINDER_DATA_DIR"] = data.name
+    os.environ["XDG_RUNTIME_DIR"] = data.name  # 不覆盖正在运行的实例的状态文件
+    module = load_app_module()
+    app = QtWidgets.QApplication(sys.argv[:1])
+    app.setQuitOnLastWindowClosed(False)
+    reminder = module.WaterReminderApp()
+    settle(app)
+
+    for index in range(args.warmup):
+        run_cycle(app, reminder, index)
+    tracemalloc.start(10)
+    base = sample(app)
+    print(f"{'轮数':>8} {'QObject':>8} {'控件':>6} {'堆(KB)':>10} {'RSS(MB)':>9}")
+    last = base
+    for index in range(args.warmup, args.warmup + args.cycles):
+        run_cycle(app, reminder, index)
+        done = index - args.warmup + 1
+        if done % args.sample_every == 0 or done == args.cycles:
+            last = sample(app)
+            rss = f"{last['rss'] / 2**20:9.1f}" if last["rss"] is not None else f"{'-':>9}"
+            print(f"{done:8d} {last['objects']:8d} {last['widgets']:6d} {last['heap'] / 1024:10.1f} {rss}")
+
+    growth = report(base, last, args.top)
+    reminder.quit_application()
+    data.cleanup()
+
+    failures = []
+    if growth["objects"] > args.max_objects:
+        failures.append("QObject")
+    if growth["heap"] > args.max_heap_kb * 1024:
+        failures.append("Python 堆")
+    if growth["rss"] is not None and growth["rss"] > args.max_rss_mb * 2**20:
+        failures.append("RSS")
+    if failures:
+        print("超出阈值：" + "、".join(failures))
+        return 1
+    print("内存保持平稳")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,459 @@
+"""离屏基准套件
+
+在 offscreen 平台上测量 WaterReminderApp 的各项性能指标，输出 JSON，
+并与保存的基线比较：
+
+- startup：冷启动导入耗时、到首次绘制和延迟初始化完成的耗时
+- tick：进度推进的唤醒次数和 CPU 时间（压缩周期实测，按默认 3 小时间隔折算到每小时），
+  以及暂停时的后台唤醒次数
+- reminder：show_reminder 到提醒窗口第一帧的延迟（角落小窗口和全屏窗口）
+- dialogs：托盘菜单项到对话框第一帧的延迟
+- memory：模拟多天的提醒/喝水/设置操作后 RSS 和 QObject 数的增长
+
+每个场景在独立的子进程中运行（临时数据目录），互不影响。所有指标
+都是越小越好。
+
+运行方式（无需显示器）：
+    python benchmarks/suite.py                         # 运行全部场景，JSON 输出到标准输出
+    python benchmarks/suite.py --only startup,tick --output result.json
+    python benchmarks/suite.py --save-baseline         # 把本次结果保存为基线
+    python benchmarks/suite.py --check                 # 与基线比较，有退化时以非零状态退出
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+START = time.perf_counter()  # 子进程中用于统计导入耗时
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+SCENARIOS = ("startup", "tick", "reminder", "dialogs", "memory")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+# 默认提醒间隔（秒），用于把压缩周期的实测值折算到每小时
+DEFAULT_INTERVAL = 10800
+# 统计暂停时的唤醒前等待一次性工作完成的时间（毫秒）
+SETTLE_MS = 3000
+# 每次 run_until 自身带来的唤醒：上一个事件循环退出时留下的一次中断，
+# 加上本次超时或满足条件后退出循环的一次；tick 场景从统计中减去
+HARNESS_WAKEUPS = 2
+# 判定退化时忽略的绝对变化量，按指标名后缀匹配，避免噪声很小的指标误报
+NOISE_FLOORS = {
+    "_ms": 1.0,
+    "_per_hour": 1.0,
+    "_kb_per_day": 64.0,
+    "_per_day": 1.0,
+}
+
+
+# 子进程：各个场景
+
+
+def _setup_child():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, BENCH_DIR)
+
+
+# run_until 正在等待的 (条件, 事件循环)，嵌套时最内层在最后
+_WAITING = []
+
+
+def _check_waiting():
+    if _WAITING:
+        done, loop = _WAITING[-1]
+        if done():
+            loop.quit()
+
+
+def run_until(app, done, timeout_ms):
+    """运行事件循环直到 done() 为真或超时
+
+    条件只会在处理事件时改变，所以在事件循环每次准备休眠（aboutToBlock）时
+    检查，不额外布置定时器；超时是一个单次定时器。检查函数只连接一次，
+    每次调用不留下待删除的连接对象。除了超时或满足条件后退出循环的那一次，
+    不增加任何唤醒。
+    """
+    from PyQt5 import QtCore
+
+    if done():
+        return True
+    if not _WAITING and not getattr(run_until, "hooked", False):
+        QtCore.QAbstractEventDispatcher.instance().aboutToBlock.connect(_check_waiting)
+        run_until.hooked = True
+    loop = QtCore.QEventLoop()
+    # 提前满足条件时停掉超时定时器，不留下之后的一次唤醒
+    deadline = QtCore.QTimer()
+    deadline.setSingleShot(True)
+    deadline.timeout.connect(loop.quit)
+    deadline.start(timeout_ms)
+    _WAITING.append((done, loop))
+    try:
+        loop.exec_()
+    finally:
+        _WAITING.pop()
+        deadline.stop()
+    return done()
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)] if ordered else None
+
+
+def start_app():
+    """创建 QApplication 和 WaterReminderApp，等延迟初始化完成"""
+    import soak
+    from PyQt5 import QtWidgets
+    from water_reminder.startup_trace import StartupTrace
+
+    module = soak.load_app_module()
+    import_ms = (time.perf_counter() - START) * 1000
+    trace = StartupTrace(START)
+    app = QtWidgets.QApplication(sys.argv[:1])
+    app.setQuitOnLastWindowClosed(False)
+    trace.mark("创建 QApplication")
+    reminder = module.WaterReminderApp(trace)
+    run_until(app, lambda: any(name == "延迟初始化" for name, _ in trace.marks), 10000)
+    return app, reminder, trace, import_ms
+
+
+class FirstPaint:
+    """记录满足条件的窗口收到的第一个绘制事件的时间"""
+
+    def __init__(self, app, predicate):
+        from PyQt5 import QtCore
+
+        class Filter(QtCore.QObject):
+            def eventFilter(filter_self, watched, event):
+                if (self.painted is None and event.type() == QtCore.QEvent.Paint
+                        and hasattr(watched, "window") and predicate(watched.window())):
+                    self.painted = time.perf_counter()
+                return False
+
+        self.painted = None
+        self.filter = Filter()
+        app.installEventFilter(self.filter)
+
+    def reset(self):
+        self.painted = None
+
+
+def bench_startup(args):
+    from PyQt5 import QtCore
+
+    app, reminder, trace, import_ms = start_app()
+    phases = {name: total for name, _, total in trace.phases()}
+    metrics = {
+        "import_ms": import_ms,
+        "construct_ms": phases["构建窗口"] - phases["创建 QApplication"],
+        "first_paint_ms": phases.get("首次绘制"),
+        "ready_ms": phases.get("延迟初始化"),
+    }
+    reminder.quit_application()
+    return metrics, {"qt_version": QtCore.QT_VERSION_STR}
+
+
+def bench_tick(args):
+    from PyQt5 import QtCore
+
+    app, reminder, _, _ = start_app()
+    dispatcher = QtCore.QAbstractEventDispatcher.instance()
+    wakeups = [0]
+    dispatcher.awake.connect(lambda: wakeups.__setitem__(0, wakeups[0] + 1))
+    ticks = [0]
+    reminder.progress_engine.fired_late.connect(lambda seconds: ticks.__setitem__(0, ticks[0] + 1))
+    # 只测进度推进，到期后不弹出提醒
+    reminder.progress_engine.due.disconnect(reminder.show_reminder)
+    steps = reminder.core.steps
+
+    # 压缩的周期：与 3 小时周期的唤醒次数相同（都是每格一次），只是间隔更短
+    reminder.core.set_interval(args.cycle_seconds)
+    wakeups[0] = ticks[0] = 0
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    run_until(app, reminder.core.is_due, int(args.cycle_seconds * 2000))
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    cycle_wakeups, cycle_ticks = max(wakeups[0] - HARNESS_WAKEUPS, 0), ticks[0]
+
+    # 暂停时（离开、免打扰）的后台唤醒
+    reminder.core.set_interval(DEFAULT_INTERVAL)
+    reminder.core.pause(reason="benchmark")
+    # 先让暂停引起的一次性工作（事件日志合并写入等）做完，再统计稳定状态
+    run_until(app, lambda: False, SETTLE_MS)
+    wakeups[0] = ticks[0] = 0
+    idle_seconds = args.cycle_seconds / 2
+    run_until(app, lambda: False, int(idle_seconds * 1000))
+    paused_wakeups, paused_ticks = max(wakeups[0] - HARNESS_WAKEUPS, 0), ticks[0]
+    reminder.quit_application()
+
+    cycles_per_hour = 3600 / DEFAULT_INTERVAL
+    metrics = {
+        "ticks_per_cycle": cycle_ticks,
+        "wakeups_per_hour": cycle_wakeups * cycles_per_hour,
+        "cpu_ms_per_tick": cpu * 1000 / max(cycle_ticks, 1),
+        "cpu_ms_per_hour": cpu * 1000 * cycles_per_hour,
+        "paused_ticks": paused_ticks,
+        "paused_wakeups_per_hour": paused_wakeups * 3600 / idle_seconds,
+    }
+    return metrics, {"tick_steps": steps, "tick_cycle_seconds": round(wall, 2)}
+
+
+def bench_reminder(args):
+    app, reminder, _, _ = start_app()
+    names = {"toast": "reminderToast", "fullscreen": "reminderWindow"}
+    target = [None]
+    first_paint = FirstPaint(app, lambda window: window.objectName() == target[0])
+    result = {}
+    for tier, object_name in names.items():
+        reminder.update_settings(escalation=tier)
+        target[0] = object_name
+        samples = []
+        for _ in range(args.repeat):
+            first_paint.reset()
+            start = time.perf_counter()
+            reminder.show_reminder()
+            if run_until(app, lambda: first_paint.painted is not None, 2000):
+                samples.append((first_paint.painted - start) * 1000)
+            reminder.drink_water()
+            run_until(app, lambda: False, 20)
+        if samples:
+            result[f"{tier}_first_ms"] = samples[0]
+            result[f"{tier}_p50_ms"] = percentile(samples[1:] or samples, 0.5)
+            result[f"{tier}_p95_ms"] = percentile(samples[1:] or samples, 0.95)
+    reminder.quit_application()
+    return result, {"reminder_repeat": args.repeat}
+
+
+def bench_dialogs(args):
+    from PyQt5 import QtCore
+
+    app, reminder, _, _ = start_app()
+    first_paint = FirstPaint(app, lambda window: window in reminder.dialogs.values())
+
+    start = time.perf_counter()
+    reminder.settings_menu.aboutToShow.emit()  # 第一次展开“基础设置”时才填充
+    result = {"populate_menu_ms": (time.perf_counter() - start) * 1000}
+    actions = {action.text(): action for action in reminder.tray_icon.contextMenu().actions()}
+    actions.update((action.text(), action) for action in reminder.settings_menu.actions())
+
+    entries = (
+        ("interval", lambda: actions["提醒间隔"].trigger()),
+        ("text", lambda: actions["提醒文字"].trigger()),
+        ("opacity", lambda: actions["透明度"].trigger()),
+        ("history", lambda: actions["喝水统计"].trigger()),
+        ("options", reminder.show_options),
+    )
+    for key, open_dialog in entries:
+        samples = []
+        for _ in range(args.repeat):
+            first_paint.reset()
+            start = time.perf_counter()
+            open_dialog()
+            if run_until(app, lambda: first_paint.painted is not None, 2000):
+                samples.append((first_paint.painted - start) * 1000)
+            dialog = reminder.dialogs.get(key)
+            if dialog is not None:
+                dialog.close()
+            QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+        if samples:
+            result[f"{key}_first_ms"] = samples[0]
+            result[f"{key}_p50_ms"] = percentile(samples[1:] or samples, 0.5)
+    reminder.quit_application()
+    return result, {"dialogs_repeat": args.repeat}
+
+
+def bench_memory(args):
+    import datetime
+    import gc
+
+    import soak
+    from water_reminder.metrics import object_counts, resident_memory
+
+    app, reminder, _, _ = start_app()
+    samples = []
+    index = 0
+    for day in range(args.days):
+        for _ in range(args.reminders_per_day):
+            soak.run_cycle(app, reminder, index)
+            index += 1
+        # 模拟跨过零点
+        reminder.core.today -= datetime.timedelta(days=1)
+        reminder.core.check_day()
+        soak.settle(app)
+        gc.collect()
+        samples.append((resident_memory() or 0, object_counts()[0]))
+    reminder.quit_application()
+
+    # 第一天作为预热，之后按天平均
+    (rss_first, objects_first), (rss_last, objects_last) = samples[0], samples[-1]
+    days = max(len(samples) - 1, 1)
+    metrics = {
+        "rss_mb": rss_last / 2**20,
+        "rss_growth_kb_per_day": (rss_last - rss_first) / 1024 / days,
+        "qobject_growth_per_day": (objects_last - objects_first) / days,
+        "qobjects": objects_last,
+    }
+    return metrics, {"memory_days": args.days, "memory_reminders_per_day": args.reminders_per_day}
+
+
+CHILDREN = {
+    "startup": bench_startup,
+    "tick": bench_tick,
+    "reminder": bench_reminder,
+    "dialogs": bench_dialogs,
+    "memory": bench_memory,
+}
+
+
+# 父进程：调度、汇总和比较
+
+
+def run_scenario(name, args, data_dir):
+    """在子进程中运行一个场景，返回它输出的结果"""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", WATER_REMINDER_DATA_DIR=data_dir,
+               XDG_RUNTIME_DIR=data_dir, WATER_REMINDER_IDLE_SOURCE="none",
+               WATER_REMINDER_FOREGROUND_SOURCE="none")
+    command = [sys.executable, os.path.abspath(__file__), "--scenario", name,
+               "--cycle-seconds", str(args.cycle_seconds), "--repeat", str(args.repeat),
+               "--days", str(args.days), "--reminders-per-day", str(args.reminders_per_day)]
+    process = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, timeout=args.timeout)
+    if process.returncode != 0:
+        raise RuntimeError(f"场景 {name} 失败：\n{process.stderr[-2000:]}")
+    output = json.loads(process.stdout.strip().splitlines()[-1])
+    return output["metrics"], output["meta"]
+
+
+def prepare_data_dir(directory):
+    """写入有效的设置文件，启动时不弹出首次运行的设置面板"""
+    sys.path.insert(0, ROOT)
+    from water_reminder import settings
+
+    with open(os.path.join(directory, settings.FILE_NAME), "w", encoding="utf-8") as f:
+        f.write(settings.dump(settings.Settings()))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def collect(args):
+    """运行选中的场景，返回 {"meta": ..., "results": {"场景.指标": 数值}}"""
+    results = {}
+    meta = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    for name in args.only:
+        runs = args.runs if name == "startup" else 1
+        outputs = []
+        for _ in range(runs):
+            with tempfile.TemporaryDirectory() as directory:
+                prepare_data_dir(directory)
+                metrics, scenario_meta = run_scenario(name, args, directory)
+            outputs.append(metrics)
+            meta.update(scenario_meta)
+        for key in outputs[0]:
+            values = [output[key] for output in outputs if output.get(key) is not None]
+            if values:
+                results[f"{name}.{key}"] = statistics.median(values)
+    return {"meta": meta, "results": results}
+
+
+def noise_floor(name):
+    for suffix, floor in NOISE_FLOORS.items():
+        if name.endswith(suffix):
+            return floor
+    return 0.0
+
+
+def compare(results, baseline, tolerance):
+    """与基线比较，返回 [(指标, 基线值, 本次值, 变化比例, 是否退化)]"""
+    rows = []
+    for name, value in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, None, value, None, False))
+            continue
+        change = (value - base) / base if base else None
+        regressed = value > base * (1 + tolerance) and value - base > noise_floor(name)
+        rows.append((name, base, value, change, regressed))
+    return rows
+
+
+def format_table(rows):
+    lines = [f"{'指标':<36}{'基线':>12}{'本次':>12}{'变化':>9}"]
+    for name, base, value, change, regressed in rows:
+        base_text = f"{base:12.2f}" if base is not None else f"{'-':>12}"
+        change_text = f"{change:+8.0%}" if change is not None else f"{'':>8}"
+        lines.append(f"{name:<36}{base_text}{value:12.2f} {change_text}{'  退化' if regressed else ''}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="喝水提醒小助手离屏基准套件")
+    parser.add_argument("--only", default=",".join(SCENARIOS), help="逗号分隔的场景名")
+    parser.add_argument("--runs", type=int, default=3, help="startup 场景的运行次数（取中位数）")
+    parser.add_argument("--repeat", type=int, default=20, help="延迟类场景每项的重复次数")
+    parser.add_argument("--cycle-seconds", type=float, default=20, help="tick 场景压缩周期的长度（秒）")
+    parser.add_argument("--days", type=int, default=14, help="memory 场景模拟的天数")
+    parser.add_argument("--reminders-per-day", type=int, default=8, help="memory 场景每天的提醒次数")
+    parser.add_argument("--timeout", type=float, default=600, help="单个场景的超时（秒）")
+    parser.add_argument("--output", help="把 JSON 结果写入文件（默认输出到标准输出）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--check", action="store_true", help="有指标比基线退化时以非零状态退出")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的相对退化比例")
+    parser.add_argument("--scenario", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.scenario:
+        _setup_child()
+        metrics, meta = CHILDREN[args.scenario](args)
+        print(json.dumps({"metrics": metrics, "meta": meta}))
+        return 0
+
+    args.only = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(args.only) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"未知场景：{', '.join(sorted(unknown))}")
+
+    report = collect(args)
+    text = json.dumps(report, ensure_ascii=False, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+    rows = compare(report["results"], baseline, args.tolerance)
+    print(format_table(rows), file=sys.stderr)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"已保存基线：{args.baseline}", file=sys.stderr)
+    if args.check and any(row[4] for row in rows):
+        print("有指标比基线退化", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
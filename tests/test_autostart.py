@@ -0,0 +1,77 @@
+import pytest
+
+from water_reminder.autostart_xdg import XdgBackend
+
+COMMAND = '"/usr/bin/python3" "/opt/water/喝水提醒小助手.py"'
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return XdgBackend("water-reminder", COMMAND, config_dir=str(tmp_path))
+
+
+def test_enable_and_disable(backend):
+    assert not backend.is_enabled()
+    backend.enable()
+    assert backend.is_enabled()
+    backend.disable()
+    assert not backend.is_enabled()
+    backend.disable()  # 重复关闭不报错
+
+
+@pytest.mark.parametrize("old, new", [
+    ("Terminal=false", "Hidden=true"),
+    ("X-GNOME-Autostart-enabled=true", "X-GNOME-Autostart-enabled=false"),
+])
+def test_disabled_entry(backend, old, new):
+    # 用户在桌面环境的设置里关闭了自启动
+    backend.enable()
+    with open(backend.path, encoding="utf-8") as f:
+        text = f.read()
+    with open(backend.path, "w", encoding="utf-8") as f:
+        f.write(text.replace(old, new))
+    assert not backend.is_enabled()
+
+
+def test_other_command_is_not_ours(backend, tmp_path):
+    backend.enable()
+    assert not XdgBackend("water-reminder", "/usr/bin/other", config_dir=str(tmp_path)).is_enabled()
+
+
+class FailingBackend:
+
+    def is_enabled(self):
+        return False
+
+    def enable(self):
+        raise PermissionError("只读")
+
+    def disable(self):
+        pass
+
+
+def run_manager(manager, action):
+    from PyQt5 import QtCore
+    results = []
+    manager.state_changed.connect(lambda enabled: results.append(enabled))
+    manager.failed.connect(lambda error: results.append(error))
+    action()
+    manager.wait()
+    QtCore.QCoreApplication.processEvents()
+    return results
+
+
+def test_manager_runs_backend_in_background(backend):
+    pytest.importorskip("PyQt5")
+    from PyQt5 import QtCore
+    from water_reminder.autostart import AutostartManager
+
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])  # noqa: F841
+    manager = AutostartManager(backend=backend)
+    assert run_manager(manager, manager.probe) == [False]
+    assert run_manager(manager, lambda: manager.set_enabled(True)) == [True]
+    assert manager.enabled and not manager.busy
+
+    manager = AutostartManager(backend=FailingBackend())
+    assert run_manager(manager, lambda: manager.set_enabled(True)) == ["只读"]
+    assert manager.enabled is None
@@ -0,0 +1,109 @@
+import datetime
+
+import pytest
+
+from water_reminder import core
+from water_reminder.simulation import Policy, ProbabilisticResponder, SimulatedClock, simulate
+
+DAY = 86400
+
+
+@pytest.fixture
+def clock():
+    # 从某天的本地 08:00 开始，离跨天足够远
+    start = datetime.datetime(2026, 3, 2, 8, 0).timestamp()
+    return SimulatedClock(start_wall=start)
+
+
+def make_core(clock, **kwargs):
+    reminder = core.ReminderCore(clock=clock.monotonic, wall_clock=clock.wall, **kwargs)
+    events = []
+    reminder.subscribe(lambda event, value: events.append((event, value)))
+    return reminder, events
+
+
+def test_progress_and_due(clock):
+    reminder, events = make_core(clock, interval=100, steps=10)
+    reminder.start_cycle()
+    assert events[:2] == [(core.CYCLE_STARTED, 100.0), (core.PROGRESS, 0)]
+    clock.advance(55)
+    reminder.advance()
+    assert events[-1] == (core.PROGRESS, 5)
+    clock.advance(45)
+    reminder.advance()
+    assert reminder.is_due()
+    assert events[-2:] == [(core.PROGRESS, 10), (core.DUE, None)]
+    assert reminder.next_wakeup() is None
+
+
+def test_next_wakeup_is_strictly_after_now(clock):
+    reminder, _ = make_core(clock, interval=0.3, steps=3)
+    reminder.start_cycle()
+    for _ in range(10):
+        wakeup = reminder.next_wakeup()
+        if wakeup is None:
+            break
+        assert wakeup > clock.monotonic()
+        clock.advance_to(wakeup)
+        reminder.advance()
+    assert reminder.is_due()
+
+
+def test_pause_excludes_away_time(clock):
+    reminder, events = make_core(clock, interval=100, steps=100)
+    reminder.start_cycle()
+    clock.advance(30)
+    assert reminder.pause(since=clock.monotonic() - 10)
+    assert reminder.next_wakeup() is None
+    clock.advance(500)
+    reminder.resume()
+    assert events[-1] == (core.RESUMED, 100.0)
+    assert reminder.remaining() == pytest.approx(80)
+
+
+def test_pause_reasons_all_need_resuming(clock):
+    reminder, _ = make_core(clock, interval=100)
+    reminder.start_cycle()
+    reminder.pause(reason="idle")
+    reminder.pause(reason="quiet")
+    reminder.resume(reason="idle")
+    assert reminder.is_paused()
+    reminder.resume(reason="quiet")
+    assert not reminder.is_paused()
+
+
+def test_new_cycle_stays_paused_while_a_reason_remains(clock):
+    reminder, _ = make_core(clock, interval=100)
+    reminder.start_cycle()
+    reminder.pause(reason="quiet")
+    reminder.drink()
+    assert reminder.is_paused()
+    assert reminder.water_count == 1
+
+
+def test_snooze_uses_snooze_interval(clock):
+    reminder, _ = make_core(clock, interval=100, snooze_interval=20)
+    reminder.start_cycle()
+    reminder.snooze()
+    assert reminder.cycle_length == 20
+    assert reminder.snooze_count == 1
+
+
+def test_day_change_resets_count(clock):
+    reminder, events = make_core(clock, interval=100)
+    reminder.start_cycle()
+    reminder.drink()
+    reminder.drink()
+    clock.advance(DAY)
+    reminder.check_day()
+    assert reminder.water_count == 0
+    assert (core.DAY_CHANGED, reminder.today) in events
+    assert events[-1] == (core.COUNT, 0)
+
+
+def test_simulate_is_deterministic():
+    start = datetime.datetime(2026, 3, 2).timestamp()
+    first = simulate(Policy(interval=3600), ProbabilisticResponder(), days=3, start_wall=start, seed=1)
+    second = simulate(Policy(interval=3600), ProbabilisticResponder(), days=3, start_wall=start, seed=1)
+    assert first.summary() == second.summary()
+    assert sum(first.daily_drinks().values()) > 0
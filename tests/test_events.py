@@ -0,0 +1,66 @@
+import datetime
+
+import pytest
+
+from water_reminder import events
+
+MONDAY = datetime.datetime(2026, 3, 2, 9, 0).timestamp()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = events.EventStore(str(tmp_path / "events.sqlite3"), batch_size=3, clock=lambda: MONDAY)
+    yield store
+    store.close()
+
+
+def test_day_key_and_start():
+    assert events.day_key(MONDAY) == "2026-03-02"
+    assert events.day_start("2026-03-02") == datetime.datetime(2026, 3, 2).timestamp()
+
+
+def test_batching(store):
+    store.append(events.DRINK)
+    store.append(events.SNOOZE)
+    assert store.has_pending()
+    assert store.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 0
+    store.append(events.REMINDER_SHOWN)
+    assert not store.has_pending()
+    assert store.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 3
+
+
+def test_day_counts_include_pending_and_other_days(store):
+    store.append(events.DRINK)
+    store.append(events.DRINK)
+    store.append(events.SNOOZE)
+    store.append(events.DRINK)  # 尚未提交
+    store.append(events.DRINK, ts=MONDAY + 86400)
+    store.append(events.SETTINGS_CHANGED, {"interval": 600})
+    assert store.day_counts() == {"drinks": 3, "snoozes": 1, "reminders": 0}
+    assert store.day_counts("2026-03-03") == {"drinks": 1, "snoozes": 0, "reminders": 0}
+    store.flush()
+    assert store.day_counts("2026-03-02") == {"drinks": 3, "snoozes": 1, "reminders": 0}
+
+
+def test_load_events_filters(store):
+    store.append(events.DRINK, ts=MONDAY + 20)
+    store.append(events.SNOOZE, ts=MONDAY + 10)
+    store.append(events.DRINK, ts=MONDAY + 30)
+    assert store.load_events() == [
+        (MONDAY + 10, events.SNOOZE), (MONDAY + 20, events.DRINK), (MONDAY + 30, events.DRINK)
+    ]
+    assert store.load_events(kinds=[events.DRINK], since=MONDAY + 25) == [(MONDAY + 30, events.DRINK)]
+
+
+def test_checkpoint_round_trip(tmp_path):
+    path = str(tmp_path / "events.sqlite3")
+    store = events.EventStore(path)
+    assert store.load_checkpoint() is None
+    store.set_checkpoint(MONDAY, 1800)
+    store.append(events.DRINK, ts=MONDAY)
+    store.close()
+
+    store = events.EventStore(path)
+    assert store.load_checkpoint() == {"cycle_start": MONDAY, "interval": 1800}
+    assert store.day_counts("2026-03-02")["drinks"] == 1
+    store.close()
@@ -0,0 +1,87 @@
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from water_reminder import foreground  # noqa: E402
+
+ROOT, ACTIVE_ATOM, STATE_ATOM, WINDOW = 1, 10, 11, 2
+
+
+def test_monitor_reports_changes_only():
+    source = foreground.FakeForegroundSource()
+    monitor = foreground.ForegroundMonitor(source=source)
+    changes = []
+    monitor.fullscreen_changed.connect(changes.append)
+    monitor.start()
+    source.set_fullscreen(True)
+    source.set_fullscreen(True)
+    source.set_fullscreen(False)
+    assert changes == [True, False]
+    monitor.close()
+    assert source.listener is None
+
+
+def test_monitor_without_source():
+    monitor = foreground.ForegroundMonitor()
+    monitor.start()
+    assert not monitor.fullscreen
+    monitor.close()
+
+
+class FakeXlib:
+    """只实现 _process 用到的 XPending / XNextEvent，事件放在 queue 里"""
+
+    def __init__(self):
+        self.queue = []
+
+    def XPending(self, display):
+        return len(self.queue)
+
+    def XNextEvent(self, display, event):
+        window, atom = self.queue.pop(0)
+        event = event._obj
+        event.xproperty.type = foreground.PROPERTY_NOTIFY
+        event.xproperty.window = window
+        event.xproperty.atom = atom
+
+
+def make_source(xlib):
+    source = object.__new__(foreground.X11ForegroundSource)
+    source.xlib = xlib
+    source.display = 1
+    source.root = ROOT
+    source.atoms = {"_NET_ACTIVE_WINDOW": ACTIVE_ATOM, "_NET_WM_STATE": STATE_ATOM}
+    source.active = WINDOW
+    source._track_active = lambda: None
+    return source
+
+
+def test_process_drains_events_queued_while_notifying():
+    xlib = FakeXlib()
+    source = make_source(xlib)
+    states = iter([True, False])
+    calls = []
+
+    def is_fullscreen():
+        # 读属性的往返把之后到达的事件读进了队列，套接字不会再变为可读
+        if not calls:
+            xlib.queue.append((WINDOW, STATE_ATOM))
+        return next(states)
+
+    source.is_fullscreen = is_fullscreen
+    source.listener = calls.append
+    xlib.queue.append((WINDOW, STATE_ATOM))
+    source._process()
+    assert calls == [True, False]
+    assert not xlib.queue
+
+
+def test_process_ignores_unrelated_properties():
+    xlib = FakeXlib()
+    source = make_source(xlib)
+    calls = []
+    source.is_fullscreen = lambda: True
+    source.listener = calls.append
+    xlib.queue.extend([(WINDOW, 99), (3, STATE_ATOM)])
+    source._process()
+    assert calls == []
@@ -0,0 +1,136 @@
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from PyQt5 import QtCore  # noqa: E402
+
+from water_reminder import idle  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+@pytest.fixture
+def source():
+    return idle.FakeIdleSource()
+
+
+def make_monitor(source, threshold=300):
+    monitor = idle.IdleMonitor(threshold=threshold, source=source, watch_lock=False)
+    events = []
+    monitor.away.connect(lambda idle_for: events.append(("away", idle_for)))
+    monitor.returned.connect(lambda: events.append(("returned",)))
+    return monitor, events
+
+
+def test_waits_until_threshold(app, source):
+    monitor, events = make_monitor(source)
+    source.set_idle(100)
+    monitor.check()
+    assert events == []
+    assert monitor.timer.remainingTime() == pytest.approx(201000, abs=1000)
+    monitor.close()
+
+
+def test_away_and_return_with_backoff(app, source):
+    monitor, events = make_monitor(source)
+    source.set_idle(400)
+    monitor.check()
+    assert events == [("away", 400.0)]
+    polls = []
+    for seconds in (410, 420, 440, 480, 560, 720, 880):
+        polls.append(monitor.timer.interval())
+        source.set_idle(seconds)
+        monitor.check()
+    assert polls == [10000, 20000, 40000, 80000, 160000, 160000, 160000]
+    source.set_idle(2)
+    monitor.check()
+    assert events[-1] == ("returned",)
+    assert not monitor.is_away()
+    monitor.close()
+
+
+def test_lock_pauses_checks(app, source):
+    monitor, events = make_monitor(source)
+    monitor.set_locked(True)
+    assert events == [("away", 0.0)]
+    assert not monitor.timer.isActive()
+    monitor.set_locked(False)
+    assert events[-1] == ("returned",)
+    assert monitor.timer.isActive()
+    monitor.close()
+
+
+def test_zero_threshold_disables(app, source):
+    monitor, events = make_monitor(source)
+    source.set_idle(400)
+    monitor.check()
+    monitor.set_threshold(0)
+    assert events == [("away", 400.0), ("returned",)]
+    assert not monitor.timer.isActive()
+    monitor.close()
+
+
+class AlarmIdleSource(idle.FakeIdleSource):
+    """支持 watch_return 的来源，等待期间不需要轮询"""
+
+    def __init__(self, idle=0.0):
+        super().__init__(idle)
+        self.callback = None
+
+    def watch_return(self, idle, callback):
+        self.callback = callback
+        return True
+
+    def cancel_return(self):
+        self.callback = None
+
+
+def test_return_alarm_replaces_polling(app):
+    source = AlarmIdleSource(400)
+    monitor, events = make_monitor(source)
+    monitor.check()
+    assert source.callback is not None
+    assert not monitor.timer.isActive()
+    source.set_idle(0)
+    source.callback()
+    assert events == [("away", 400.0), ("returned",)]
+    monitor.close()
+
+
+class FakeXlib:
+    """只实现 _process 用到的 XPending / XNextEvent，事件类型放在 queue 里"""
+
+    def __init__(self):
+        self.queue = []
+
+    def XPending(self, display):
+        return len(self.queue)
+
+    def XNextEvent(self, display, event):
+        event._obj.type = self.queue.pop(0)
+
+
+def test_process_drains_events_queued_by_callback():
+    xlib = FakeXlib()
+    source = object.__new__(idle.X11IdleSource)
+    source.xlib = xlib
+    source.display = 1
+    source.alarm = 0
+    source.alarm_event = 90
+    calls = []
+
+    def callback():
+        # 回调中读取空闲时间的往返把下一次报警读进了队列
+        calls.append(len(calls))
+        if len(calls) == 1:
+            xlib.queue.append(source.alarm_event)
+            source.callback = callback
+
+    source.callback = callback
+    xlib.queue.extend([5, source.alarm_event])
+    source._process()
+    assert calls == [0, 1]
+    assert not xlib.queue
@@ -0,0 +1,36 @@
+"""每个模块都能导入（类定义时执行的装饰器等错误在这里暴露）
+
+每个模块在单独的进程中导入，避免先导入的模块（例如导入了 QtDBus）掩盖
+后导入的模块自身的问题。
+"""
+import os
+import pkgutil
+import subprocess
+import sys
+
+import pytest
+
+import water_reminder
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(water_reminder.__file__)))
+MODULES = sorted(name for _, name, _ in pkgutil.iter_modules(water_reminder.__path__))
+# 只能在对应平台上导入的模块
+PLATFORM_ONLY = {"autostart_windows": "win32"}
+# 不依赖 Qt 的模块，没有 PyQt5 时也必须能导入，导入后也不能带进 Qt
+QT_FREE = {"autostart_xdg", "core", "events", "paths", "rules", "simulation", "startup_trace", "stats", "status_file"}
+
+CHECK_QT_FREE = "import sys; assert 'PyQt5' not in sys.modules, '导入了 PyQt5'"
+
+
+@pytest.mark.parametrize("name", MODULES)
+def test_import(name):
+    platform = PLATFORM_ONLY.get(name)
+    if platform and sys.platform != platform:
+        pytest.skip(f"只在 {platform} 上可用")
+    code = f"import water_reminder.{name}"
+    if name in QT_FREE:
+        code += "; " + CHECK_QT_FREE
+    else:
+        pytest.importorskip("PyQt5")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
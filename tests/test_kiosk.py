@@ -0,0 +1,63 @@
+import argparse
+
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from water_reminder import kiosk, settings  # noqa: E402
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser()
+    kiosk.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def test_env_name():
+    assert kiosk.env_name("--window-opacity") == "WATER_REMINDER_WINDOW_OPACITY"
+
+
+def test_defaults():
+    mode = kiosk.resolve(parse_args([]), environ={})
+    assert not mode.kiosk and mode.overlay and mode.overrides == {}
+
+
+def test_arguments_override_environment():
+    environ = {
+        "WATER_REMINDER_KIOSK": "yes",
+        "WATER_REMINDER_INTERVAL": "600",
+        "WATER_REMINDER_TEXT": "喝口水",
+        "WATER_REMINDER_NO_OVERLAY": "0",
+    }
+    mode = kiosk.resolve(parse_args(["--interval", "1200.5", "--no-overlay"]), environ=environ)
+    assert mode.kiosk and not mode.overlay
+    assert mode.overrides == {"interval": 1200, "reminder_text": "喝口水"}
+
+
+@pytest.mark.parametrize("name, value", [
+    ("WATER_REMINDER_INTERVAL", "abc"),
+    ("WATER_REMINDER_INTERVAL", "0"),
+    ("WATER_REMINDER_WINDOW_OPACITY", "2"),
+    ("WATER_REMINDER_TEXT", "  "),
+    ("WATER_REMINDER_ESCALATION", "toast:60,pager"),
+])
+def test_invalid_environment_raises_value_error(name, value):
+    with pytest.raises(ValueError, match=name):
+        kiosk.resolve(parse_args([]), environ={name: value})
+
+
+def test_invalid_argument_exits():
+    with pytest.raises(SystemExit):
+        parse_args(["--progress-opacity", "-1"])
+
+
+def test_apply_and_release():
+    mode = kiosk.RunMode(overrides={"interval": 600, "reminder_text": "喝口水"})
+    base = settings.Settings(interval=3600, thin_bar=True)
+    applied = mode.apply(base)
+    assert applied.interval == 600 and applied.reminder_text == "喝口水" and applied.thin_bar
+    assert base.interval == 3600
+    mode.release(["interval"])
+    assert mode.apply(base).interval == 3600
+    mode.release(["reminder_text"])
+    assert mode.apply(base) is base
@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from PyQt5 import QtCore  # noqa: E402
+
+from water_reminder import notify  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+class FakeSink(notify.Sink):
+
+    def __init__(self, name, available=True, interactive=False):
+        super().__init__()
+        self.name = name
+        self.interactive = interactive
+        self.is_available = available
+        self.shown = []
+
+    def available(self):
+        return self.is_available
+
+    def show(self, text, screen=None, triggered_at=None):
+        self.shown.append(text)
+
+    def hide(self):
+        self.shown.append(None)
+
+
+def test_parse_policy():
+    assert notify.parse_policy("tray:120, toast:300,fullscreen") == [
+        ("tray", 120.0), ("toast", 300.0), ("fullscreen", None)
+    ]
+    assert notify.parse_policy("tray:abc,pager:10,toast:-5") == [("tray", None), ("toast", None)]
+    assert notify.parse_policy("") == [("fullscreen", None)]
+    assert notify.parse_policy(None) == [("fullscreen", None)]
+
+
+def test_parse_policy_caps_timeouts():
+    # QTimer 的毫秒数是 32 位有符号整数
+    assert notify.parse_policy("tray:1e9,fullscreen")[0] == ("tray", notify.MAX_TIMEOUT)
+    assert notify.parse_policy("tray:inf,fullscreen")[0] == ("tray", notify.MAX_TIMEOUT)
+    assert notify.MAX_TIMEOUT * 1000 <= 2 ** 31 - 1
+
+
+def test_escalator_steps_through_sinks(app):
+    tray, toast, full = FakeSink("tray"), FakeSink("toast", interactive=True), FakeSink("fullscreen")
+    escalator = notify.Escalator([tray, toast, full], "tray:1e9,toast:60,fullscreen")
+    levels = []
+    escalator.escalated.connect(levels.append)
+    escalator.start("喝水")
+    assert escalator.current() == "tray" and escalator.timer.isActive()
+    escalator.escalate()
+    escalator.escalate()
+    assert levels == ["tray", "toast", "fullscreen"]
+    escalator.stop()
+    assert not escalator.is_active()
+    assert full.shown == ["喝水", None]
+
+
+def test_escalator_falls_back_to_fullscreen(app):
+    desktop, full = FakeSink("desktop", available=False), FakeSink("fullscreen")
+    escalator = notify.Escalator([desktop, full], "desktop")
+    escalator.start("喝水")
+    assert escalator.current() == "fullscreen"
+
+
+def test_activating_jumps_to_interactive_sink(app):
+    tray, toast, full = FakeSink("tray"), FakeSink("toast"), FakeSink("fullscreen", interactive=True)
+    escalator = notify.Escalator([tray, toast, full], "tray:120,toast:300,fullscreen")
+    escalator.start("喝水")
+    tray.activated.emit()
+    assert escalator.current() == "fullscreen"
+    assert toast.shown == []
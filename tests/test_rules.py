@@ -0,0 +1,83 @@
+import datetime
+
+import pytest
+
+from water_reminder import rules
+
+
+def at(day, clock):
+    hour, minute = map(int, clock.split(":"))
+    return datetime.datetime.combine(day, datetime.time(hour, minute)).timestamp()
+
+
+MONDAY = datetime.date(2026, 3, 2)
+SATURDAY = datetime.date(2026, 3, 7)
+
+SCHEDULE = {
+    "active": {"mon-fri": [["09:00", "18:00"]], "sat": [], "sun": []},
+    "quiet_hours": [["12:00", "13:00"]],
+    "holidays": ["2026-03-03"],
+    "bands": [{"from": "09:00", "to": "11:00", "interval": 1800}],
+}
+
+
+def test_parse_clock():
+    assert rules.parse_clock("09:30") == 570
+    assert rules.parse_clock("24:00") == 1440
+    for text in ("9", "25:00", "24:01", "ab:cd"):
+        with pytest.raises(ValueError):
+            rules.parse_clock(text)
+
+
+def test_segments():
+    schedule = rules.Schedule(SCHEDULE)
+    assert schedule.is_quiet(at(MONDAY, "08:59"))
+    assert schedule.segment_at(at(MONDAY, "09:30")).interval == 1800
+    segment = schedule.segment_at(at(MONDAY, "11:30"))
+    assert not segment.quiet and segment.interval is None
+    assert schedule.is_quiet(at(MONDAY, "12:30"))
+    assert schedule.is_quiet(at(SATURDAY, "10:00"))
+    assert schedule.is_quiet(at(MONDAY + datetime.timedelta(days=1), "10:00"))  # 假日
+    assert schedule.next_transition(at(MONDAY, "11:30")) == at(MONDAY, "12:00")
+
+
+def test_quiet_hours_across_midnight():
+    schedule = rules.Schedule({"quiet_hours": [["22:00", "07:00"]]})
+    assert schedule.is_quiet(at(MONDAY, "23:00"))
+    assert schedule.is_quiet(at(MONDAY, "06:59"))
+    assert not schedule.is_quiet(at(MONDAY, "07:00"))
+
+
+def test_fire_time_skips_quiet_hours():
+    schedule = rules.Schedule({"quiet_hours": [["12:00", "13:00"]]})
+    assert schedule.fire_time(at(MONDAY, "11:30"), 3600) == at(MONDAY, "13:30")
+
+
+def test_empty_schedule():
+    schedule = rules.Schedule()
+    assert schedule.is_empty()
+    assert not schedule.is_quiet(at(MONDAY, "03:00"))
+    assert schedule.next_transition(at(MONDAY, "03:00")) is None
+    assert schedule.fire_time(100.0, 50) == 150.0
+
+
+@pytest.mark.parametrize("data", [
+    ["x"],
+    {"active": "x"},
+    {"active": {"mon": 5}},
+    {"active": {"mon": [5]}},
+    {"active": {"someday": []}},
+    {"bands": 5},
+    {"bands": [5]},
+    {"bands": [{"from": "09:00", "to": "10:00", "interval": True}]},
+    {"bands": [{"from": "09:00", "to": "10:00", "interval": 0}]},
+    {"bands": [{"from": "09:00", "to": "10:00", "interval": float("nan")}]},
+    {"bands": [{"from": "09:00", "interval": 600}]},
+    {"quiet_hours": 5},
+    {"quiet_hours": [["12:00"]]},
+    {"holidays": 5},
+    {"holidays": ["2026-13-01"]},
+])
+def test_malformed_rules_raise_value_error(data):
+    with pytest.raises(ValueError):
+        rules.Rules(data)
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from water_reminder import settings  # noqa: E402
+
+
+def document(values, version=settings.VERSION):
+    return json.dumps({"version": version, "settings": values})
+
+
+def test_dump_parse_round_trip():
+    original = settings.Settings(interval=600, disabled_screens=["HDMI-1"], power_mode="low_power")
+    assert settings.parse(settings.dump(original)) == original
+
+
+def test_missing_fields_use_defaults():
+    assert settings.parse(document({})) == settings.Settings()
+    assert settings.parse(document(None)) == settings.Settings()
+
+
+@pytest.mark.parametrize("text", [
+    "[]",
+    "not json",
+    json.dumps({"settings": {}}),
+    document({}, version=0),
+    document({}, version=settings.VERSION + 1),
+    document({}, version="1"),
+])
+def test_bad_documents_raise_value_error(text):
+    with pytest.raises(ValueError):
+        settings.parse(text)
+
+
+@pytest.mark.parametrize("key, value", [
+    ("interval", 0),
+    ("interval", True),
+    ("interval", "600"),
+    ("window_opacity", 1.5),
+    ("progress_opacity", -0.1),
+    ("idle_threshold", -1),
+    ("thin_bar", 1),
+    ("power_mode", "turbo"),
+    ("idle_policy", 5),
+    ("disabled_screens", "HDMI-1"),
+    ("schedule", []),
+])
+def test_invalid_fields_fall_back_to_default(key, value):
+    parsed = settings.parse(document({key: value, "reminder_text": "喝口水"}))
+    assert getattr(parsed, key) == settings.DEFAULTS[key]
+    assert parsed.reminder_text == "喝口水"
+
+
+def test_in_range():
+    assert settings.in_range("interval", 1)
+    assert not settings.in_range("interval", 0.5)
+    assert settings.in_range("window_opacity", 1.0)
+    assert not settings.in_range("window_opacity", 1.01)
+    assert settings.in_range("reminder_text", "任意")
+
+
+def test_settings_copies_mutable_defaults():
+    first = settings.Settings()
+    first.disabled_screens.append("HDMI-1")
+    assert settings.Settings().disabled_screens == []
+
+
+def test_store_flush_and_load(tmp_path):
+    path = str(tmp_path / settings.FILE_NAME)
+    store = settings.SettingsStore(path=path)
+    assert store.load() == settings.Settings()
+    assert not store.valid
+    store.save(settings.Settings(interval=900))
+    assert store.flush()
+    assert settings.SettingsStore(path=path).load().interval == 900
@@ -0,0 +1,93 @@
+import datetime
+import random
+
+import pytest
+
+from water_reminder import events, stats
+
+MONDAY = datetime.date(2026, 3, 2)
+
+
+def at(day, hour, minute=0):
+    return datetime.datetime.combine(day, datetime.time(hour, minute)).timestamp()
+
+
+def make_rows(days=20, seed=3):
+    rng = random.Random(seed)
+    rows = []
+    kinds = (events.DRINK, events.SNOOZE, events.REMINDER_SHOWN, events.SETTINGS_CHANGED)
+    for offset in range(days):
+        if offset % 7 == 5:
+            continue  # 中间留空，连续天数要断开
+        day = MONDAY + datetime.timedelta(days=offset)
+        for _ in range(rng.randint(1, 8)):
+            rows.append((at(day, rng.randint(0, 23), rng.randint(0, 59)), rng.choice(kinds)))
+    rows.sort()
+    return rows
+
+
+def loop_stats(rows):
+    result = stats.HydrationStats()
+    for ts, kind in rows:
+        result.add(ts, kind)
+    return result
+
+
+def test_add_counts_day_week_and_response():
+    result = stats.HydrationStats()
+    result.add(at(MONDAY, 9), events.REMINDER_SHOWN)
+    result.add(at(MONDAY, 9, 5), events.DRINK)
+    result.add(at(MONDAY, 10), events.SNOOZE)
+    result.add(at(MONDAY, 10, 1), events.SETTINGS_CHANGED)
+    assert result.day_totals(MONDAY) == (1, 1, 1)
+    assert result.week_totals(MONDAY + datetime.timedelta(days=6)) == (1, 1, 1)
+    assert result.heatmap[0][9] == 1
+    assert result.mean_response() == pytest.approx(300)
+    assert result.snooze_ratio() == pytest.approx(0.5)
+
+
+def test_streak():
+    result = stats.HydrationStats()
+    for offset in (0, 1, 2, 4, 5):
+        result.add(at(MONDAY + datetime.timedelta(days=offset), 12), events.DRINK)
+    assert result.longest_streak == 3
+    friday = MONDAY + datetime.timedelta(days=4)
+    assert result.streak(friday + datetime.timedelta(days=2)) == 2
+    assert result.streak(friday + datetime.timedelta(days=3)) == 0
+
+
+def test_vectorized_rebuild_matches_loop():
+    pytest.importorskip("numpy")
+    rows = make_rows()
+    expected = loop_stats(rows)
+    result = stats.HydrationStats()
+    result.rebuild(rows)
+    for name in ("daily", "weekly", "heatmap", "drinks", "snoozes", "response_count",
+                 "current_streak", "longest_streak", "last_drink_day", "last_kind", "last_ts"):
+        assert getattr(result, name) == getattr(expected, name), name
+    assert result.response_total == pytest.approx(expected.response_total)
+
+
+def test_rebuild_without_numpy(monkeypatch):
+    rows = make_rows(days=5)
+    monkeypatch.setattr(stats, "numpy", None)
+    result = stats.HydrationStats()
+    result.rebuild(rows)
+    assert result.daily == loop_stats(rows).daily
+
+
+def test_rebuild_clears_previous_state():
+    result = stats.HydrationStats()
+    result.add(at(MONDAY, 9), events.DRINK)
+    result.rebuild([])
+    assert result.drinks == 0
+    assert result.day_totals(MONDAY) == (0, 0, 0)
+
+
+def test_recent_days_newest_first():
+    result = stats.HydrationStats()
+    result.add(at(MONDAY, 9), events.DRINK)
+    days = result.recent_days(3, today=MONDAY + datetime.timedelta(days=1))
+    assert [row[0] for row in days] == [MONDAY + datetime.timedelta(days=1), MONDAY,
+                                        MONDAY - datetime.timedelta(days=1)]
+    assert days[1][1:] == (1, 0, 0)
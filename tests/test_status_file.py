@@ -0,0 +1,115 @@
+import os
+import time
+
+import pytest
+
+from water_reminder import status_file
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "status")
+
+
+def read(path, now=None):
+    reader = status_file.StatusReader(path)
+    try:
+        return reader.read(now)
+    finally:
+        reader.close()
+
+
+def writer_time(path):
+    reader = status_file.StatusReader(path)
+    try:
+        return reader.read_raw()[2]
+    finally:
+        reader.close()
+
+
+def test_round_trip(path):
+    writer = status_file.StatusWriter(path)
+    now = time.time()
+    assert writer.publish(status_file.QUIET, cycle_start=now - 100, deadline=now + 100,
+                          progress=0.5, count=3, interval=200, tier="toast")
+    status = read(path, now=writer_time(path))
+    assert status["running"] and status["quiet"] and not status["due"]
+    assert status["pid"] == os.getpid()
+    assert status["count"] == 3 and status["interval"] == 200
+    assert status["cycle_start"] == pytest.approx(now - 100)
+    assert status["next_deadline"] == pytest.approx(now + 100)
+    assert status["progress"] == pytest.approx(0.5, abs=0.01)
+    assert status["reminder"] == "toast"
+    writer.close()
+
+
+def test_progress_extrapolated_to_deadline(path):
+    writer = status_file.StatusWriter(path)
+    now = time.time()
+    writer.publish(cycle_start=now, deadline=now + 100, progress=0.0)
+    updated = writer_time(path)
+    assert read(path, now=updated + (now + 100 - updated) / 2)["progress"] == pytest.approx(0.5, abs=0.01)
+    assert read(path, now=now + 1000)["progress"] == 1.0
+    writer.close()
+
+
+def test_skip_if_unchanged(path):
+    writer = status_file.StatusWriter(path)
+    now = time.time()
+    assert writer.publish(cycle_start=now, deadline=now + 100, progress=0.1, count=1)
+    # 只有进度和不到容差的时间抖动，不写
+    assert not writer.publish(cycle_start=now + 0.01, deadline=now + 100.2, progress=0.2, count=1)
+    assert writer.publish(cycle_start=now, deadline=now + 100, progress=0.2, count=2)
+    assert writer.publish(cycle_start=now, deadline=now + 102, progress=0.2, count=2)
+    assert writer.publish(status_file.PAUSED, cycle_start=now, deadline=now + 102, count=2)
+    assert writer.publish(status_file.PAUSED, cycle_start=now, count=2)
+    assert not writer.publish(status_file.PAUSED, cycle_start=now, count=2)
+    writer.close()
+
+
+def test_close_clears_running(path):
+    writer = status_file.StatusWriter(path)
+    writer.publish(count=4)
+    writer.close()
+    status = read(path)
+    assert not status["running"]
+    assert status["count"] == 4
+    assert not writer.publish(count=5)  # 关闭后不再写入
+
+
+def test_sequence_survives_restart(path):
+    writer = status_file.StatusWriter(path)
+    writer.publish(count=1)
+    seq = writer.seq
+    writer.close()
+    writer = status_file.StatusWriter(path)
+    assert writer.seq >= seq and writer.seq % 2 == 0
+    writer.close()
+
+
+def test_bad_file(tmp_path):
+    path = tmp_path / "status"
+    path.write_bytes(b"x" * status_file.SIZE)
+    with pytest.raises(ValueError):
+        read(str(path))
+    with pytest.raises(OSError):
+        read(str(tmp_path / "missing"))
+
+
+def test_format_status():
+    status = {"running": True, "progress": 0.456, "count": 3, "next_deadline": None,
+              "reminder": None, "due": False}
+    assert status_file.format_status(status) == "💧 3  45%  --:--"
+    assert status_file.format_status(dict(status, due=True)) == "💧 3  提醒中"
+    assert status_file.format_status(status, "{percent}/{count}") == "45/3"
+    assert status_file.format_status({"running": False}) == "💧 未运行"
+
+
+def test_main_exit_codes(path, capsys):
+    assert status_file.main(["--path", path]) == 3
+    writer = status_file.StatusWriter(path)
+    writer.publish(count=2)
+    assert status_file.main(["--path", path, "--format", "{count}"]) == 0
+    assert capsys.readouterr().out.splitlines()[-1] == "2"
+    assert status_file.main(["--path", path, "--format", "{nope}"]) == 1
+    writer.close()
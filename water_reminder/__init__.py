@@ -0,0 +1 @@
+"""喝水提醒小助手的功能模块"""
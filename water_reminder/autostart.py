@@ -0,0 +1,112 @@
+"""开机自启动
+
+后端按平台延迟导入：Windows 使用注册表（autostart_windows），
+其他平台使用 XDG autostart 目录（autostart_xdg）。读写都放到后台线程，
+结果通过信号交回界面线程，启动和托盘菜单都不会被注册表或磁盘 I/O 阻塞。
+
+后端只需要实现 is_enabled()、enable()、disable() 三个方法。
+"""
+import os
+import sys
+
+from PyQt5 import QtCore
+
+REGISTRY_NAME = "WaterReminder"
+XDG_NAME = "water-reminder"
+
+
+def default_command():
+    """返回开机时执行的命令：打包后的 exe，或者用当前解释器运行脚本"""
+    if getattr(sys, "frozen", False):
+        return sys.executable
+    if sys.platform == "win32":
+        return sys.argv[0]
+    return f'"{sys.executable}" "{os.path.abspath(sys.argv[0])}"'
+
+
+def create_backend(command=None, config_dir=None):
+    """按平台创建后端，config_dir 只对 XDG 后端有效"""
+    command = command or default_command()
+    if sys.platform == "win32":
+        from water_reminder.autostart_windows import RegistryBackend
+        return RegistryBackend(REGISTRY_NAME, command)
+    from water_reminder.autostart_xdg import XdgBackend
+    return XdgBackend(XDG_NAME, command, config_dir=config_dir)
+
+
+class _Job(QtCore.QRunnable):
+    """在线程池中执行一次后端操作，完成后发出信号"""
+
+    def __init__(self, func, done):
+        super().__init__()
+        self.func = func
+        self.done = done
+
+    def run(self):
+        try:
+            result, error = self.func(), ""
+        except Exception as e:  # 后端错误交给界面提示
+            result, error = None, str(e) or e.__class__.__name__
+        self.done.emit(result, error)
+
+
+class AutostartManager(QtCore.QObject):
+    """在后台线程探测和切换开机自启动
+
+    所有操作在同一个单线程的线程池里按顺序执行；后端在第一次操作时
+    才在后台线程里创建（并导入对应模块）。
+    """
+
+    # 探测或切换完成后的状态
+    state_changed = QtCore.pyqtSignal(bool)
+    # 切换失败，参数为错误信息
+    failed = QtCore.pyqtSignal(str)
+    _finished = QtCore.pyqtSignal(object, str)
+
+    def __init__(self, parent=None, command=None, config_dir=None, backend=None):
+        super().__init__(parent)
+        self.command = command
+        self.config_dir = config_dir
+        self.backend = backend
+        self.enabled = None  # 尚未探测
+        self.busy = False
+
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._finished.connect(self._on_finished, QtCore.Qt.QueuedConnection)
+
+    def _backend(self):
+        if self.backend is None:
+            self.backend = create_backend(self.command, self.config_dir)
+        return self.backend
+
+    def _submit(self, func):
+        self.busy = True
+        self.pool.start(_Job(func, self._finished))
+
+    def probe(self):
+        """读取当前是否已开机自启"""
+        self._submit(lambda: self._backend().is_enabled())
+
+    def set_enabled(self, enabled):
+        """开启或关闭开机自启"""
+        def apply():
+            backend = self._backend()
+            if enabled:
+                backend.enable()
+            else:
+                backend.disable()
+            return backend.is_enabled()
+        self._submit(apply)
+
+    def _on_finished(self, result, error):
+        self.busy = False
+        if error:
+            self.failed.emit(error)
+            return
+        self.enabled = bool(result)
+        self.state_changed.emit(self.enabled)
+
+    def wait(self, msecs=-1):
+        """等待后台操作完成（退出前使用）"""
+        return self.pool.waitForDone(msecs)
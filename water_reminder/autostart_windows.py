@@ -0,0 +1,35 @@
+"""开机自启动：Windows 注册表后端（HKCU 的 Run 键）"""
+import winreg
+
+RUN_KEY = r"Software\Microsoft\Windows\CurrentVersion\Run"
+
+
+class RegistryBackend:
+    """在 HKEY_CURRENT_USER\\...\\Run 下写入启动命令"""
+
+    def __init__(self, app_name, command, key_path=RUN_KEY):
+        self.app_name = app_name
+        self.command = command
+        self.key_path = key_path
+
+    def is_enabled(self):
+        """检查是否已设置开机自启"""
+        try:
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.key_path, 0, winreg.KEY_READ) as key:
+                value, _ = winreg.QueryValueEx(key, self.app_name)
+        except OSError:
+            return False
+        return value == self.command
+
+    def enable(self):
+        """添加到开机自启"""
+        with winreg.CreateKeyEx(winreg.HKEY_CURRENT_USER, self.key_path, 0, winreg.KEY_SET_VALUE) as key:
+            winreg.SetValueEx(key, self.app_name, 0, winreg.REG_SZ, self.command)
+
+    def disable(self):
+        """从开机自启动中移除"""
+        try:
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.key_path, 0, winreg.KEY_SET_VALUE) as key:
+                winreg.DeleteValue(key, self.app_name)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,63 @@
+"""开机自启动：XDG 后端（~/.config/autostart/*.desktop）"""
+import os
+
+DESKTOP_TEMPLATE = """[Desktop Entry]
+Type=Application
+Name={name}
+Exec={command}
+Terminal=false
+X-GNOME-Autostart-enabled=true
+"""
+
+
+def config_home():
+    """返回 XDG 配置目录"""
+    return os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+
+
+class XdgBackend:
+    """在 autostart 目录下放置 .desktop 文件
+
+    config_dir 默认为 $XDG_CONFIG_HOME（或 ~/.config），测试时可以指向临时目录。
+    """
+
+    def __init__(self, app_name, command, config_dir=None):
+        self.app_name = app_name
+        self.command = command
+        self.path = os.path.join(config_dir or config_home(), "autostart", f"{app_name}.desktop")
+
+    def _read_entry(self):
+        entry = {}
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                key, sep, value = line.strip().partition("=")
+                if sep:
+                    entry.setdefault(key, value)
+        return entry
+
+    def is_enabled(self):
+        """.desktop 文件存在、命令一致且没有被禁用"""
+        try:
+            entry = self._read_entry()
+        except OSError:
+            return False
+        if entry.get("Hidden", "").lower() == "true":
+            return False
+        if entry.get("X-GNOME-Autostart-enabled", "true").lower() == "false":
+            return False
+        return entry.get("Exec") == self.command
+
+    def enable(self):
+        """写入 .desktop 文件（先写临时文件再替换）"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(DESKTOP_TEMPLATE.format(name="喝水提醒小助手", command=self.command))
+        os.replace(temp_path, self.path)
+
+    def disable(self):
+        """删除 .desktop 文件"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
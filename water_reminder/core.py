@@ -0,0 +1,252 @@
+"""与界面无关的提醒状态机
+
+提醒间隔、进度、稍后、计数和跨天重置都在这里，不依赖 Qt，
+时钟可以注入，便于用模拟时钟快速回放。界面层通过 subscribe 订阅事件，
+并按 next_wakeup() 布置定时器驱动 advance()。
+"""
+import datetime
+import time
+
+from water_reminder.events import DRINK, SNOOZE
+
+PROGRESS = "progress"  # 值为当前可见进度格数
+DUE = "due"  # 本周期到期
+CYCLE_STARTED = "cycle_started"  # 值为本周期长度（秒）
+COUNT = "count"  # 值为今日喝水次数
+DAY_CHANGED = "day_changed"  # 值为新的日期
+PAUSED = "paused"  # 周期暂停（用户离开或锁屏）
+RESUMED = "resumed"  # 暂停的周期继续，值为本周期长度（秒）
+
+
+def monotonic_seconds():
+    """返回单调时钟秒数，Linux 下使用包含系统休眠时间的 BOOTTIME"""
+    if hasattr(time, "CLOCK_BOOTTIME"):
+        return time.clock_gettime(time.CLOCK_BOOTTIME)
+    # Windows 的 monotonic 基于 GetTickCount64，本身包含休眠时间
+    return time.monotonic()
+
+
+class ReminderCore:
+    """喝水提醒状态机
+
+    clock 为单调时钟（用于周期计时），wall_clock 为墙钟（用于日期和记录）。
+    snooze_interval 为点击稍后之后下一次提醒的间隔，None 表示与 interval 相同。
+    """
+
+    def __init__(self, interval=10800, snooze_interval=None, steps=100,
+                 clock=monotonic_seconds, wall_clock=time.time):
+        self.interval = interval
+        self.snooze_interval = snooze_interval
+        self.steps = steps
+        self.clock = clock
+        self.wall_clock = wall_clock
+
+        self.water_count = 0
+        self.snooze_count = 0
+        self.today = datetime.date.fromtimestamp(wall_clock())
+
+        self.cycle_start = None
+        self.cycle_length = None
+        self.paused_at = None  # 暂停时的单调时钟时间，未暂停时为 None
+        self.pause_reasons = set()  # 暂停的原因，全部解除后才继续
+        self.due = False
+        self.last_value = None
+        self.listeners = []
+
+    def subscribe(self, listener):
+        """订阅事件，listener(event, value)"""
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        """取消订阅"""
+        self.listeners.remove(listener)
+
+    def notify(self, event, value=None):
+        """通知所有订阅者"""
+        for listener in list(self.listeners):
+            listener(event, value)
+
+    # 周期控制
+
+    def start_cycle(self, length=None, elapsed=0):
+        """开始新的提醒周期，length 默认为提醒间隔，elapsed 为已经过去的秒数"""
+        self.cycle_length = max(float(length or self.interval), 0.001)
+        self.cycle_start = self.clock() - elapsed
+        self.paused_at = None
+        self.due = False
+        self.last_value = None
+        self.notify(CYCLE_STARTED, self.cycle_length)
+        if self.pause_reasons:
+            # 仍有暂停原因（例如处于免打扰时段），新周期开始后保持暂停
+            self.paused_at = self.clock()
+            self.notify(PAUSED)
+        self.advance()
+
+    def stop(self):
+        """停止计时"""
+        self.cycle_start = None
+        self.cycle_length = None
+        self.paused_at = None
+
+    def pause(self, since=None, reason="idle"):
+        """以 reason 为原因暂停计时，进度停在 since（单调时钟时间，默认为现在）
+
+        since 可以早于现在，用于把检测到离开之前的空闲时间也排除在外。
+        同时可以有多个原因（离开、免打扰时段），全部 resume 之后才继续。
+        未计时、已到期或已暂停时只记录原因，返回本次是否暂停了周期。
+        """
+        self.pause_reasons.add(reason)
+        if not self.is_running() or self.due or self.paused_at is not None:
+            return False
+        now = self.clock()
+        since = now if since is None else since
+        self.paused_at = min(max(since, self.cycle_start), now)
+        self.notify(PAUSED)
+        self.advance()
+        return True
+
+    def resume(self, reset=False, reason="idle"):
+        """解除 reason 的暂停，没有其他原因时继续；reset 为 True 时改为开始新周期"""
+        self.pause_reasons.discard(reason)
+        if self.paused_at is None or self.pause_reasons:
+            return
+        if reset:
+            self.start_cycle()
+            return
+        self.cycle_start += self.clock() - self.paused_at
+        self.paused_at = None
+        self.notify(RESUMED, self.cycle_length)
+        self.advance()
+
+    def set_interval(self, interval):
+        """修改提醒间隔并重新开始周期"""
+        self.interval = interval
+        self.start_cycle()
+
+    def set_steps(self, steps):
+        """设置可见进度的格数（进度条最大值或像素宽度）"""
+        self.steps = max(int(steps), 1)
+        self.last_value = None
+        self.advance()
+
+    # 状态查询
+
+    def is_running(self):
+        """是否处于计时周期中"""
+        return self.cycle_start is not None
+
+    def is_paused(self):
+        """周期是否处于暂停中"""
+        return self.paused_at is not None
+
+    def now(self):
+        """计算进度用的时间，暂停时停在暂停的时刻"""
+        return self.clock() if self.paused_at is None else self.paused_at
+
+    def is_due(self):
+        """本周期是否已到期"""
+        return self.due
+
+    def deadline(self):
+        """本周期到期的单调时钟时间"""
+        if not self.is_running():
+            return None
+        return self.cycle_start + self.cycle_length
+
+    def progress(self):
+        """返回当前进度百分比（0.0 - 100.0）"""
+        if not self.is_running():
+            return 0.0
+        elapsed = self.now() - self.cycle_start
+        return min(max(elapsed / self.cycle_length, 0.0), 1.0) * 100
+
+    def value(self):
+        """返回当前可见进度格数"""
+        return int(self.progress() * self.steps / 100)
+
+    def remaining(self):
+        """返回距离到期的秒数"""
+        if not self.is_running():
+            return 0.0
+        return max(self.deadline() - self.now(), 0.0)
+
+    def cycle_start_wall(self):
+        """本周期开始的墙钟时间"""
+        if not self.is_running():
+            return None
+        return self.wall_clock() - (self.clock() - self.cycle_start)
+
+    def next_wakeup(self, visible=True):
+        """返回下一次需要调用 advance() 的单调时钟时间
+
+        visible 为 True 时包含下一格可见进度的变化，否则只返回到期时间；
+        已到期、暂停或未计时时返回 None。
+        """
+        if not self.is_running() or self.due or self.paused_at is not None:
+            return None
+        deadline = self.deadline()
+        if not visible:
+            return deadline
+        step_length = self.cycle_length / self.steps
+        now = self.clock()
+        current = int((now - self.cycle_start) / step_length)
+        # 浮点舍入可能让算出的格边界不晚于当前时间，取严格在当前时间之后的第一个边界
+        boundary = self.cycle_start + (current + 1) * step_length
+        while boundary <= now:
+            current += 1
+            boundary = self.cycle_start + (current + 1) * step_length
+        return min(boundary, deadline)
+
+    # 推进与用户操作
+
+    def advance(self):
+        """按当前时间更新进度，必要时发出到期事件"""
+        self.check_day()
+        if not self.is_running():
+            return
+        now = self.now()
+        if now >= self.deadline():
+            self._set_value(self.steps)
+            if not self.due:
+                self.due = True
+                self.notify(DUE)
+            return
+        step_length = self.cycle_length / self.steps
+        current = int((now - self.cycle_start) / step_length)
+        self._set_value(min(current, self.steps - 1))
+
+    def _set_value(self, value):
+        """仅在可见进度变化时发出事件"""
+        if value != self.last_value:
+            self.last_value = value
+            self.notify(PROGRESS, value)
+
+    def drink(self):
+        """喝水：计数加一并开始新周期"""
+        self.check_day()
+        self.water_count += 1
+        self.notify(DRINK)
+        self.notify(COUNT, self.water_count)
+        self.start_cycle()
+
+    def snooze(self):
+        """稍后：按稍后间隔开始新周期"""
+        self.snooze_count += 1
+        self.notify(SNOOZE)
+        self.start_cycle(self.snooze_interval or self.interval)
+
+    def set_count(self, count):
+        """设置今日喝水次数（从持久化记录恢复时使用）"""
+        self.water_count = count
+        self.notify(COUNT, count)
+
+    def check_day(self):
+        """日期变化时重置今日喝水次数"""
+        today = datetime.date.fromtimestamp(self.wall_clock())
+        if today == self.today:
+            return
+        self.today = today
+        self.water_count = 0
+        # 订阅者可以在这里用持久化的记录覆盖计数
+        self.notify(DAY_CHANGED, today)
+        self.notify(COUNT, self.water_count)
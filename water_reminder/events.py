@@ -0,0 +1,179 @@
+"""持久化的喝水事件日志
+
+事件只追加写入 SQLite（WAL 模式），写入先在内存中攒批，一次事务提交一批，
+减少 fsync 次数。每天的喝水/稍后次数作为快照与事件在同一事务中更新，
+启动时只需读取当天快照和快照之后的少量事件，不必扫描全部历史。
+"""
+import datetime
+import json
+import os
+import sqlite3
+import time
+
+from water_reminder.paths import data_dir
+
+DRINK = "drink"
+SNOOZE = "snooze"
+REMINDER_SHOWN = "reminder_shown"
+SETTINGS_CHANGED = "settings_changed"
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+CREATE TABLE IF NOT EXISTS daily (
+    day TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL,
+    drinks INTEGER NOT NULL DEFAULT 0,
+    snoozes INTEGER NOT NULL DEFAULT 0,
+    reminders INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS checkpoint (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def day_key(ts):
+    """将时间戳转换为本地日期字符串"""
+    return datetime.date.fromtimestamp(ts).isoformat()
+
+
+def day_start(day):
+    """返回本地日期零点的时间戳"""
+    date = datetime.date.fromisoformat(day)
+    return time.mktime(date.timetuple())
+
+
+class EventStore:
+    """追加写入的事件存储，支持攒批提交和周期检查点"""
+
+    COUNTED = {DRINK: "drinks", SNOOZE: "snoozes", REMINDER_SHOWN: "reminders"}
+
+    def __init__(self, path=None, batch_size=32, clock=time.time):
+        if path is None:
+            path = os.path.join(data_dir(), "events.sqlite3")
+        self.path = path
+        self.batch_size = batch_size
+        self.clock = clock
+        self.pending = []
+        self.pending_checkpoint = None
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # WAL 下 FULL 保证每次提交落盘，攒批后提交次数很少
+        self.conn.execute("PRAGMA synchronous=FULL")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def append(self, kind, data=None, ts=None):
+        """追加一条事件，达到批量大小时立即提交"""
+        if ts is None:
+            ts = self.clock()
+        self.pending.append((ts, kind, json.dumps(data, ensure_ascii=False) if data else None))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def set_checkpoint(self, cycle_start, interval):
+        """记录当前提醒周期（墙钟开始时间和间隔秒数），随下一批事件一起提交"""
+        self.pending_checkpoint = {"cycle_start": cycle_start, "interval": interval}
+
+    def has_pending(self):
+        """是否有尚未提交的数据"""
+        return bool(self.pending) or self.pending_checkpoint is not None
+
+    def flush(self):
+        """在一个事务中提交所有待写事件、当日快照和检查点"""
+        if not self.has_pending():
+            return
+        with self.conn:
+            for ts, kind, data in self.pending:
+                cursor = self.conn.execute(
+                    "INSERT INTO events (ts, kind, data) VALUES (?, ?, ?)", (ts, kind, data)
+                )
+                self._update_daily(day_key(ts), cursor.lastrowid, kind)
+            if self.pending_checkpoint is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO checkpoint (key, value) VALUES ('cycle', ?)",
+                    (json.dumps(self.pending_checkpoint),)
+                )
+        self.pending = []
+        self.pending_checkpoint = None
+
+    def _update_daily(self, day, event_id, kind):
+        """更新某天的计数快照"""
+        column = self.COUNTED.get(kind)
+        self.conn.execute(
+            "INSERT INTO daily (day, last_id) VALUES (?, ?) "
+            "ON CONFLICT(day) DO UPDATE SET last_id = excluded.last_id",
+            (day, event_id)
+        )
+        if column:
+            self.conn.execute(
+                f"UPDATE daily SET {column} = {column} + 1 WHERE day = ?", (day,)
+            )
+
+    def load_checkpoint(self):
+        """读取上次记录的提醒周期，没有时返回 None"""
+        row = self.conn.execute("SELECT value FROM checkpoint WHERE key = 'cycle'").fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def day_counts(self, day=None):
+        """返回某天（默认今天）的喝水、稍后和提醒次数
+
+        以快照为基础，再补上快照之后写入的事件和内存中尚未提交的事件。
+        """
+        if day is None:
+            day = day_key(self.clock())
+        counts = {"drinks": 0, "snoozes": 0, "reminders": 0}
+        last_id = 0
+        row = self.conn.execute(
+            "SELECT last_id, drinks, snoozes, reminders FROM daily WHERE day = ?", (day,)
+        ).fetchone()
+        if row is not None:
+            last_id, counts["drinks"], counts["snoozes"], counts["reminders"] = row
+
+        start = day_start(day)
+        end = start + 86400 * 2  # 夏令时切换的日子可能长于 24 小时，按日期再次过滤
+        tail = self.conn.execute(
+            "SELECT ts, kind FROM events WHERE id > ? AND ts >= ? AND ts < ?",
+            (last_id, start, end)
+        ).fetchall()
+        for ts, kind, _ in self.pending:
+            tail.append((ts, kind))
+        for ts, kind in tail:
+            column = self.COUNTED.get(kind)
+            if column and day_key(ts) == day:
+                counts[column] += 1
+        return counts
+
+    def load_events(self, kinds=None, since=None):
+        """按时间顺序返回 [(时间戳, 类型)]，可按类型和起始时间过滤"""
+        self.flush()
+        query = "SELECT ts, kind FROM events"
+        conditions = []
+        params = []
+        if kinds:
+            conditions.append("kind IN (%s)" % ", ".join("?" * len(kinds)))
+            params.extend(kinds)
+        if since is not None:
+            conditions.append("ts >= ?")
+            params.append(since)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return self.conn.execute(query + " ORDER BY ts, id", params).fetchall()
+
+    def close(self):
+        """提交剩余数据并关闭数据库"""
+        self.flush()
+        self.conn.close()
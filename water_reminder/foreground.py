@@ -0,0 +1,250 @@
+"""全屏程序检测
+
+其他程序全屏运行（视频、演示、游戏）时隐藏进度条、推迟提醒。前台
+状态来自可替换的来源：
+
+- X11：根窗口的 _NET_ACTIVE_WINDOW 和活动窗口的 _NET_WM_STATE
+  （是否含 _NET_WM_STATE_FULLSCREEN），通过 ctypes 加载 libX11
+- 假来源：FakeForegroundSource，测试和模拟时手动切换
+
+X11 来源用单独的 X 连接订阅这两个属性的 PropertyNotify 事件，连接的
+套接字交给 QSocketNotifier，只在属性变化时读取，没有轮询。本进程自己
+的窗口（全屏提醒窗口）不算。
+
+可以通过环境变量 WATER_REMINDER_FOREGROUND_SOURCE（x11 / none）指定来源。
+"""
+import contextlib
+import ctypes
+import ctypes.util
+import os
+
+from PyQt5 import QtCore
+
+# Xlib 常量
+PROPERTY_NOTIFY = 28
+PROPERTY_CHANGE_MASK = 1 << 22
+XA_ATOM = 4
+XA_CARDINAL = 6
+XA_WINDOW = 33
+
+
+class FakeForegroundSource:
+    """手动切换是否有全屏程序的来源"""
+
+    def __init__(self, fullscreen=False):
+        self.fullscreen = fullscreen
+        self.listener = None
+
+    def start(self, listener):
+        self.listener = listener
+        listener(self.fullscreen)
+
+    def set_fullscreen(self, fullscreen):
+        self.fullscreen = fullscreen
+        if self.listener is not None:
+            self.listener(fullscreen)
+
+    def close(self):
+        self.listener = None
+
+
+class _XPropertyEvent(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_int),
+        ("serial", ctypes.c_ulong),
+        ("send_event", ctypes.c_int),
+        ("display", ctypes.c_void_p),
+        ("window", ctypes.c_ulong),
+        ("atom", ctypes.c_ulong),
+        ("time", ctypes.c_ulong),
+        ("state", ctypes.c_int),
+    ]
+
+
+class _XEvent(ctypes.Union):
+    _fields_ = [("type", ctypes.c_int), ("xproperty", _XPropertyEvent), ("pad", ctypes.c_long * 24)]
+
+
+# 活动窗口在读取属性前关闭会产生 BadWindow，Xlib 默认的处理函数会退出进程。
+# 错误处理函数是整个进程共用的，只在访问其他程序窗口的请求期间换成忽略
+_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+_ignore_error = _ERROR_HANDLER(lambda display, event: 0)
+_IGNORE_ERROR = ctypes.cast(_ignore_error, ctypes.c_void_p)
+
+
+class X11ForegroundSource:
+    """通过 EWMH 属性判断活动窗口是否全屏"""
+
+    def __init__(self, display_name=None):
+        xlib_name = ctypes.util.find_library("X11")
+        if not xlib_name:
+            raise OSError("找不到 libX11")
+        self.xlib = ctypes.CDLL(xlib_name)
+        self.xlib.XOpenDisplay.restype = ctypes.c_void_p
+        self.xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        self.xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        self.xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        self.xlib.XInternAtom.restype = ctypes.c_ulong
+        self.xlib.XInternAtom.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int]
+        self.xlib.XSelectInput.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_long]
+        self.xlib.XConnectionNumber.argtypes = [ctypes.c_void_p]
+        self.xlib.XPending.argtypes = [ctypes.c_void_p]
+        self.xlib.XNextEvent.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XEvent)]
+        self.xlib.XFlush.argtypes = [ctypes.c_void_p]
+        self.xlib.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        self.xlib.XFree.argtypes = [ctypes.c_void_p]
+        self.xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        self.xlib.XSetErrorHandler.restype = ctypes.c_void_p
+        self.xlib.XSetErrorHandler.argtypes = [ctypes.c_void_p]
+        self.xlib.XGetWindowProperty.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.c_ulong, ctypes.c_long, ctypes.c_long,
+            ctypes.c_int, ctypes.c_ulong, ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_int),
+            ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_ulong),
+            ctypes.POINTER(ctypes.POINTER(ctypes.c_ulong)),
+        ]
+
+        self.display = self.xlib.XOpenDisplay(display_name.encode() if display_name else None)
+        if not self.display:
+            raise OSError("无法连接 X 服务器")
+        self.root = self.xlib.XDefaultRootWindow(self.display)
+        self.atoms = {
+            name: self.xlib.XInternAtom(self.display, name.encode(), False)
+            for name in ("_NET_ACTIVE_WINDOW", "_NET_WM_STATE", "_NET_WM_STATE_FULLSCREEN", "_NET_WM_PID")
+        }
+        self.active = 0  # 当前订阅了属性变化的活动窗口
+        self.listener = None
+        self.notifier = None
+
+    def start(self, listener):
+        """订阅属性变化，之后每次变化都用当前状态调用 listener(fullscreen)"""
+        self.listener = listener
+        self.xlib.XSelectInput(self.display, self.root, PROPERTY_CHANGE_MASK)
+        self._track_active()
+        self.notifier = QtCore.QSocketNotifier(
+            self.xlib.XConnectionNumber(self.display), QtCore.QSocketNotifier.Read
+        )
+        self.notifier.activated.connect(self._process)
+        listener(self.is_fullscreen())
+        self._process()
+
+    @contextlib.contextmanager
+    def _ignoring_errors(self):
+        """块内的请求出错时不退出进程；结束前 XSync 让错误在块内处理完，再换回原来的处理函数"""
+        previous = self.xlib.XSetErrorHandler(_IGNORE_ERROR)
+        try:
+            yield
+        finally:
+            self.xlib.XSync(self.display, False)
+            self.xlib.XSetErrorHandler(previous)
+
+    def _property(self, window, atom, kind):
+        """读取 32 位的窗口属性，返回整数列表，窗口不存在时返回空列表"""
+        actual_type = ctypes.c_ulong()
+        actual_format = ctypes.c_int()
+        count = ctypes.c_ulong()
+        remaining = ctypes.c_ulong()
+        data = ctypes.POINTER(ctypes.c_ulong)()
+        with self._ignoring_errors():
+            status = self.xlib.XGetWindowProperty(
+                self.display, window, atom, 0, 1024, False, kind, ctypes.byref(actual_type),
+                ctypes.byref(actual_format), ctypes.byref(count), ctypes.byref(remaining), ctypes.byref(data)
+            )
+        if status != 0 or not data:
+            return []
+        try:
+            return [data[i] for i in range(count.value)] if actual_format.value == 32 else []
+        finally:
+            self.xlib.XFree(data)
+
+    def _track_active(self):
+        """改为订阅新的活动窗口的属性变化"""
+        active = self._property(self.root, self.atoms["_NET_ACTIVE_WINDOW"], XA_WINDOW)
+        active = active[0] if active else 0
+        if active != self.active:
+            with self._ignoring_errors():
+                if self.active:
+                    self.xlib.XSelectInput(self.display, self.active, 0)
+                if active:
+                    self.xlib.XSelectInput(self.display, active, PROPERTY_CHANGE_MASK)
+            self.active = active
+
+    def is_fullscreen(self):
+        """活动窗口是否是其他进程的全屏窗口"""
+        if not self.active:
+            return False
+        states = self._property(self.active, self.atoms["_NET_WM_STATE"], XA_ATOM)
+        if self.atoms["_NET_WM_STATE_FULLSCREEN"] not in states:
+            return False
+        return self._property(self.active, self.atoms["_NET_WM_PID"], XA_CARDINAL) != [os.getpid()]
+
+    def _process(self, *args):
+        """读完已到达的事件，活动窗口或其状态变化时通知
+
+        读取属性的往返会把之后到达的事件读进 Xlib 的队列，套接字不会再变为
+        可读，所以通知之后还要再检查队列，直到队列为空。
+        """
+        event = _XEvent()
+        while self.display and self.xlib.XPending(self.display):
+            changed = False
+            while self.display and self.xlib.XPending(self.display):
+                self.xlib.XNextEvent(self.display, ctypes.byref(event))
+                if event.type != PROPERTY_NOTIFY:
+                    continue
+                window, atom = event.xproperty.window, event.xproperty.atom
+                if window == self.root and atom == self.atoms["_NET_ACTIVE_WINDOW"]:
+                    self._track_active()
+                    changed = True
+                elif window == self.active and atom == self.atoms["_NET_WM_STATE"]:
+                    changed = True
+            if changed and self.listener is not None:
+                self.listener(self.is_fullscreen())
+
+    def close(self):
+        if self.notifier is not None:
+            self.notifier.setEnabled(False)
+            self.notifier.deleteLater()
+            self.notifier = None
+        self.listener = None
+        if self.display:
+            self.xlib.XCloseDisplay(self.display)
+            self.display = None
+
+
+def create_source(name=None):
+    """按平台或指定的名称创建前台状态来源，不可用时返回 None"""
+    name = name or os.environ.get("WATER_REMINDER_FOREGROUND_SOURCE") or "x11"
+    if name == "x11" and os.environ.get("DISPLAY"):
+        try:
+            return X11ForegroundSource()
+        except (OSError, AttributeError):
+            return None
+    return None
+
+
+class ForegroundMonitor(QtCore.QObject):
+    """跟踪是否有其他程序在全屏运行
+
+    状态变化时发出 fullscreen_changed，连接信号后调用 start() 开始检测。
+    没有可用的来源时始终认为没有全屏程序。
+    """
+
+    fullscreen_changed = QtCore.pyqtSignal(bool)
+
+    def __init__(self, parent=None, source=None):
+        super().__init__(parent)
+        self.source = source
+        self.fullscreen = False
+
+    def start(self):
+        if self.source is not None:
+            self.source.start(self._set_fullscreen)
+
+    def _set_fullscreen(self, fullscreen):
+        if fullscreen != self.fullscreen:
+            self.fullscreen = fullscreen
+            self.fullscreen_changed.emit(fullscreen)
+
+    def close(self):
+        if self.source is not None:
+            self.source.close()
+            self.source = None
@@ -0,0 +1,77 @@
+from PyQt5 import QtWidgets, QtGui, QtCore
+
+WEEKDAY_NAMES = ("一", "二", "三", "四", "五", "六", "日")
+
+
+class HeatmapWidget(QtWidgets.QWidget):
+    """星期 × 小时的喝水热力图"""
+
+    def __init__(self, heatmap, parent=None):
+        super().__init__(parent)
+        self.heatmap = heatmap
+        self.peak = max(max(row) for row in heatmap) or 1
+        self.setMinimumSize(24 * 16 + 30, 7 * 16 + 20)
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        cell_w = (self.width() - 30) / 24
+        cell_h = (self.height() - 20) / 7
+        base = QtGui.QColor("#2196F3")
+        painter.setPen(QtGui.QColor("#666666"))
+        for weekday in range(7):
+            top = 20 + weekday * cell_h
+            painter.drawText(QtCore.QRectF(0, top, 26, cell_h), QtCore.Qt.AlignCenter, WEEKDAY_NAMES[weekday])
+            for hour in range(24):
+                color = QtGui.QColor(base)
+                # 浮点舍入可能略超过 1.0，setAlphaF 会拒绝
+                color.setAlphaF(min(0.08 + 0.92 * self.heatmap[weekday][hour] / self.peak, 1.0))
+                painter.fillRect(QtCore.QRectF(30 + hour * cell_w + 1, top + 1, cell_w - 2, cell_h - 2), color)
+        for hour in range(0, 24, 3):
+            painter.drawText(QtCore.QRectF(30 + hour * cell_w, 0, cell_w * 2, 18), QtCore.Qt.AlignLeft, str(hour))
+
+
+class HistoryDialog(QtWidgets.QDialog):
+    """喝水统计面板，直接读取已缓存的汇总，不扫描历史事件"""
+
+    def __init__(self, stats, parent=None, days=14):
+        super().__init__(parent)
+        self.setWindowTitle("喝水统计")
+        self.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setSpacing(12)
+
+        today = stats.day_totals()
+        week = stats.week_totals()
+        mean_response = stats.mean_response()
+        summary = QtWidgets.QFormLayout()
+        summary.addRow("今日喝水：", QtWidgets.QLabel(f"{today[0]} 次"))
+        summary.addRow("本周喝水：", QtWidgets.QLabel(f"{week[0]} 次"))
+        summary.addRow("连续喝水：", QtWidgets.QLabel(
+            f"{stats.streak()} 天（最长 {stats.longest_streak} 天）"))
+        summary.addRow("稍后比例：", QtWidgets.QLabel(f"{stats.snooze_ratio():.0%}"))
+        summary.addRow("平均响应：", QtWidgets.QLabel(
+            "暂无数据" if mean_response is None else f"{mean_response / 60:.1f} 分钟"))
+        layout.addLayout(summary)
+
+        layout.addWidget(QtWidgets.QLabel("喝水时段分布："))
+        layout.addWidget(HeatmapWidget(stats.heatmap, self))
+
+        rows = stats.recent_days(days)
+        table = QtWidgets.QTableWidget(len(rows), 4, self)
+        table.setHorizontalHeaderLabels(["日期", "喝水", "稍后", "提醒"])
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        for row, values in enumerate(rows):
+            table.setItem(row, 0, QtWidgets.QTableWidgetItem(values[0].isoformat()))
+            for column, value in enumerate(values[1:], start=1):
+                item = QtWidgets.QTableWidgetItem(str(value))
+                item.setTextAlignment(QtCore.Qt.AlignCenter)
+                table.setItem(row, column, item)
+        table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
+        layout.addWidget(table)
+
+        buttons = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Close, self)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        self.resize(520, 620)
@@ -0,0 +1,135 @@
+"""按设备像素比缓存的图标位图
+
+多分辨率的 .ico 只解码一次，之后按 (逻辑尺寸, 设备像素比) 缓存缩放好的位图，
+托盘、设置面板和提醒窗口共用。屏幕 DPI 变化或屏幕增减时，丢弃不再被
+任何屏幕使用的像素比对应的缓存。
+"""
+import collections
+
+from PyQt5 import QtWidgets, QtGui, QtCore
+
+# 常用的逻辑尺寸
+TRAY_SIZE = 32
+HEADER_SIZE = 80
+REMINDER_ART_SIZE = 160
+
+
+class PixmapCache(QtCore.QObject):
+    """图标解码与缩放缓存，带命中统计和容量上限"""
+
+    def __init__(self, path, parent=None, max_entries=24):
+        super().__init__(parent)
+        self.path = path
+        self.max_entries = max_entries
+        self.frames = None  # 解码后的各尺寸原始图像，按边长从小到大
+        self.entries = collections.OrderedDict()
+        self.cached_icon = None
+        self.hits = 0
+        self.misses = 0
+        self.decodes = 0
+
+        app = QtGui.QGuiApplication.instance()
+        if app is not None:
+            app.screenAdded.connect(self._watch_screen)
+            app.screenAdded.connect(self.prune)
+            app.screenRemoved.connect(self.prune)
+            for screen in app.screens():
+                self._watch_screen(screen)
+
+    def _watch_screen(self, screen):
+        screen.logicalDotsPerInchChanged.connect(self.prune)
+        screen.physicalDotsPerInchChanged.connect(self.prune)
+
+    def _decode(self):
+        """解码图标文件中的所有图像，只执行一次"""
+        if self.frames is not None:
+            return self.frames
+        self.decodes += 1
+        reader = QtGui.QImageReader(self.path)
+        frames = []
+        for index in range(max(reader.imageCount(), 1)):
+            if index and not reader.jumpToImage(index):
+                break
+            image = reader.read()
+            if not image.isNull():
+                frames.append(image)
+        frames.sort(key=lambda image: min(image.width(), image.height()))
+        self.frames = frames
+        return frames
+
+    def icon(self):
+        """返回由原始各尺寸图像组成的 QIcon，供托盘和窗口图标使用"""
+        if self.cached_icon is None:
+            self.cached_icon = QtGui.QIcon()
+            for image in self._decode():
+                self.cached_icon.addPixmap(QtGui.QPixmap.fromImage(image))
+        return self.cached_icon
+
+    def pixmap(self, size, device_pixel_ratio=None):
+        """返回逻辑尺寸为 size、适配设备像素比的位图"""
+        if device_pixel_ratio is None:
+            device_pixel_ratio = QtGui.QGuiApplication.primaryScreen().devicePixelRatio()
+        key = (size, round(device_pixel_ratio, 2))
+        pixmap = self.entries.get(key)
+        if pixmap is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return pixmap
+
+        self.misses += 1
+        pixmap = self._render(size, device_pixel_ratio)
+        self.entries[key] = pixmap
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return pixmap
+
+    def _render(self, size, device_pixel_ratio):
+        """从最接近的原始图像缩放出目标位图"""
+        pixels = max(int(round(size * device_pixel_ratio)), 1)
+        frames = self._decode()
+        if not frames:
+            return QtGui.QPixmap()
+        # 选不小于目标尺寸的最小图像，都不够大时用最大的
+        source = next((image for image in frames if min(image.width(), image.height()) >= pixels), frames[-1])
+        if source.width() != pixels or source.height() != pixels:
+            source = source.scaled(pixels, pixels, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+        pixmap = QtGui.QPixmap.fromImage(source)
+        pixmap.setDevicePixelRatio(device_pixel_ratio)
+        return pixmap
+
+    def prune(self, *args):
+        """丢弃当前没有屏幕使用的设备像素比对应的缓存"""
+        app = QtGui.QGuiApplication.instance()
+        ratios = {round(screen.devicePixelRatio(), 2) for screen in app.screens()} if app else set()
+        for key in [key for key in self.entries if key[1] not in ratios]:
+            del self.entries[key]
+
+    def clear(self):
+        """清空所有缩放缓存（保留解码结果）"""
+        self.entries.clear()
+
+    def memory_bytes(self):
+        """缓存位图占用的字节数估算"""
+        total = 0
+        for pixmap in self.entries.values():
+            total += pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+        for image in self.frames or ():
+            total += image.sizeInBytes()
+        return total
+
+    def stats(self):
+        """返回命中/未命中次数、条目数和内存估算"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "decodes": self.decodes,
+            "entries": len(self.entries),
+            "bytes": self.memory_bytes(),
+        }
+
+
+def widget_pixel_ratio(widget):
+    """控件所在屏幕的设备像素比"""
+    if isinstance(widget, QtWidgets.QWidget):
+        return widget.devicePixelRatioF()
+    return QtGui.QGuiApplication.primaryScreen().devicePixelRatio()
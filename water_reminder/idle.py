@@ -0,0 +1,443 @@
+"""用户离开与锁屏检测
+
+用户一段时间没有操作或锁屏后暂停提醒周期，回来时按策略继续或重新
+开始。空闲时间来自可替换的来源：
+
+- X11：XScreenSaver 扩展的输入空闲时间（libXss，通过 ctypes 加载）
+- Windows：GetLastInputInfo
+- 假来源：FakeIdleSource，测试和模拟时手动设置空闲时间
+
+锁屏通过 systemd-logind 会话的 Lock/Unlock 信号和 LockedHint 属性感知，
+完全由事件驱动。空闲时间只在需要时读取：活跃时按“阈值 - 已空闲时间”
+布置下一次检查，锁屏期间不检查。离开后，X11 上用 XSync 扩展 IDLETIME
+计数器的报警（空闲时间回落到离开时的值以下，即有了新的输入）等用户
+回来，期间不唤醒；没有 XSync 的来源（Windows、假来源）退回轮询，间隔从
+RETURN_POLL 起每次加倍，最长 RETURN_POLL_MAX，离开越久唤醒越少，代价是
+长时间离开后最多晚这么久才发现用户回来。
+
+可以通过环境变量 WATER_REMINDER_IDLE_SOURCE（x11 / windows / none）
+指定来源。
+"""
+import ctypes
+import ctypes.util
+import os
+import sys
+
+from PyQt5 import QtCore
+
+from water_reminder.qtdbus import QtDBus, message_slot
+
+RESUME = "resume"  # 回来后从暂停处继续
+RESET = "reset"  # 回来后开始新周期
+POLICIES = (RESUME, RESET)
+
+# 离开后轮询用户是否回来的初始和最长间隔（秒），只用于不支持报警的来源
+RETURN_POLL = 10
+RETURN_POLL_MAX = 160
+
+# XSync 常量
+XSYNC_ALARM_NOTIFY = 1  # 相对扩展事件基数
+XSYNC_ABSOLUTE = 0
+XSYNC_NEGATIVE_COMPARISON = 3
+XSYNC_CA_COUNTER = 1 << 0
+XSYNC_CA_VALUE_TYPE = 1 << 1
+XSYNC_CA_VALUE = 1 << 2
+XSYNC_CA_TEST_TYPE = 1 << 3
+XSYNC_CA_DELTA = 1 << 4
+XSYNC_CA_EVENTS = 1 << 5
+
+
+class FakeIdleSource:
+    """手动设置空闲时间的来源"""
+
+    def __init__(self, idle=0.0):
+        self.idle = idle
+
+    def set_idle(self, seconds):
+        self.idle = seconds
+
+    def idle_seconds(self):
+        return self.idle
+
+
+class _XScreenSaverInfo(ctypes.Structure):
+    _fields_ = [
+        ("window", ctypes.c_ulong),
+        ("state", ctypes.c_int),
+        ("kind", ctypes.c_int),
+        ("til_or_since", ctypes.c_ulong),
+        ("idle", ctypes.c_ulong),
+        ("eventMask", ctypes.c_ulong),
+    ]
+
+
+class _XSyncValue(ctypes.Structure):
+    _fields_ = [("hi", ctypes.c_int), ("lo", ctypes.c_uint)]
+
+
+class _XSyncTrigger(ctypes.Structure):
+    _fields_ = [
+        ("counter", ctypes.c_ulong),
+        ("value_type", ctypes.c_int),
+        ("wait_value", _XSyncValue),
+        ("test_type", ctypes.c_int),
+    ]
+
+
+class _XSyncAlarmAttributes(ctypes.Structure):
+    _fields_ = [
+        ("trigger", _XSyncTrigger),
+        ("delta", _XSyncValue),
+        ("events", ctypes.c_int),
+        ("state", ctypes.c_int),
+    ]
+
+
+class _XSyncSystemCounter(ctypes.Structure):
+    _fields_ = [("name", ctypes.c_char_p), ("counter", ctypes.c_ulong), ("resolution", _XSyncValue)]
+
+
+class _XEvent(ctypes.Union):
+    _fields_ = [("type", ctypes.c_int), ("pad", ctypes.c_long * 24)]
+
+
+class X11IdleSource:
+    """通过 XScreenSaverQueryInfo 读取输入空闲时间"""
+
+    def __init__(self, display_name=None):
+        xlib_name = ctypes.util.find_library("X11")
+        xss_name = ctypes.util.find_library("Xss")
+        if not xlib_name or not xss_name:
+            raise OSError("找不到 libX11 或 libXss")
+        self.xlib = ctypes.CDLL(xlib_name)
+        self.xss = ctypes.CDLL(xss_name)
+        self.xlib.XOpenDisplay.restype = ctypes.c_void_p
+        self.xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        self.xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        self.xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        self.xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        self.xlib.XFree.argtypes = [ctypes.c_void_p]
+        self.xss.XScreenSaverAllocInfo.restype = ctypes.POINTER(_XScreenSaverInfo)
+        self.xss.XScreenSaverQueryInfo.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XScreenSaverInfo)
+        ]
+
+        self.display = self.xlib.XOpenDisplay(display_name.encode() if display_name else None)
+        if not self.display:
+            raise OSError("无法连接 X 服务器")
+        self.root = self.xlib.XDefaultRootWindow(self.display)
+        self.info = self.xss.XScreenSaverAllocInfo()
+        self.xext = None
+        self.idle_counter = None  # IDLETIME 计数器，第一次等待回来时查找，0 表示不可用
+        self.alarm = 0
+        self.callback = None
+        self.notifier = None
+
+    def idle_seconds(self):
+        if not self.xss.XScreenSaverQueryInfo(self.display, self.root, self.info):
+            return None
+        return self.info.contents.idle / 1000
+
+    def _find_idle_counter(self):
+        """初始化 XSync 扩展并找到 IDLETIME 计数器，不可用时返回 0"""
+        xext_name = ctypes.util.find_library("Xext")
+        if not xext_name:
+            return 0
+        xext = ctypes.CDLL(xext_name)
+        try:
+            xext.XSyncQueryExtension.argtypes = [
+                ctypes.c_void_p, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)
+            ]
+            xext.XSyncInitialize.argtypes = [
+                ctypes.c_void_p, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)
+            ]
+            xext.XSyncListSystemCounters.restype = ctypes.POINTER(_XSyncSystemCounter)
+            xext.XSyncListSystemCounters.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int)]
+            xext.XSyncFreeSystemCounterList.argtypes = [ctypes.POINTER(_XSyncSystemCounter)]
+            xext.XSyncCreateAlarm.restype = ctypes.c_ulong
+            xext.XSyncCreateAlarm.argtypes = [
+                ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XSyncAlarmAttributes)
+            ]
+            xext.XSyncDestroyAlarm.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+        except AttributeError:
+            return 0
+        self.xlib.XConnectionNumber.argtypes = [ctypes.c_void_p]
+        self.xlib.XPending.argtypes = [ctypes.c_void_p]
+        self.xlib.XNextEvent.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XEvent)]
+        self.xlib.XFlush.argtypes = [ctypes.c_void_p]
+
+        event_base, error_base = ctypes.c_int(), ctypes.c_int()
+        major, minor = ctypes.c_int(), ctypes.c_int()
+        if not xext.XSyncQueryExtension(self.display, ctypes.byref(event_base), ctypes.byref(error_base)):
+            return 0
+        if not xext.XSyncInitialize(self.display, ctypes.byref(major), ctypes.byref(minor)):
+            return 0
+        count = ctypes.c_int()
+        counters = xext.XSyncListSystemCounters(self.display, ctypes.byref(count))
+        if not counters:
+            return 0
+        try:
+            found = [counters[i].counter for i in range(count.value) if counters[i].name == b"IDLETIME"]
+        finally:
+            xext.XSyncFreeSystemCounterList(counters)
+        if not found:
+            return 0
+        self.xext = xext
+        self.alarm_event = event_base.value + XSYNC_ALARM_NOTIFY
+        return found[0]
+
+    def watch_return(self, idle, callback):
+        """空闲时间回落到 idle 秒以下（有了新的输入）时调用一次 callback
+
+        用 XSync 报警实现，等待期间不唤醒；不支持时返回 False，由调用方轮询。
+        """
+        self.cancel_return()
+        if self.idle_counter is None:
+            self.idle_counter = self._find_idle_counter()
+        if not self.idle_counter:
+            return False
+        # 丢掉已取消的报警留下的事件
+        event = _XEvent()
+        while self.xlib.XPending(self.display):
+            self.xlib.XNextEvent(self.display, ctypes.byref(event))
+        wait = max(int(idle * 1000), 1)
+        attributes = _XSyncAlarmAttributes()
+        attributes.trigger.counter = self.idle_counter
+        attributes.trigger.value_type = XSYNC_ABSOLUTE
+        attributes.trigger.wait_value = _XSyncValue(wait >> 32, wait & 0xFFFFFFFF)
+        # 比较型、增量为 0 的报警触发一次后自动失效
+        attributes.trigger.test_type = XSYNC_NEGATIVE_COMPARISON
+        attributes.delta = _XSyncValue(0, 0)
+        attributes.events = True
+        self.alarm = self.xext.XSyncCreateAlarm(
+            self.display,
+            XSYNC_CA_COUNTER | XSYNC_CA_VALUE_TYPE | XSYNC_CA_VALUE | XSYNC_CA_TEST_TYPE
+            | XSYNC_CA_DELTA | XSYNC_CA_EVENTS,
+            ctypes.byref(attributes),
+        )
+        if not self.alarm:
+            return False
+        self.callback = callback
+        if self.notifier is None:
+            self.notifier = QtCore.QSocketNotifier(
+                self.xlib.XConnectionNumber(self.display), QtCore.QSocketNotifier.Read
+            )
+            self.notifier.activated.connect(self._process)
+        self.xlib.XFlush(self.display)
+        return True
+
+    def cancel_return(self):
+        """取消 watch_return 布置的报警"""
+        self.callback = None
+        if self.alarm:
+            self.xext.XSyncDestroyAlarm(self.display, self.alarm)
+            self.xlib.XFlush(self.display)
+            self.alarm = 0
+
+    def _process(self, *args):
+        """读完已到达的事件，报警触发时调用回调
+
+        回调中读取空闲时间的往返可能把新事件读进 Xlib 的队列，套接字不会再
+        变为可读，所以回调之后还要再检查队列，直到队列为空。
+        """
+        event = _XEvent()
+        while self.display and self.xlib.XPending(self.display):
+            fired = False
+            while self.display and self.xlib.XPending(self.display):
+                self.xlib.XNextEvent(self.display, ctypes.byref(event))
+                if event.type == self.alarm_event:
+                    fired = True
+            if fired and self.callback is not None:
+                callback = self.callback
+                self.cancel_return()
+                callback()
+
+    def close(self):
+        if self.notifier is not None:
+            self.notifier.setEnabled(False)
+            self.notifier.deleteLater()
+            self.notifier = None
+        self.callback = None
+        if self.display:
+            self.xlib.XFree(self.info)
+            self.xlib.XCloseDisplay(self.display)
+            self.display = None
+
+
+class _LastInputInfo(ctypes.Structure):
+    _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+
+
+class WindowsIdleSource:
+    """通过 GetLastInputInfo 读取输入空闲时间"""
+
+    def idle_seconds(self):
+        info = _LastInputInfo()
+        info.cbSize = ctypes.sizeof(info)
+        if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+            return None
+        # 两个值都是 32 位毫秒计数，按无符号回绕相减
+        return ((ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF) / 1000
+
+
+def create_source(name=None):
+    """按平台或指定的名称创建空闲时间来源，不可用时返回 None"""
+    name = name or os.environ.get("WATER_REMINDER_IDLE_SOURCE") or (
+        "windows" if sys.platform == "win32" else "x11"
+    )
+    if name == "windows" and sys.platform == "win32":
+        return WindowsIdleSource()
+    if name == "x11" and os.environ.get("DISPLAY"):
+        try:
+            return X11IdleSource()
+        except (OSError, AttributeError):
+            return None
+    return None
+
+
+class IdleMonitor(QtCore.QObject):
+    """跟踪用户是否离开（长时间无操作或锁屏）
+
+    away 信号的参数为离开前已经空闲的秒数，用于把阈值内的空闲时间
+    也排除在外；锁屏时为 0。threshold 为 0 时关闭检测。连接信号后
+    调用 check() 开始检测。
+    """
+
+    away = QtCore.pyqtSignal(float)
+    returned = QtCore.pyqtSignal()
+
+    def __init__(self, parent=None, threshold=300, source=None, watch_lock=True):
+        super().__init__(parent)
+        self.threshold = threshold
+        self.source = source
+        self.idle = False  # 无操作超过阈值
+        self.locked = False
+        self.last_idle = None
+        self.return_poll = RETURN_POLL
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(QtCore.Qt.VeryCoarseTimer)
+        self.timer.timeout.connect(self.check)
+        self.lock_watched = self._watch_lock() if watch_lock else False
+
+    def is_away(self):
+        return self.idle or self.locked
+
+    def set_threshold(self, threshold):
+        """修改空闲阈值（秒），0 表示关闭检测"""
+        if threshold == self.threshold:
+            return
+        self.threshold = threshold
+        if not self.threshold:
+            self._set_state(False, False)
+        self.check()
+
+    def set_locked(self, locked):
+        """锁屏状态变化（logind 信号或测试调用）"""
+        if locked == self.locked:
+            return
+        self._set_state(self.idle, locked)
+        self.check()
+
+    def check(self):
+        """读取空闲时间，并布置下一次检查"""
+        self.timer.stop()
+        if hasattr(self.source, "cancel_return"):
+            self.source.cancel_return()
+        if not self.threshold or self.source is None or self.locked:
+            return
+        idle = self.source.idle_seconds()
+        if idle is None:
+            return
+        if not self.idle:
+            if idle >= self.threshold:
+                self._set_state(True, self.locked, idle)
+                self.return_poll = RETURN_POLL
+                self._wait_return(idle)
+            else:
+                self.timer.start(int((self.threshold - idle) * 1000) + 1000)
+        elif self.last_idle is not None and idle < self.last_idle:
+            # 空闲时间变短说明期间有过输入
+            self._set_state(False, self.locked)
+            self.timer.start(int((self.threshold - idle) * 1000) + 1000)
+        else:
+            self._wait_return(idle)
+        self.last_idle = idle
+
+    def _wait_return(self, idle):
+        """等用户回来：来源支持时等报警，否则按加倍的间隔轮询"""
+        if hasattr(self.source, "watch_return") and self.source.watch_return(idle, self.check):
+            return
+        self.timer.start(self.return_poll * 1000)
+        self.return_poll = min(self.return_poll * 2, RETURN_POLL_MAX)
+
+    def _set_state(self, idle, locked, idle_for=0.0):
+        was_away = self.is_away()
+        self.idle = idle
+        self.locked = locked
+        if not self.threshold:
+            self.idle = self.locked = False
+        if self.is_away() and not was_away:
+            self.away.emit(float(idle_for))
+        elif was_away and not self.is_away():
+            self.returned.emit()
+
+    # logind
+
+    def _watch_lock(self):
+        """订阅当前 logind 会话的锁屏信号，成功时返回 True"""
+        if sys.platform == "win32" or QtDBus is None:
+            return False
+        bus = QtDBus.QDBusConnection.systemBus()
+        if not bus.isConnected():
+            return False
+        # 信号从会话的实际路径发出，不在 logind 会话中时不监听
+        session_id = os.environ.get("XDG_SESSION_ID")
+        if not session_id:
+            return False
+        path = "/org/freedesktop/login1/session/" + _escape_object_path(session_id)
+        connected = [
+            bus.connect("org.freedesktop.login1", path, "org.freedesktop.login1.Session",
+                        "Lock", self._on_lock),
+            bus.connect("org.freedesktop.login1", path, "org.freedesktop.login1.Session",
+                        "Unlock", self._on_unlock),
+            bus.connect("org.freedesktop.login1", path, "org.freedesktop.DBus.Properties",
+                        "PropertiesChanged", self._on_properties_changed),
+        ]
+        return any(connected)
+
+    @QtCore.pyqtSlot()
+    def _on_lock(self):
+        self.set_locked(True)
+
+    @QtCore.pyqtSlot()
+    def _on_unlock(self):
+        self.set_locked(False)
+
+    @message_slot
+    def _on_properties_changed(self, message):
+        arguments = message.arguments()
+        if len(arguments) < 2 or not isinstance(arguments[1], dict):
+            return
+        locked = arguments[1].get("LockedHint")
+        if hasattr(locked, "variant"):
+            locked = locked.variant()
+        if isinstance(locked, bool):
+            self.set_locked(locked)
+
+    def close(self):
+        self.timer.stop()
+        if hasattr(self.source, "cancel_return"):
+            self.source.cancel_return()
+        if hasattr(self.source, "close"):
+            self.source.close()
+
+
+def _escape_object_path(value):
+    """按 systemd 的规则转义 D-Bus 对象路径中的一段"""
+    return "".join(
+        char if char.isascii() and (char.isalnum() or char == "_") and not (i == 0 and char.isdigit())
+        else "_%02x" % ord(char)
+        for i, char in enumerate(value)
+    )
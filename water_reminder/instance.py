@@ -0,0 +1,92 @@
+"""单实例保护与命令通道
+
+每个用户会话只运行一个实例：启动时在创建界面之前先尝试把命令转发给
+已有实例（直接用套接字，不初始化 Qt），没有实例时才创建界面并在本地
+套接字上监听。脚本和状态栏插件也通过同一个通道查询
+状态或操作正在运行的实例：
+
+    喝水提醒小助手.py --status      输出 JSON（进度、今日次数、下一次提醒时间）
+    喝水提醒小助手.py --drink / --snooze / --settings / --quit
+"""
+import getpass
+import json
+import os
+import re
+import sys
+
+from PyQt5 import QtCore
+
+from water_reminder import ipc
+from water_reminder.paths import runtime_dir, session_id
+
+COMMANDS = ("status", "drink", "snooze", "settings", "quit")
+
+
+def instance_name():
+    """当前用户会话的实例名
+
+    Unix 上是运行时目录（仅当前用户可访问）中的套接字路径，其他用户无法
+    抢先创建同名套接字；Windows 上是命名管道名，监听时只允许当前用户连接。
+    """
+    if sys.platform == "win32":
+        name = f"water-reminder-{getpass.getuser()}-{session_id()}".rstrip("-")
+        return re.sub(r"[^\w.-]", "_", name)
+    name = f"instance-{session_id()}".rstrip("-")
+    return os.path.join(runtime_dir(), re.sub(r"[^\w.-]", "_", name))
+
+
+class InstanceServer(QtCore.QObject):
+    """监听命令的实例端，handler(command) 返回回复的 dict"""
+
+    def __init__(self, server, handler, parent=None):
+        super().__init__(parent)
+        self.server = server
+        self.handler = handler
+        server.setParent(self)
+        server.newConnection.connect(self._on_connection)
+
+    def _on_connection(self):
+        while self.server.hasPendingConnections():
+            channel = ipc.Channel(self.server.nextPendingConnection(), self)
+            channel.message.connect(lambda message, channel=channel: self._on_message(channel, message))
+            channel.closed.connect(channel.deleteLater)
+
+    def _on_message(self, channel, message):
+        command = message.get("command")
+        if message.get("type") != "command" or command not in COMMANDS:
+            reply = {"ok": False, "error": f"未知命令：{command!r}"}
+        else:
+            reply = dict(self.handler(command) or {}, ok=True)
+        channel.send(reply)
+        channel.flush()
+
+    def close(self):
+        self.server.close()
+
+
+def acquire(handler, parent=None, name=None):
+    """成为本会话的唯一实例，已有实例在运行时返回 None"""
+    server = ipc.listen(name or instance_name(), user_only=True)
+    if server is None:
+        return None
+    return InstanceServer(server, handler, parent)
+
+
+def send_command(command, name=None, timeout=2000):
+    """把命令发给正在运行的实例，返回回复；没有实例时返回 None"""
+    return ipc.request(name or instance_name(), {"type": "command", "command": command}, timeout)
+
+
+def run_command(command):
+    """命令行模式：不创建任何 Qt 应用对象，发送命令后返回退出码"""
+    reply = send_command(command)
+    if reply is None:
+        print("没有正在运行的喝水提醒小助手", file=sys.stderr)
+        return 1
+    if not reply.get("ok"):
+        print(reply.get("error", "命令执行失败"), file=sys.stderr)
+        return 1
+    if command == "status":
+        reply.pop("ok", None)
+        print(json.dumps(reply, ensure_ascii=False))
+    return 0
@@ -0,0 +1,214 @@
+"""本机进程间通信
+
+QLocalSocket（Windows 命名管道 / Unix 域套接字）上逐行传输 JSON 对象，
+每条消息是一个带 "type" 字段的 dict。
+"""
+import json
+import os
+import socket as socket_module
+import struct
+import sys
+import tempfile
+
+from PyQt5 import QtCore, QtNetwork
+
+# 单条消息的长度上限，超过时断开连接
+MAX_LINE = 64 * 1024
+
+
+def encode(message):
+    """把消息编码为一行 UTF-8 JSON"""
+    return (json.dumps(message, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class Channel(QtCore.QObject):
+    """包装一个 QLocalSocket，按行收发 JSON 消息"""
+
+    message = QtCore.pyqtSignal(dict)
+    closed = QtCore.pyqtSignal()
+
+    def __init__(self, socket, parent=None):
+        super().__init__(parent)
+        self.socket = socket
+        self.buffer = b""
+        socket.setParent(self)
+        socket.readyRead.connect(self._on_ready_read)
+        socket.disconnected.connect(self.closed)
+
+    def send(self, message):
+        """发送一条消息"""
+        if self.socket.state() == QtNetwork.QLocalSocket.ConnectedState:
+            self.socket.write(encode(message))
+
+    def _on_ready_read(self):
+        self.buffer += bytes(self.socket.readAll())
+        while b"\n" in self.buffer:
+            line, self.buffer = self.buffer.split(b"\n", 1)
+            try:
+                message = json.loads(line.decode("utf-8"))
+            except ValueError:
+                continue
+            if isinstance(message, dict):
+                self.message.emit(message)
+        if len(self.buffer) > MAX_LINE:
+            self.close()
+
+    def flush(self):
+        """把缓冲的数据写出去"""
+        self.socket.flush()
+
+    def close(self):
+        """断开连接"""
+        self.socket.disconnectFromServer()
+
+
+def listen(name, parent=None, world_access=False, user_only=False):
+    """监听本地服务名，清理上次异常退出留下的套接字文件
+
+    world_access 允许其他用户连接，user_only 只允许当前用户连接。
+    返回 QLocalServer；已有进程在监听或监听失败时返回 None。
+    """
+    server = QtNetwork.QLocalServer(parent)
+    if world_access:
+        server.setSocketOptions(QtNetwork.QLocalServer.WorldAccessOption)
+    elif user_only:
+        server.setSocketOptions(QtNetwork.QLocalServer.UserAccessOption)
+    if server.listen(name):
+        return server
+    existing = connect(name, 200)
+    if existing is not None:
+        existing.disconnectFromServer()
+        return None
+    # 没有进程响应，说明是残留的套接字文件
+    QtNetwork.QLocalServer.removeServer(name)
+    return server if server.listen(name) else None
+
+
+def connect(name, timeout=1000):
+    """同步连接到本地服务，失败时返回 None"""
+    socket = QtNetwork.QLocalSocket()
+    socket.connectToServer(name)
+    if not socket.waitForConnected(timeout):
+        return None
+    return socket
+
+
+def server_path(name):
+    """QLocalServer 名称对应的套接字路径或命名管道路径（与 Qt 的规则相同）"""
+    if sys.platform == "win32":
+        return name if name.startswith("\\\\.\\pipe\\") else "\\\\.\\pipe\\" + name
+    return name if os.path.isabs(name) else os.path.join(tempfile.gettempdir(), name)
+
+
+def request(name, message, timeout=2000):
+    """发送一条消息并同步等待一条回复，没有服务或超时时返回 None
+
+    直接使用 Unix 域套接字或命名管道，不需要 QCoreApplication 和事件循环，
+    命令行和启动时检查已有实例都不必先初始化 Qt。Windows 上读取回复时
+    不设超时，服务在事件循环中立即回复。
+    """
+    path = server_path(name)
+    try:
+        if sys.platform == "win32":
+            with open(path, "r+b", buffering=0) as pipe:
+                pipe.write(encode(message))
+                line = _read_line(pipe.read)
+        else:
+            with socket_module.socket(socket_module.AF_UNIX, socket_module.SOCK_STREAM) as sock:
+                sock.settimeout(timeout / 1000)
+                sock.connect(path)
+                sock.sendall(encode(message))
+                line = _read_line(lambda size: sock.recv(size))
+    except OSError:
+        return None
+    try:
+        reply = json.loads(line.decode("utf-8"))
+    except ValueError:
+        return None
+    return reply if isinstance(reply, dict) else None
+
+
+def _read_line(read):
+    buffer = b""
+    while b"\n" not in buffer and len(buffer) <= MAX_LINE:
+        chunk = read(4096)
+        if not chunk:
+            break
+        buffer += chunk
+    return buffer.split(b"\n", 1)[0]
+
+
+def peer_user(local_socket):
+    """连接另一端进程所属的用户名，由操作系统提供，不能伪造；无法取得时返回 None"""
+    descriptor = int(local_socket.socketDescriptor())
+    if descriptor < 0:
+        return None
+    try:
+        if sys.platform == "win32":
+            return _pipe_client_user(descriptor)
+        uid = _peer_uid(descriptor)
+    except OSError:
+        return None
+    if uid is None:
+        return None
+    import pwd
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return str(uid)
+
+
+def _peer_uid(descriptor):
+    """Unix 域套接字另一端的 uid：Linux 用 SO_PEERCRED，macOS/BSD 用 LOCAL_PEERCRED"""
+    # fromfd 复制描述符，关闭副本不影响 Qt 持有的连接
+    sock = socket_module.fromfd(descriptor, socket_module.AF_UNIX, socket_module.SOCK_STREAM)
+    try:
+        if hasattr(socket_module, "SO_PEERCRED"):
+            data = sock.getsockopt(socket_module.SOL_SOCKET, socket_module.SO_PEERCRED, struct.calcsize("3i"))
+            return struct.unpack("3i", data)[1]
+        if sys.platform == "darwin" or "bsd" in sys.platform:
+            # struct xucred：cr_version, cr_uid, ...；SOL_LOCAL = 0，LOCAL_PEERCRED = 1
+            data = sock.getsockopt(0, 1, 76)
+            return struct.unpack_from("=II", data)[1]
+        return None
+    finally:
+        sock.close()
+
+
+def _pipe_client_user(handle):
+    """命名管道另一端进程的用户名（DOMAIN\\user）"""
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    advapi32 = ctypes.WinDLL("advapi32", use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    pid = wintypes.ULONG()
+    if not kernel32.GetNamedPipeClientProcessId(wintypes.HANDLE(handle), ctypes.byref(pid)):
+        return None
+    process = kernel32.OpenProcess(0x1000, False, pid.value)  # PROCESS_QUERY_LIMITED_INFORMATION
+    if not process:
+        return None
+    token = wintypes.HANDLE()
+    try:
+        if not advapi32.OpenProcessToken(process, 0x0008, ctypes.byref(token)):  # TOKEN_QUERY
+            return None
+        try:
+            size = wintypes.DWORD()
+            advapi32.GetTokenInformation(token, 1, None, 0, ctypes.byref(size))  # TokenUser
+            buffer = ctypes.create_string_buffer(size.value)
+            if not advapi32.GetTokenInformation(token, 1, buffer, size, ctypes.byref(size)):
+                return None
+            sid = ctypes.cast(buffer, ctypes.POINTER(ctypes.c_void_p))[0]  # TOKEN_USER.User.Sid
+            name = ctypes.create_unicode_buffer(256)
+            domain = ctypes.create_unicode_buffer(256)
+            name_size, domain_size = wintypes.DWORD(256), wintypes.DWORD(256)
+            use = wintypes.DWORD()
+            if not advapi32.LookupAccountSidW(None, ctypes.c_void_p(sid), name, ctypes.byref(name_size),
+                                              domain, ctypes.byref(domain_size), ctypes.byref(use)):
+                return None
+            return f"{domain.value}\\{name.value}"
+        finally:
+            kernel32.CloseHandle(token)
+    finally:
+        kernel32.CloseHandle(process)
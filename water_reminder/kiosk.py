@@ -0,0 +1,141 @@
+"""无人值守（kiosk）运行方式
+
+自助终端镜像、用脚本批量部署的瘦客户端和 CI 中没有人填写设置面板，
+可以用命令行参数或环境变量给出设置：
+
+    python 喝水提醒小助手.py --kiosk --interval 3600 --escalation toast:60,fullscreen
+    WATER_REMINDER_KIOSK=1 WATER_REMINDER_INTERVAL=3600 python 喝水提醒小助手.py
+
+命令行参数优先于环境变量，两者都优先于设置文件，只在本次运行中生效，
+不写入设置文件；在托盘菜单中修改过的设置改用修改后的值。kiosk 模式下
+首次运行不打开设置面板，重复启动时也不在已运行的实例中打开设置面板。
+
+--no-overlay（WATER_REMINDER_NO_OVERLAY=1）不创建屏幕底部置顶的半透明
+进度条，只保留托盘和提醒，省去合成器混合浮层的开销。配合
+QT_QPA_PLATFORM=offscreen 或 minimal 可以在没有显示器的环境中运行。
+"""
+import argparse
+import os
+
+from water_reminder import notify, settings
+
+ENV_PREFIX = "WATER_REMINDER_"
+TRUE_VALUES = ("1", "true", "yes", "on")
+
+
+def _number(text):
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"不是数字：{text!r}") from None
+
+
+def _interval(text):
+    value = int(_number(text))
+    if not settings.in_range("interval", value):
+        raise ValueError(f"提醒间隔必须至少为 {settings.RANGES['interval'][0]} 秒：{text!r}")
+    return value
+
+
+def _text(text):
+    if not text.strip():
+        raise ValueError("提醒文字不能为空")
+    return text
+
+
+def _opacity(key):
+    def parse(text):
+        value = _number(text)
+        if not settings.in_range(key, value):
+            low, high = settings.RANGES[key]
+            raise ValueError(f"透明度必须在 {low:g}-{high:g} 之间：{text!r}")
+        return value
+    return parse
+
+
+def _escalation(text):
+    for part in text.split(","):
+        name = part.strip().partition(":")[0]
+        if name not in notify.SINK_NAMES:
+            raise ValueError(f"未知的提醒方式 {name!r}，可用：{', '.join(notify.SINK_NAMES)}")
+    return text
+
+
+# (设置键, 命令行参数, 解析函数, 说明)；环境变量名由命令行参数得出
+OPTIONS = (
+    ("interval", "--interval", _interval, "提醒间隔（秒）"),
+    ("reminder_text", "--text", _text, "提醒文字"),
+    ("window_opacity", "--window-opacity", _opacity("window_opacity"), "浮层透明度（0.1-1.0）"),
+    ("progress_opacity", "--progress-opacity", _opacity("progress_opacity"), "进度条底色透明度（0-1.0）"),
+    ("escalation", "--escalation", _escalation, "提醒升级策略，例如 toast:60,fullscreen"),
+)
+
+
+def env_name(flag):
+    """--window-opacity -> WATER_REMINDER_WINDOW_OPACITY"""
+    return ENV_PREFIX + flag.lstrip("-").upper().replace("-", "_")
+
+
+def _argument_type(parse):
+    def convert(text):
+        try:
+            return parse(text)
+        except ValueError as error:
+            raise argparse.ArgumentTypeError(str(error)) from None
+    return convert
+
+
+def add_arguments(parser):
+    """在命令行解析器中加入无人值守运行的参数"""
+    group = parser.add_argument_group("无人值守运行")
+    group.add_argument("--kiosk", action="store_true",
+                       help=f"不打开设置面板，设置由参数或环境变量给出（{env_name('--kiosk')}=1）")
+    group.add_argument("--no-overlay", action="store_true",
+                       help=f"不显示屏幕底部的进度条，只提醒（{env_name('--no-overlay')}=1）")
+    for key, flag, parse, description in OPTIONS:
+        group.add_argument(flag, dest=f"override_{key}", type=_argument_type(parse), metavar="VALUE",
+                           help=f"{description}（{env_name(flag)}）")
+
+
+class RunMode:
+    """本次运行的方式和覆盖的设置"""
+
+    def __init__(self, kiosk=False, overlay=True, overrides=None):
+        self.kiosk = kiosk
+        self.overlay = overlay
+        self.overrides = dict(overrides or {})
+
+    def apply(self, base):
+        """在设置文件的设置上叠加覆盖的值"""
+        if not self.overrides:
+            return base
+        return settings.Settings(**dict(base.to_dict(), **self.overrides))
+
+    def release(self, keys):
+        """用户在界面中修改过的设置不再覆盖"""
+        for key in keys:
+            self.overrides.pop(key, None)
+
+
+def _flag(environ, flag):
+    return environ.get(env_name(flag), "").strip().lower() in TRUE_VALUES
+
+
+def resolve(args, environ=None):
+    """由命令行参数和环境变量得到 RunMode，环境变量的值错误时抛出 ValueError"""
+    environ = os.environ if environ is None else environ
+    overrides = {}
+    for key, flag, parse, _ in OPTIONS:
+        value = getattr(args, f"override_{key}", None)
+        if value is None and environ.get(env_name(flag)):
+            try:
+                value = parse(environ[env_name(flag)])
+            except ValueError as error:
+                raise ValueError(f"{env_name(flag)}：{error}") from None
+        if value is not None:
+            overrides[key] = value
+    return RunMode(
+        kiosk=args.kiosk or _flag(environ, "--kiosk"),
+        overlay=not (args.no_overlay or _flag(environ, "--no-overlay")),
+        overrides=overrides,
+    )
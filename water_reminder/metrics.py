@@ -0,0 +1,277 @@
+"""运行时指标：定时器延迟、事件循环卡顿、提醒显示延迟和资源占用
+
+指标保存在内存里的直方图中，可以定期写成 Prometheus 文本格式的文件
+（node_exporter 的 textfile 收集器可以直接读取），也可以在显式开启时
+通过 127.0.0.1 上的端口提供 /metrics。
+
+事件循环卡顿通过事件分发器的 awake/aboutToBlock 信号测量：从被唤醒到
+再次进入等待之间处理事件的时间就是这一轮的耗时，嵌套在 exec_() 里的
+对话框事件循环使用同一个分发器，同样会被统计。不额外增加定时唤醒。
+"""
+import collections
+import os
+import socket
+import sys
+import time
+
+from PyQt5 import QtCore, QtNetwork, QtWidgets
+
+from water_reminder.paths import runtime_dir
+
+# 延迟类直方图的桶上限（秒）
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 60, 300)
+# 超过这个时间的单轮事件处理记为一次卡顿（秒）
+STALL_THRESHOLD = 0.1
+# 写指标文件的间隔（秒）
+WRITE_INTERVAL = 60
+# 每个直方图保留的最近样本数，用于计算分位数
+RECENT_SAMPLES = 512
+
+
+class Histogram:
+    """累计分桶计数 + 最近样本的滑动窗口"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.total = 0.0
+        self.count = 0
+        self.recent = collections.deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.recent.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q):
+        """最近样本的分位数，没有样本时返回 None"""
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def cumulative(self):
+        """返回 [(上限, 累计计数)]，最后一项为 +Inf"""
+        result = []
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            result.append((bound, running))
+        result.append((float("inf"), self.count))
+        return result
+
+
+def resident_memory():
+    """当前进程的常驻内存（字节），取不到时返回 None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                    "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage",
+                    "PagefileUsage", "PeakPagefileUsage")
+            ]
+
+        counters = Counters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+    return None
+
+
+def object_counts():
+    """返回 (QObject 数, 控件数)，QObject 只统计应用和顶层控件下的对象树"""
+    app = QtWidgets.QApplication.instance()
+    if app is None:
+        return 0, 0
+    objects = 1 + len(app.findChildren(QtCore.QObject))
+    for widget in app.topLevelWidgets():
+        objects += 1 + len(widget.findChildren(QtCore.QObject))
+    return objects, len(app.allWidgets())
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics(QtCore.QObject):
+    """收集并导出运行时指标"""
+
+    def __init__(self, parent=None, path=None, port=None):
+        super().__init__(parent)
+        self.path = path
+        self.labels = {
+            "host": socket.gethostname(),
+            "session": f"{os.getpid()}-{int(time.time())}",
+        }
+        self.histograms = {
+            "timer_lateness_seconds": collections.defaultdict(Histogram),  # 按定时器分
+            "event_loop_busy_seconds": Histogram(),
+            "reminder_show_latency_seconds": Histogram(),
+        }
+        self.stalls = 0
+        self.longest_stall = 0.0
+        self.awake_at = None
+
+        # 先监听端口，端口被占用时抛出 OSError，不留下半初始化的连接和定时器
+        self.server = None
+        if port:
+            self.serve(port)
+
+        dispatcher = QtCore.QAbstractEventDispatcher.instance()
+        if dispatcher is not None:
+            dispatcher.awake.connect(self._on_awake)
+            dispatcher.aboutToBlock.connect(self._on_about_to_block)
+
+        self.write_timer = QtCore.QTimer(self)
+        self.write_timer.setTimerType(QtCore.Qt.VeryCoarseTimer)
+        self.write_timer.timeout.connect(self.write)
+        if path:
+            self.write_timer.start(WRITE_INTERVAL * 1000)
+
+    # 采集
+
+    def _on_awake(self):
+        if self.awake_at is None:
+            self.awake_at = time.perf_counter()
+
+    def _on_about_to_block(self):
+        if self.awake_at is None:
+            return
+        busy = time.perf_counter() - self.awake_at
+        self.awake_at = None
+        self.histograms["event_loop_busy_seconds"].observe(busy)
+        if busy >= STALL_THRESHOLD:
+            self.stalls += 1
+            self.longest_stall = max(self.longest_stall, busy)
+
+    def timer_late(self, name, seconds):
+        """记录某个定时器的触发延迟"""
+        self.histograms["timer_lateness_seconds"][name].observe(seconds)
+
+    def reminder_shown(self, milliseconds):
+        """记录提醒窗口的显示延迟"""
+        self.histograms["reminder_show_latency_seconds"].observe(milliseconds / 1000)
+
+    # 导出
+
+    def summary(self):
+        """当前指标的简要汇总"""
+        objects, widgets = object_counts()
+        busy = self.histograms["event_loop_busy_seconds"]
+        return {
+            "stalls": self.stalls,
+            "longest_stall": self.longest_stall,
+            "busy_p99": busy.quantile(0.99),
+            "rss_bytes": resident_memory(),
+            "qobjects": objects,
+            "widgets": widgets,
+            "timer_lateness_p99": {
+                name: histogram.quantile(0.99)
+                for name, histogram in self.histograms["timer_lateness_seconds"].items()
+            },
+        }
+
+    def to_prometheus(self):
+        """生成 Prometheus 文本格式"""
+        base = ",".join(f'{key}="{_escape(value)}"' for key, value in self.labels.items())
+        lines = []
+
+        def histogram(name, hist, extra=""):
+            labels = base + extra
+            for bound, count in hist.cumulative():
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f'water_reminder_{name}_bucket{{{labels},le="{le}"}} {count}')
+            lines.append(f"water_reminder_{name}_sum{{{labels}}} {hist.total}")
+            lines.append(f"water_reminder_{name}_count{{{labels}}} {hist.count}")
+
+        lines.append("# TYPE water_reminder_timer_lateness_seconds histogram")
+        for timer_name, hist in sorted(self.histograms["timer_lateness_seconds"].items()):
+            histogram("timer_lateness_seconds", hist, f',timer="{_escape(timer_name)}"')
+        for name in ("event_loop_busy_seconds", "reminder_show_latency_seconds"):
+            lines.append(f"# TYPE water_reminder_{name} histogram")
+            histogram(name, self.histograms[name])
+
+        objects, widgets = object_counts()
+        gauges = (
+            ("event_loop_stalls_total", "counter", self.stalls),
+            ("event_loop_longest_stall_seconds", "gauge", self.longest_stall),
+            ("resident_memory_bytes", "gauge", resident_memory()),
+            ("qobjects", "gauge", objects),
+            ("widgets", "gauge", widgets),
+        )
+        for name, kind, value in gauges:
+            if value is None:
+                continue
+            lines.append(f"# TYPE water_reminder_{name} {kind}")
+            lines.append(f"water_reminder_{name}{{{base}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=None):
+        """写入指标文件（先写临时文件再替换，收集器不会读到半个文件），返回是否写入"""
+        path = path or self.path
+        if not path:
+            return False
+        temp_path = path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus())
+            os.replace(temp_path, path)
+        except OSError as e:
+            # 定时写入失败不影响提醒，下一次再试
+            print(f"无法写入指标文件 {path}：{e}", file=sys.stderr)
+            return False
+        return True
+
+    def serve(self, port):
+        """在 127.0.0.1:port 上提供 /metrics"""
+        self.server = QtNetwork.QTcpServer(self)
+        self.server.newConnection.connect(self._on_connection)
+        if not self.server.listen(QtNetwork.QHostAddress.LocalHost, port):
+            raise OSError(f"无法监听端口 {port}：{self.server.errorString()}")
+
+    def _on_connection(self):
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            connection.readyRead.connect(lambda connection=connection: self._respond(connection))
+            connection.disconnected.connect(connection.deleteLater)
+
+    def _respond(self, connection):
+        request = bytes(connection.readAll()).split(b"\r\n", 1)[0]
+        if request.startswith(b"GET /metrics"):
+            body = self.to_prometheus().encode("utf-8")
+            status = b"200 OK"
+        else:
+            body = b"not found\n"
+            status = b"404 Not Found"
+        connection.write(
+            b"HTTP/1.0 " + status + b"\r\n"
+            b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+        )
+        connection.disconnectFromHost()
+
+    def close(self):
+        """停止导出，并最后写一次文件"""
+        self.write_timer.stop()
+        if self.server is not None:
+            self.server.close()
+        self.write()
+
+
+def default_path():
+    """默认的指标文件路径：每分钟重写一次，放在运行时目录（通常是 tmpfs）而不是数据目录"""
+    return os.path.join(runtime_dir(), "metrics.prom")
@@ -0,0 +1,396 @@
+"""分级的提醒通知与升级策略
+
+大多数提醒用很便宜的方式就够了，只有被忽略时才逐级升级：
+
+- tray：托盘气泡（QSystemTrayIcon.showMessage）
+- desktop：freedesktop 桌面通知（D-Bus org.freedesktop.Notifications，带喝水/稍后按钮）
+- toast：屏幕右下角的小窗口
+- fullscreen：原来的全屏提醒窗口
+
+升级策略是一个字符串，例如 "tray:120,toast:300,fullscreen"：依次尝试
+每一级，冒号后是等待的秒数，超时仍未响应就升级到下一级；没有写超时
+的级别（包括最后一级）一直显示到用户响应。当前环境不可用的级别会被
+跳过，最后一级不可用时退回全屏提醒。
+"""
+import time
+
+from PyQt5 import QtWidgets, QtGui, QtCore
+
+from water_reminder.qtdbus import QtDBus, message_slot
+
+TRAY = "tray"
+DESKTOP = "desktop"
+TOAST = "toast"
+FULLSCREEN = "fullscreen"
+SINK_NAMES = (TRAY, DESKTOP, TOAST, FULLSCREEN)
+
+DEFAULT_POLICY = "tray:120,toast:300,fullscreen"
+# 每一级等待时间的上限（秒），QTimer 的间隔是 int 毫秒
+MAX_TIMEOUT = (2 ** 31 - 1) // 1000
+TITLE = "喝水提醒"
+
+# 吐司窗口的大小和离屏幕边缘的距离（逻辑像素）
+TOAST_SIZE = (340, 120)
+TOAST_MARGIN = 16
+
+
+def parse_policy(text):
+    """解析升级策略，返回 [(级别名, 超时秒数或 None)]
+
+    不认识的级别和格式错误的超时被忽略，超过 MAX_TIMEOUT 的按上限处理，
+    结果为空时只使用全屏提醒。
+    """
+    steps = []
+    for part in str(text or "").split(","):
+        name, _, timeout = part.strip().partition(":")
+        if name not in SINK_NAMES:
+            continue
+        try:
+            seconds = float(timeout) if timeout else None
+        except ValueError:
+            seconds = None
+        steps.append((name, min(seconds, MAX_TIMEOUT) if seconds and seconds > 0 else None))
+    return steps or [(FULLSCREEN, None)]
+
+
+class Sink(QtCore.QObject):
+    """一种提醒方式
+
+    interactive 为 True 时自带喝水/稍后按钮；否则用户点击通知时发出
+    activated，由升级器跳到下一个带按钮的级别。
+    """
+
+    drink_clicked = QtCore.pyqtSignal()
+    snooze_clicked = QtCore.pyqtSignal()
+    activated = QtCore.pyqtSignal()
+
+    name = None
+    interactive = False
+
+    def available(self):
+        return True
+
+    def prepare(self):
+        """提前构建需要的窗口（启动后空闲时调用）"""
+
+    def show(self, text, screen=None, triggered_at=None):
+        raise NotImplementedError
+
+    def hide(self):
+        pass
+
+
+class TraySink(Sink):
+    """托盘气泡"""
+
+    name = TRAY
+
+    def __init__(self, tray_icon, parent=None, duration=10000):
+        super().__init__(parent)
+        self.tray_icon = tray_icon
+        self.duration = duration
+        self.showing = False
+        tray_icon.messageClicked.connect(self._on_clicked)
+
+    def available(self):
+        return self.tray_icon.isVisible() and QtWidgets.QSystemTrayIcon.supportsMessages()
+
+    def show(self, text, screen=None, triggered_at=None):
+        self.showing = True
+        self.tray_icon.showMessage(TITLE, text, self.tray_icon.icon(), self.duration)
+
+    def hide(self):
+        self.showing = False
+
+    def _on_clicked(self):
+        if self.showing:
+            self.activated.emit()
+
+
+class DesktopSink(Sink):
+    """freedesktop 桌面通知
+
+    bus 默认为会话总线，测试时可以传入连接到私有总线的 QDBusConnection，
+    由模拟的通知服务接收。
+    """
+
+    name = DESKTOP
+    interactive = True
+
+    SERVICE = "org.freedesktop.Notifications"
+    PATH = "/org/freedesktop/Notifications"
+
+    def __init__(self, parent=None, bus=None, app_name="喝水提醒小助手", icon=""):
+        super().__init__(parent)
+        self.app_name = app_name
+        self.icon = icon
+        self.notification_id = 0
+        self.bus = None
+        if QtDBus is None:
+            return
+        bus = bus if bus is not None else QtDBus.QDBusConnection.sessionBus()
+        if not bus.isConnected():
+            return
+        bus.connect(self.SERVICE, self.PATH, self.SERVICE, "ActionInvoked", self._on_action)
+        bus.connect(self.SERVICE, self.PATH, self.SERVICE, "NotificationClosed", self._on_closed)
+        self.bus = bus
+
+    def available(self):
+        if self.bus is None:
+            return False
+        reply = self.bus.interface().isServiceRegistered(self.SERVICE)
+        return reply.isValid() and bool(reply.value())
+
+    def _uint(self, value):
+        return QtDBus.QDBusArgument(value, QtCore.QMetaType.UInt)
+
+    def show(self, text, screen=None, triggered_at=None):
+        message = QtDBus.QDBusMessage.createMethodCall(self.SERVICE, self.PATH, self.SERVICE, "Notify")
+        message.setArguments([
+            self.app_name,
+            self._uint(self.notification_id),  # 替换上一条，不在通知中心里堆积
+            self.icon,
+            TITLE,
+            text,
+            QtDBus.QDBusArgument(["drink", "喝水", "snooze", "稍后"], QtCore.QMetaType.QStringList),
+            {},
+            0,  # 不自动过期，由升级器决定何时升级
+        ])
+        self.bus.callWithCallback(message, self._on_notify_reply)
+
+    @message_slot
+    def _on_notify_reply(self, reply):
+        arguments = reply.arguments()
+        if arguments:
+            self.notification_id = int(arguments[0])
+
+    def hide(self):
+        if self.bus is None or not self.notification_id:
+            return
+        message = QtDBus.QDBusMessage.createMethodCall(
+            self.SERVICE, self.PATH, self.SERVICE, "CloseNotification")
+        message.setArguments([self._uint(self.notification_id)])
+        self.bus.send(message)
+
+    @message_slot
+    def _on_action(self, message):
+        arguments = message.arguments()
+        if len(arguments) < 2 or int(arguments[0]) != self.notification_id:
+            return
+        if arguments[1] == "drink":
+            self.drink_clicked.emit()
+        elif arguments[1] == "snooze":
+            self.snooze_clicked.emit()
+        else:
+            self.activated.emit()
+
+    @message_slot
+    def _on_closed(self, message):
+        arguments = message.arguments()
+        if arguments and int(arguments[0]) == self.notification_id:
+            self.notification_id = 0
+
+
+class ToastWindow(QtWidgets.QFrame):
+    """屏幕角落的小提醒窗口"""
+
+    drink_clicked = QtCore.pyqtSignal()
+    snooze_clicked = QtCore.pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent, QtCore.Qt.FramelessWindowHint | QtCore.Qt.Tool
+                         | QtCore.Qt.WindowStaysOnTopHint | QtCore.Qt.WindowDoesNotAcceptFocus)
+        self.setObjectName("reminderToast")
+        self.setAttribute(QtCore.Qt.WA_ShowWithoutActivating)
+        self.setFixedSize(*TOAST_SIZE)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        self.label = QtWidgets.QLabel()
+        self.label.setObjectName("toastLabel")
+        self.label.setWordWrap(True)
+        layout.addWidget(self.label)
+
+        buttons = QtWidgets.QHBoxLayout()
+        drink_button = QtWidgets.QPushButton("喝水")
+        drink_button.setObjectName("toastDrinkButton")
+        drink_button.clicked.connect(lambda: self.drink_clicked.emit())
+        snooze_button = QtWidgets.QPushButton("稍后")
+        snooze_button.setObjectName("toastSnoozeButton")
+        snooze_button.clicked.connect(lambda: self.snooze_clicked.emit())
+        buttons.addStretch()
+        buttons.addWidget(drink_button)
+        buttons.addWidget(snooze_button)
+        layout.addLayout(buttons)
+
+    def present(self, text, screen=None):
+        if self.label.text() != text:
+            self.label.setText(text)
+        screen = screen or QtGui.QGuiApplication.primaryScreen()
+        area = screen.availableGeometry()
+        self.move(area.right() - self.width() - TOAST_MARGIN, area.bottom() - self.height() - TOAST_MARGIN)
+        self.show()
+        self.raise_()
+
+
+class ToastSink(Sink):
+    """角落小窗口，第一次使用时构建，之后重复使用"""
+
+    name = TOAST
+    interactive = True
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.window = None
+
+    def prepare(self):
+        if self.window is None:
+            self.window = ToastWindow()
+            self.window.drink_clicked.connect(self.drink_clicked)
+            self.window.snooze_clicked.connect(self.snooze_clicked)
+        return self.window
+
+    def show(self, text, screen=None, triggered_at=None):
+        self.prepare().present(text, screen)
+
+    def hide(self):
+        if self.window is not None:
+            self.window.hide()
+
+    def close(self):
+        if self.window is not None:
+            self.window.close()
+            self.window.deleteLater()
+            self.window = None
+
+
+class FullScreenSink(Sink):
+    """全屏提醒窗口，factory() 返回可复用的 ReminderWindow"""
+
+    name = FULLSCREEN
+    interactive = True
+
+    def __init__(self, factory, parent=None):
+        super().__init__(parent)
+        self.factory = factory
+        self.window = None
+
+    def prepare(self):
+        if self.window is None:
+            self.window = self.factory()
+            self.window.drink_clicked.connect(self.drink_clicked)
+            self.window.snooze_clicked.connect(self.snooze_clicked)
+        return self.window
+
+    def show(self, text, screen=None, triggered_at=None):
+        self.prepare().present(text, screen, triggered_at)
+
+    def hide(self):
+        if self.window is not None:
+            self.window.hide()
+
+
+class Escalator(QtCore.QObject):
+    """按升级策略依次使用各级提醒，用户响应或 stop() 时收起"""
+
+    drink_clicked = QtCore.pyqtSignal()
+    snooze_clicked = QtCore.pyqtSignal()
+    # 升级到某一级时发出级别名
+    escalated = QtCore.pyqtSignal(str)
+
+    def __init__(self, sinks, policy=DEFAULT_POLICY, parent=None):
+        super().__init__(parent)
+        self.sinks = {sink.name: sink for sink in sinks}
+        for sink in sinks:
+            sink.drink_clicked.connect(self.drink_clicked)
+            sink.snooze_clicked.connect(self.snooze_clicked)
+            sink.activated.connect(self._on_activated)
+        self.steps = parse_policy(policy)
+        self.index = None  # 当前所在的级别，未在提醒时为 None
+        self.sink = None  # 正在显示的提醒
+        self.text = ""
+        self.screen = None
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(QtCore.Qt.VeryCoarseTimer)
+        self.timer.timeout.connect(self.escalate)
+
+    def set_policy(self, policy):
+        self.steps = parse_policy(policy)
+
+    def prepare(self):
+        """提前构建第一级可用的提醒"""
+        for name, _ in self.steps:
+            sink = self.sinks.get(name)
+            if sink is not None and sink.available():
+                sink.prepare()
+                return
+
+    def is_active(self):
+        return self.index is not None
+
+    def current(self):
+        """正在显示的级别名称"""
+        return self.sink.name if self.sink is not None else None
+
+    def start(self, text, screen=None, triggered_at=None):
+        """开始一次提醒"""
+        self.stop()
+        self.text = text
+        self.screen = screen
+        self._show_from(0, triggered_at)
+
+    def escalate(self):
+        """升级到下一个可用的级别"""
+        if self.index is None or self.index + 1 >= len(self.steps):
+            return
+        self._hide_current()
+        self._show_from(self.index + 1)
+
+    def stop(self):
+        """用户已响应，收起所有级别"""
+        self.timer.stop()
+        self._hide_current()
+        self.index = None
+
+    def _show_from(self, index, triggered_at=None):
+        last = len(self.steps) - 1
+        for i in range(index, len(self.steps)):
+            name, timeout = self.steps[i]
+            sink = self.sinks.get(name)
+            # 最后一级不可用时退回全屏提醒，保证提醒一定能送达
+            if sink is None or not sink.available():
+                if i < last or FULLSCREEN not in self.sinks:
+                    continue
+                name, timeout, sink = FULLSCREEN, None, self.sinks[FULLSCREEN]
+            self.index = i
+            self.sink = sink
+            sink.show(self.text, self.screen, triggered_at or time.perf_counter())
+            self.escalated.emit(name)
+            if timeout is not None and i < last:
+                self.timer.start(int(timeout * 1000))
+            return
+
+    def _hide_current(self):
+        if self.sink is not None:
+            self.sink.hide()
+            self.sink = None
+
+    def close(self):
+        """退出时收起并释放各级的窗口"""
+        self.stop()
+        for sink in self.sinks.values():
+            if hasattr(sink, "close"):
+                sink.close()
+
+    def _on_activated(self):
+        """点击了不带按钮的通知：直接跳到下一个带按钮的级别"""
+        if self.index is None:
+            return
+        for i in range(self.index + 1, len(self.steps)):
+            sink = self.sinks.get(self.steps[i][0])
+            if sink is not None and sink.interactive and sink.available():
+                self.timer.stop()
+                self._hide_current()
+                self._show_from(i)
+                return
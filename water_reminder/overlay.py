@@ -0,0 +1,436 @@
+"""自绘的进度浮层
+
+进度条和今日喝水计数由同一个控件在 paintEvent 中直接绘制，不经过样式表。
+渐变、底槽和计数文字预先渲染成位图缓存；进度变化时只重绘新旧进度之间
+的那一段（加上圆角），计数变化时只重绘计数区域，合成器每次只需要
+重新混合很小的矩形，而不是整条浮层。
+
+OverlayManager 为每个屏幕放一个浮层窗口，全部由同一份状态驱动。
+"""
+import time
+
+from PyQt5 import QtWidgets, QtGui, QtCore
+
+from water_reminder import theme
+
+BAR_HEIGHT = 30  # 浮层内容高度，也是普通进度条的高度
+THIN_BAR_HEIGHT = 6  # 细进度条高度
+COUNTER_WIDTH = 140
+MARGIN = 10
+COUNTER_PADDING = 15
+
+
+class ProgressStrip(QtWidgets.QWidget):
+    """自绘的进度条 + 喝水计数
+
+    接口与 QProgressBar 的 setValue/value/maximum 保持一致，
+    计数文字通过 set_counter_text 设置。
+    """
+
+    def __init__(self, parent=None, thin=False, maximum=100):
+        super().__init__(parent)
+        self.maximum_value = max(int(maximum), 1)
+        self.current = 0
+        self.thin = thin
+        self.trough_alpha = 0.5
+        self.counter_text = ""
+        self.colors = theme.strip_colors(theme.is_dark_palette(self.palette()))
+
+        # 位图缓存及其生成时的设备像素比
+        self.cache_ratio = None
+        self.gradient_cache = None
+        self.trough_cache = None
+        self.counter_cache = None
+
+        # 绘制开销统计
+        self.paint_count = 0
+        self.paint_seconds = 0.0
+        self.painted_pixels = 0
+
+    # 与 QProgressBar 一致的接口
+
+    def maximum(self):
+        return self.maximum_value
+
+    def value(self):
+        return self.current
+
+    def setValue(self, value):
+        """更新进度，只重绘新旧进度之间变化的部分"""
+        value = min(max(int(value), 0), self.maximum_value)
+        if value == self.current:
+            return
+        old = self.fill_width(self.current)
+        self.current = value
+        new = self.fill_width(value)
+        if old == new:
+            return
+        bar = self.bar_rect()
+        # 进度末端是圆角，需要把圆角半径范围一起重绘
+        radius = bar.height() // 2 + 1
+        left = bar.x() + min(old, new) - radius
+        right = bar.x() + max(old, new) + 1
+        self.update(QtCore.QRect(left, bar.y(), right - left, bar.height()).intersected(bar))
+
+    # 设置
+
+    def set_counter_text(self, text):
+        """更新计数文字，只重绘计数区域"""
+        if text == self.counter_text:
+            return
+        self.counter_text = text
+        self.counter_cache = None
+        self.update(self.counter_rect())
+
+    def set_trough_opacity(self, opacity):
+        """设置进度条底色透明度"""
+        alpha = theme.opacity_level(opacity) / theme.OPACITY_LEVELS
+        if alpha == self.trough_alpha:
+            return
+        self.trough_alpha = alpha
+        self.trough_cache = None
+        self.update(self.bar_rect())
+
+    def set_thin(self, thin):
+        """切换细进度条"""
+        if thin == self.thin:
+            return
+        self.thin = thin
+        self.invalidate()
+
+    def invalidate(self):
+        """丢弃全部位图缓存并整体重绘"""
+        self.cache_ratio = None
+        self.gradient_cache = None
+        self.trough_cache = None
+        self.counter_cache = None
+        self.update()
+
+    # 几何
+
+    def bar_rect(self):
+        """进度条区域，细进度条在原位置垂直居中"""
+        height = THIN_BAR_HEIGHT if self.thin else BAR_HEIGHT
+        top = (self.height() - height) // 2
+        width = max(self.width() - COUNTER_WIDTH - 3 * MARGIN, 1)
+        return QtCore.QRect(MARGIN, top, width, height)
+
+    def counter_rect(self):
+        """计数区域"""
+        top = (self.height() - BAR_HEIGHT) // 2
+        return QtCore.QRect(self.width() - COUNTER_WIDTH - MARGIN, top, COUNTER_WIDTH, BAR_HEIGHT)
+
+    def fill_width(self, value):
+        """进度值对应的填充宽度（像素）"""
+        return self.bar_rect().width() * value // self.maximum_value
+
+    def sizeHint(self):
+        return QtCore.QSize(COUNTER_WIDTH + 3 * MARGIN + 100, BAR_HEIGHT)
+
+    # 位图缓存
+
+    def _check_ratio(self):
+        ratio = self.devicePixelRatioF()
+        if ratio != self.cache_ratio:
+            self.cache_ratio = ratio
+            self.gradient_cache = None
+            self.trough_cache = None
+            self.counter_cache = None
+        return ratio
+
+    def _new_pixmap(self, size, ratio):
+        pixmap = QtGui.QPixmap(size * ratio)
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(QtCore.Qt.transparent)
+        return pixmap
+
+    def _gradient_brush(self, bar, ratio):
+        """整条进度条宽度的渐变位图，作为填充的纹理画刷"""
+        if self.gradient_cache is None:
+            # 纹理画刷按设备像素取样，所以缓存不带像素比，由画刷变换缩放
+            pixmap = QtGui.QPixmap(bar.size() * ratio)
+            painter = QtGui.QPainter(pixmap)
+            gradient = QtGui.QLinearGradient(0, 0, pixmap.width(), 0)
+            gradient.setColorAt(0, self.colors['accent'])
+            gradient.setColorAt(1, self.colors['accent_end'])
+            painter.fillRect(pixmap.rect(), gradient)
+            painter.end()
+            self.gradient_cache = pixmap
+        brush = QtGui.QBrush(self.gradient_cache)
+        brush.setTransform(QtGui.QTransform().translate(bar.x(), bar.y()).scale(1 / ratio, 1 / ratio))
+        return brush
+
+    def _trough_pixmap(self, bar, ratio):
+        if self.trough_cache is None:
+            pixmap = self._new_pixmap(bar.size(), ratio)
+            painter = QtGui.QPainter(pixmap)
+            painter.setRenderHint(QtGui.QPainter.Antialiasing)
+            color = QtGui.QColor(self.colors['trough'])
+            color.setAlphaF(self.trough_alpha)
+            painter.setPen(QtCore.Qt.NoPen)
+            painter.setBrush(color)
+            radius = bar.height() / 2
+            painter.drawRoundedRect(QtCore.QRectF(0, 0, bar.width(), bar.height()), radius, radius)
+            painter.end()
+            self.trough_cache = pixmap
+        return self.trough_cache
+
+    def _counter_pixmap(self, rect, ratio):
+        if self.counter_cache is None:
+            pixmap = self._new_pixmap(rect.size(), ratio)
+            painter = QtGui.QPainter(pixmap)
+            painter.setRenderHint(QtGui.QPainter.Antialiasing)
+            painter.setPen(QtCore.Qt.NoPen)
+            painter.setBrush(self.colors['label_bg'])
+            painter.drawRoundedRect(QtCore.QRectF(0, 0, rect.width(), rect.height()), 15, 15)
+            font = QtGui.QFont("Microsoft YaHei")
+            font.setPixelSize(14)
+            font.setBold(True)
+            painter.setFont(font)
+            painter.setPen(self.colors['accent'])
+            text_rect = QtCore.QRect(COUNTER_PADDING, 0, rect.width() - 2 * COUNTER_PADDING, rect.height())
+            painter.drawText(text_rect, QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter, self.counter_text)
+            painter.end()
+            self.counter_cache = pixmap
+        return self.counter_cache
+
+    # 事件
+
+    def paintEvent(self, event):
+        started = time.perf_counter()
+        ratio = self._check_ratio()
+        region = event.region()
+        painter = QtGui.QPainter(self)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+
+        bar = self.bar_rect()
+        if region.intersects(bar):
+            painter.drawPixmap(bar.topLeft(), self._trough_pixmap(bar, ratio))
+            fill = self.fill_width(self.current)
+            if fill > 0:
+                radius = bar.height() / 2
+                painter.setPen(QtCore.Qt.NoPen)
+                painter.setBrush(self._gradient_brush(bar, ratio))
+                painter.drawRoundedRect(QtCore.QRectF(bar.x(), bar.y(), fill, bar.height()), radius, radius)
+
+        counter = self.counter_rect()
+        if self.counter_text and region.intersects(counter):
+            painter.drawPixmap(counter.topLeft(), self._counter_pixmap(counter, ratio))
+        painter.end()
+
+        self.paint_count += 1
+        self.paint_seconds += time.perf_counter() - started
+        self.painted_pixels += sum(rect.width() * rect.height() for rect in region.rects())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.gradient_cache = None
+        self.trough_cache = None
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QtCore.QEvent.PaletteChange:
+            self.colors = theme.strip_colors(theme.is_dark_palette(self.palette()))
+            self.invalidate()
+
+    def paint_stats(self):
+        """返回绘制次数、平均耗时（毫秒）和累计重绘面积（逻辑像素）"""
+        return {
+            "paints": self.paint_count,
+            "mean_ms": self.paint_seconds * 1000 / self.paint_count if self.paint_count else 0.0,
+            "pixels": self.painted_pixels,
+        }
+
+
+OVERLAY_HEIGHT = 60  # 浮层窗口高度，留出触摸空间
+
+
+class OverlayWindow(QtWidgets.QWidget):
+    """某个屏幕底部的半透明浮层窗口，只承载一个 ProgressStrip"""
+
+    # 第一次绘制完成
+    painted = QtCore.pyqtSignal()
+
+    def __init__(self, screen, thin=False, click_through=True):
+        super().__init__()
+        self.setWindowTitle("喝水提醒小助手")
+        self.first_painted = False
+        self.setWindowFlags(
+            QtCore.Qt.FramelessWindowHint |
+            QtCore.Qt.WindowStaysOnTopHint |
+            QtCore.Qt.Tool
+        )
+        self.setAttribute(QtCore.Qt.WA_TranslucentBackground)
+        if click_through:
+            self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+        self.strip = ProgressStrip(self, thin=thin)
+        self.place(screen)
+
+    def place(self, screen):
+        """按屏幕几何放到底部（任务栏之上），屏幕变化时重新调用"""
+        if self.windowHandle() is None:
+            self.create()
+        self.windowHandle().setScreen(screen)
+        geometry = screen.geometry()
+        # 计算任务栏高度，如果是平板可能没有任务栏
+        taskbar_height = max(geometry.height() - screen.availableGeometry().height(), 0)
+        self.setGeometry(
+            geometry.x(),
+            geometry.y() + geometry.height() - taskbar_height - OVERLAY_HEIGHT,
+            geometry.width(),
+            OVERLAY_HEIGHT
+        )
+        self.strip.setGeometry(0, 5, geometry.width(), BAR_HEIGHT)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_painted:
+            self.first_painted = True
+            self.painted.emit()
+
+
+class OverlayManager(QtCore.QObject):
+    """为每个屏幕维护一个浮层窗口，所有浮层共用同一份显示状态
+
+    只有一个进度来源（ProgressEngine），这里把每次变化分发给各个屏幕的
+    浮层，自身没有定时器。屏幕接入、移除或几何变化时只增删或移动对应
+    的那个窗口。disabled 为不显示浮层的屏幕名称集合。
+    """
+
+    # 任意一个浮层第一次绘制完成
+    first_painted = QtCore.pyqtSignal()
+
+    def __init__(self, parent=None, disabled=(), thin=False, click_through=True, maximum=100):
+        super().__init__(parent)
+        self.disabled = set(disabled)
+        self.click_through = click_through
+        self.windows = {}  # QScreen -> OverlayWindow
+        self.painted = False
+        self.visible = False
+        self.suspended = False  # 其他程序全屏时隐藏所有浮层
+
+        # 共享的显示状态，新接入的屏幕从这里初始化
+        self.maximum_value = maximum
+        self.current = 0
+        self.counter_text = ""
+        self.trough_opacity = 0.5
+        self.window_opacity = 1.0
+        self.thin = thin
+
+        app = QtGui.QGuiApplication.instance()
+        app.screenAdded.connect(self._on_screen_added)
+        app.screenRemoved.connect(self._on_screen_removed)
+        for screen in app.screens():
+            self._watch_screen(screen)
+
+    # 屏幕管理
+
+    def _watch_screen(self, screen):
+        screen.geometryChanged.connect(lambda _rect, screen=screen: self._place(screen))
+        screen.availableGeometryChanged.connect(lambda _rect, screen=screen: self._place(screen))
+        if self.visible:
+            self._ensure_window(screen)
+
+    def _on_screen_added(self, screen):
+        self._watch_screen(screen)
+
+    def _on_screen_removed(self, screen):
+        window = self.windows.pop(screen, None)
+        if window is not None:
+            window.hide()
+            window.deleteLater()
+
+    def _place(self, screen):
+        window = self.windows.get(screen)
+        if window is not None:
+            window.place(screen)
+
+    def _ensure_window(self, screen):
+        """为启用的屏幕创建浮层，并用当前共享状态初始化"""
+        if screen.name() in self.disabled or screen in self.windows:
+            return
+        window = OverlayWindow(screen, self.thin, self.click_through)
+        strip = window.strip
+        strip.maximum_value = self.maximum_value
+        strip.setValue(self.current)
+        strip.set_counter_text(self.counter_text)
+        strip.set_trough_opacity(self.trough_opacity)
+        window.setWindowOpacity(self.window_opacity)
+        window.painted.connect(self._on_painted)
+        self.windows[screen] = window
+        if not self.suspended:
+            window.show()
+
+    def _on_painted(self):
+        if not self.painted:
+            self.painted = True
+            self.first_painted.emit()
+
+    def show(self):
+        """为所有启用的屏幕显示浮层"""
+        self.visible = True
+        for screen in QtGui.QGuiApplication.screens():
+            self._ensure_window(screen)
+
+    def set_suspended(self, suspended):
+        """暂时隐藏或重新显示所有浮层，隐藏期间进度变化不会重绘"""
+        if suspended == self.suspended:
+            return
+        self.suspended = suspended
+        for window in self.windows.values():
+            window.setVisible(not suspended)
+
+    def screens(self):
+        """返回 [(屏幕名称, 是否启用)]"""
+        return [(screen.name(), screen.name() not in self.disabled)
+                for screen in QtGui.QGuiApplication.screens()]
+
+    def set_screen_enabled(self, name, enabled):
+        """启用或禁用某个屏幕上的浮层"""
+        if enabled:
+            self.disabled.discard(name)
+        else:
+            self.disabled.add(name)
+        for screen in QtGui.QGuiApplication.screens():
+            if screen.name() != name:
+                continue
+            if enabled and self.visible:
+                self._ensure_window(screen)
+            elif not enabled:
+                self._on_screen_removed(screen)
+
+    # 状态分发
+
+    def maximum(self):
+        return self.maximum_value
+
+    def setValue(self, value):
+        self.current = value
+        for window in self.windows.values():
+            window.strip.setValue(value)
+
+    def set_counter_text(self, text):
+        self.counter_text = text
+        for window in self.windows.values():
+            window.strip.set_counter_text(text)
+
+    def set_trough_opacity(self, opacity):
+        self.trough_opacity = opacity
+        for window in self.windows.values():
+            window.strip.set_trough_opacity(opacity)
+
+    def set_thin(self, thin):
+        self.thin = thin
+        for window in self.windows.values():
+            window.strip.set_thin(thin)
+
+    def set_window_opacity(self, opacity):
+        self.window_opacity = opacity
+        for window in self.windows.values():
+            window.setWindowOpacity(opacity)
+
+    def close(self):
+        """关闭所有浮层"""
+        self.visible = False
+        for screen in list(self.windows):
+            self._on_screen_removed(screen)
@@ -0,0 +1,45 @@
+import os
+import sys
+
+APP_DIR_NAME = "WaterReminder"
+
+
+def data_dir():
+    """返回用户数据目录，不存在时自动创建
+
+    可以通过环境变量 WATER_REMINDER_DATA_DIR 指定其他目录。
+    """
+    path = os.environ.get("WATER_REMINDER_DATA_DIR")
+    if not path:
+        if sys.platform == "win32":
+            base = os.environ.get("APPDATA") or os.path.expanduser("~")
+            path = os.path.join(base, APP_DIR_NAME)
+        else:
+            base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+            path = os.path.join(base, "water-reminder")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def session_id():
+    """当前图形会话的标识，同一用户的不同会话互不相同，不在会话中时为空字符串"""
+    return (
+        os.environ.get("XDG_SESSION_ID")
+        or os.environ.get("WAYLAND_DISPLAY")
+        or os.environ.get("DISPLAY")
+        or os.environ.get("SESSIONNAME")
+        or ""
+    )
+
+
+def runtime_dir():
+    """返回存放运行时文件的目录（$XDG_RUNTIME_DIR 下，仅当前用户可访问），不存在时自动创建
+
+    没有 XDG_RUNTIME_DIR（Windows 或不在登录会话中）时使用数据目录。
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if not base:
+        return data_dir()
+    path = os.path.join(base, "water-reminder")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
@@ -0,0 +1,190 @@
+"""电源状态与低功耗模式
+
+使用电池供电时切换到节能配置：进度格数更粗、关闭窗口半透明、
+定时器改为最粗粒度、提醒窗口不绘制插图。
+
+Linux 上读取 /sys/class/power_supply（可以通过参数或环境变量
+WATER_REMINDER_POWER_SUPPLY 指向伪造的目录树），Windows 上调用
+GetSystemPowerStatus。
+"""
+import ctypes
+import os
+import sys
+
+from PyQt5 import QtCore
+
+from water_reminder.qtdbus import QtDBus, message_slot
+
+AC = "ac"
+BATTERY = "battery"
+UNKNOWN = "unknown"
+
+NORMAL = "normal"
+LOW_POWER = "low_power"
+
+PROFILES = {
+    NORMAL: {
+        "name": "标准",
+        "steps": 100,  # 进度条可见格数
+        "translucent": True,
+        "timer_type": QtCore.Qt.CoarseTimer,
+        "reminder_art": True,
+    },
+    LOW_POWER: {
+        "name": "节能",
+        "steps": 20,
+        "translucent": False,
+        "timer_type": QtCore.Qt.VeryCoarseTimer,
+        "reminder_art": False,
+    },
+}
+
+DEFAULT_SUPPLY_ROOT = "/sys/class/power_supply"
+# 没有电源事件通知时的轮询间隔（秒）
+POLL_INTERVAL = 60
+UPOWER_SERVICE = "org.freedesktop.UPower"
+
+
+def _read(path):
+    try:
+        with open(path, encoding="ascii", errors="replace") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def read_sysfs_state(root=DEFAULT_SUPPLY_ROOT):
+    """从 power_supply 目录树判断供电方式
+
+    任意市电/USB 电源在线即为 AC；否则有电池处于放电状态时为 BATTERY；
+    都读不到（台式机、容器）时为 UNKNOWN。
+    """
+    try:
+        names = sorted(os.listdir(root))
+    except OSError:
+        return UNKNOWN
+    discharging = False
+    for name in names:
+        supply = os.path.join(root, name)
+        kind = _read(os.path.join(supply, "type"))
+        if kind in ("Mains", "USB", "USB_C", "USB_PD") and _read(os.path.join(supply, "online")) == "1":
+            return AC
+        if kind == "Battery" and _read(os.path.join(supply, "status")) == "Discharging":
+            discharging = True
+    return BATTERY if discharging else UNKNOWN
+
+
+class _SystemPowerStatus(ctypes.Structure):
+    _fields_ = [
+        ("ACLineStatus", ctypes.c_ubyte),
+        ("BatteryFlag", ctypes.c_ubyte),
+        ("BatteryLifePercent", ctypes.c_ubyte),
+        ("SystemStatusFlag", ctypes.c_ubyte),
+        ("BatteryLifeTime", ctypes.c_ulong),
+        ("BatteryFullLifeTime", ctypes.c_ulong),
+    ]
+
+
+def read_windows_state():
+    """通过 GetSystemPowerStatus 判断供电方式"""
+    status = _SystemPowerStatus()
+    if not ctypes.windll.kernel32.GetSystemPowerStatus(ctypes.byref(status)):
+        return UNKNOWN
+    return {0: BATTERY, 1: AC}.get(status.ACLineStatus, UNKNOWN)
+
+
+def read_power_state(root=None):
+    """返回当前供电方式：AC、BATTERY 或 UNKNOWN"""
+    if sys.platform == "win32" and root is None:
+        return read_windows_state()
+    if root is None:
+        root = os.environ.get("WATER_REMINDER_POWER_SUPPLY") or DEFAULT_SUPPLY_ROOT
+    return read_sysfs_state(root)
+
+
+def profile_for(state, mode="auto"):
+    """按供电方式和用户选择（auto / normal / low_power）返回配置名"""
+    if mode in PROFILES:
+        return mode
+    return LOW_POWER if state == BATTERY else NORMAL
+
+
+class PowerMonitor(QtCore.QObject):
+    """跟踪供电方式，配置变化时发出 profile_changed
+
+    Linux 上 UPower 在系统总线上时监听它的属性变化，收到通知时重新读取；
+    Windows、没有 UPower 或 UPower 退出后用粗粒度定时器每分钟读取一次，
+    UPower 重新出现时停止轮询。
+    """
+
+    profile_changed = QtCore.pyqtSignal(str)
+
+    def __init__(self, parent=None, root=None, mode="auto", reader=None):
+        super().__init__(parent)
+        self.root = root
+        self.mode = mode
+        self.reader = reader or (lambda: read_power_state(self.root))
+        self.state = self.reader()
+        self.profile = profile_for(self.state, mode)
+
+        self.poll_timer = QtCore.QTimer(self)
+        self.poll_timer.setTimerType(QtCore.Qt.VeryCoarseTimer)
+        self.poll_timer.timeout.connect(self.refresh)
+        self.upower_watcher = None
+        if not self._watch_upower():
+            self.poll_timer.start(POLL_INTERVAL * 1000)
+
+    def _watch_upower(self, bus=None):
+        """订阅 UPower 的 OnBattery 变化，UPower 正在运行时返回 True
+
+        即使 UPower 不在总线上 bus.connect 也会成功，所以另外确认服务已注册，
+        并跟踪它之后的出现和退出。
+        """
+        if sys.platform == "win32" or self.root is not None or QtDBus is None:
+            return False
+        bus = bus or QtDBus.QDBusConnection.systemBus()
+        if not bus.isConnected():
+            return False
+        if not bus.connect(UPOWER_SERVICE, "/org/freedesktop/UPower",
+                           "org.freedesktop.DBus.Properties", "PropertiesChanged", self._on_upower_changed):
+            return False
+        self.upower_watcher = QtDBus.QDBusServiceWatcher(
+            UPOWER_SERVICE, bus,
+            QtDBus.QDBusServiceWatcher.WatchForRegistration | QtDBus.QDBusServiceWatcher.WatchForUnregistration,
+            self,
+        )
+        self.upower_watcher.serviceRegistered.connect(self._on_upower_registered)
+        self.upower_watcher.serviceUnregistered.connect(self._on_upower_unregistered)
+        reply = bus.interface().isServiceRegistered(UPOWER_SERVICE)
+        return reply.isValid() and bool(reply.value())
+
+    def _on_upower_registered(self, _name):
+        self.poll_timer.stop()
+        self.refresh()
+
+    def _on_upower_unregistered(self, _name):
+        self.poll_timer.start(POLL_INTERVAL * 1000)
+
+    @message_slot
+    def _on_upower_changed(self, message):
+        self.refresh()
+
+    def refresh(self):
+        """重新读取供电方式"""
+        self.state = self.reader()
+        self._apply()
+
+    def set_mode(self, mode):
+        """设置 auto / normal / low_power"""
+        self.mode = mode
+        self._apply()
+
+    def settings(self):
+        """当前配置的参数"""
+        return PROFILES[self.profile]
+
+    def _apply(self):
+        profile = profile_for(self.state, self.mode)
+        if profile != self.profile:
+            self.profile = profile
+            self.profile_changed.emit(profile)
@@ -0,0 +1,74 @@
+import math
+
+from PyQt5 import QtCore
+
+# 粗粒度定时器可能提前触发：CoarseTimer 最多提前间隔的 5%，VeryCoarseTimer
+# 按整秒取整，最多提前 0.5 秒。提前触发时进度还没变化，只能再唤醒一次
+COARSE_EARLY = 0.05
+VERY_COARSE_EARLY = 0.5
+
+from water_reminder import core as core_module
+
+
+class ProgressEngine(QtCore.QObject):
+    """驱动 ReminderCore 的 Qt 定时器
+
+    进度由状态机按已过时间计算，这里只为下一次可见变化（下一格进度）
+    或到期时间布置一次单次定时器，并把状态机事件转成 Qt 信号。
+    """
+
+    progress_changed = QtCore.pyqtSignal(int)  # 当前可见进度（0 - steps）
+    due = QtCore.pyqtSignal()  # 到达截止时间
+    fired_late = QtCore.pyqtSignal(float)  # 定时器实际触发比预定晚的秒数
+
+    def __init__(self, core, parent=None):
+        super().__init__(parent)
+        self.core = core
+        self.core.subscribe(self._on_core_event)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(QtCore.Qt.CoarseTimer)
+        self.timer.timeout.connect(self._on_timeout)
+        self.expected = None  # 定时器预定触发的单调时钟时间
+
+    def set_timer_type(self, timer_type):
+        """切换定时器精度（节能模式下使用 VeryCoarseTimer）"""
+        self.timer.setTimerType(timer_type)
+        self._arm()
+
+    def refresh(self):
+        """根据已过时间重新计算进度，并为下一次可见变化布置定时器"""
+        self.core.advance()
+        self._arm()
+
+    def _on_timeout(self):
+        if self.expected is not None:
+            self.fired_late.emit(max(self.core.clock() - self.expected, 0.0))
+        self.refresh()
+
+    def _arm(self):
+        """按状态机给出的下一次唤醒时间布置定时器"""
+        self.timer.stop()
+        wakeup = self.core.next_wakeup()
+        self.expected = wakeup
+        if wakeup is None:
+            return
+        # next_wakeup() 严格晚于当前时间；按定时器最多的提前量加长间隔，
+        # 保证触发时已经越过格边界，每一格只唤醒一次
+        delay = wakeup - self.core.clock()
+        timer_type = self.timer.timerType()
+        if timer_type == QtCore.Qt.CoarseTimer:
+            delay /= 1 - COARSE_EARLY
+        elif timer_type == QtCore.Qt.VeryCoarseTimer:
+            delay += VERY_COARSE_EARLY
+        self.timer.start(max(math.ceil(delay * 1000), 1))
+
+    def _on_core_event(self, event, value):
+        if event == core_module.PROGRESS:
+            self.progress_changed.emit(value)
+        elif event == core_module.DUE:
+            self.due.emit()
+        elif event in (core_module.CYCLE_STARTED, core_module.PAUSED, core_module.RESUMED):
+            # 暂停时 next_wakeup() 为 None，定时器随之停止
+            self._arm()
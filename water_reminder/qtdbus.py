@@ -0,0 +1,20 @@
+"""可选的 QtDBus
+
+有的 PyQt5 构建（Windows 上常见）不带 QtDBus，此时 QtDBus 为 None，
+各模块退回不用 D-Bus 的做法。接收 D-Bus 消息的槽用 message_slot 声明：
+bus.connect 和 callWithCallback 只接受用 pyqtSlot 声明了签名的方法，
+而 QDBusMessage 类型要在导入 QtDBus 之后才能用在签名里。
+"""
+from PyQt5 import QtCore
+
+try:
+    from PyQt5 import QtDBus
+except ImportError:
+    QtDBus = None
+
+
+def message_slot(func):
+    """声明为接收一个 QDBusMessage 的槽，没有 QtDBus 时原样返回"""
+    if QtDBus is None:
+        return func
+    return QtCore.pyqtSlot(QtDBus.QDBusMessage)(func)
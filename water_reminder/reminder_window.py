@@ -0,0 +1,114 @@
+import time
+
+from PyQt5 import QtWidgets, QtGui, QtCore
+
+from water_reminder.icons import REMINDER_ART_SIZE
+
+
+class ReminderWindow(QtWidgets.QDialog):
+    """可复用的全屏提醒窗口
+
+    只在启动后空闲时构建一次，之后每次提醒只更新文字和几何信息并显示/隐藏，
+    不再重复创建控件。样式来自应用级主题，按对象名匹配。
+    """
+
+    drink_clicked = QtCore.pyqtSignal()
+    snooze_clicked = QtCore.pyqtSignal()
+    # 从触发提醒到第一帧绘制完成的耗时（毫秒）
+    shown_latency = QtCore.pyqtSignal(float)
+
+    def __init__(self, parent=None, pixmaps=None):
+        super().__init__(parent)
+        # 共享的图标缓存（icons.PixmapCache），为 None 时不显示插图
+        self.pixmaps = pixmaps
+        self.setWindowTitle("喝水提醒")
+        # 设置为非模态
+        self.setModal(False)
+        self.pending_since = None
+        self.setObjectName("reminderWindow")
+
+        # 创建内容容器，居中显示内容
+        content_container = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(content_container)
+        layout.setAlignment(QtCore.Qt.AlignCenter)
+        layout.setSpacing(30)
+
+        # 插图，按所在屏幕的像素比从缓存取图
+        self.art = QtWidgets.QLabel()
+        self.art.setObjectName("reminderArt")
+        self.art.setAlignment(QtCore.Qt.AlignCenter)
+        self.art.setVisible(pixmaps is not None)
+        layout.addWidget(self.art)
+
+        # 提醒文字
+        self.label = QtWidgets.QLabel()
+        self.label.setObjectName("reminderLabel")
+        layout.addWidget(self.label)
+
+        # 按钮容器
+        button_container = QtWidgets.QWidget()
+        button_layout = QtWidgets.QHBoxLayout(button_container)
+        button_layout.setSpacing(30)
+
+        # 喝水按钮
+        self.yes_button = QtWidgets.QPushButton("喝水")
+        self.yes_button.clicked.connect(lambda: self.drink_clicked.emit())
+        self.yes_button.setObjectName("drinkButton")
+        button_layout.addWidget(self.yes_button)
+
+        # 稍后按钮
+        self.no_button = QtWidgets.QPushButton("稍后")
+        self.no_button.clicked.connect(lambda: self.snooze_clicked.emit())
+        self.no_button.setObjectName("snoozeButton")
+        button_layout.addWidget(self.no_button)
+
+        layout.addWidget(button_container)
+
+        # 调整按钮大小以适应触摸
+        self.yes_button.setMinimumSize(200, 80)
+        self.no_button.setMinimumSize(200, 80)
+
+        # 设置主布局
+        main_layout = QtWidgets.QVBoxLayout(self)
+        main_layout.addWidget(content_container)
+
+        # 提前完成样式计算和布局，首次显示时不再付出这部分开销
+        for widget in (self, content_container, self.art, self.label, button_container,
+                       self.yes_button, self.no_button):
+            widget.ensurePolished()
+        main_layout.activate()
+
+    def set_art_visible(self, visible):
+        """显示或隐藏插图（节能模式下不绘制）"""
+        self.art.setVisible(visible and self.pixmaps is not None)
+
+    def present(self, text, screen=None, triggered_at=None):
+        """更新提醒文字和位置后显示窗口
+
+        triggered_at 为触发提醒时的 time.perf_counter() 值，用于统计显示延迟。
+        """
+        self.pending_since = triggered_at if triggered_at is not None else time.perf_counter()
+        if self.label.text() != text:
+            self.label.setText(text)
+
+        screen = screen or QtGui.QGuiApplication.primaryScreen()
+        if self.windowHandle() is None:
+            self.create()
+        self.windowHandle().setScreen(screen)
+        self.setGeometry(screen.geometry())
+        if self.art.isVisibleTo(self):
+            pixmap = self.pixmaps.pixmap(REMINDER_ART_SIZE, screen.devicePixelRatio())
+            if self.art.pixmap() is None or self.art.pixmap().cacheKey() != pixmap.cacheKey():
+                self.art.setPixmap(pixmap)
+        self.showFullScreen()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.pending_since is not None:
+            latency = (time.perf_counter() - self.pending_since) * 1000
+            self.pending_since = None
+            self.shown_latency.emit(latency)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.pending_since = None
@@ -0,0 +1,211 @@
+"""提醒时段规则
+
+设置文件中的 "schedule" 描述什么时候提醒、按什么间隔提醒，例如：
+
+    "schedule": {
+        "active": {"mon-fri": [["09:00", "18:00"]], "sat": [], "sun": []},
+        "quiet_hours": [["12:00", "13:30"]],
+        "holidays": ["2026-10-01", "2026-10-02"],
+        "bands": [{"from": "09:00", "to": "11:00", "interval": 3600}]
+    }
+
+- active：每个星期几的提醒时段，键为 mon..sun 或 mon-fri 这样的范围，
+  没有列出的日子整天都可以提醒；空列表表示当天不提醒
+- quiet_hours：每天的免打扰时段，可以跨过零点（["22:00", "08:00"]）
+- holidays：整天不提醒的日期
+- bands：某个时段内改用的提醒间隔（秒）
+
+规则预先展开成未来若干天按时间排序、互不重叠的时段，查询某一时刻
+所在的时段和下一次变化的时间都是对起点列表的二分查找，不需要每次
+定时都重新计算规则。免打扰时段内周期暂停，不会有任何定时唤醒。
+"""
+import bisect
+import collections
+import datetime
+import math
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+# 每次展开的天数，用完之前重新展开
+HORIZON_DAYS = 14
+# 时段间隔的下限（秒），与设置中提醒间隔的下限相同
+MIN_INTERVAL = 1
+
+# start/end 为时间戳；quiet 为 True 时不提醒；interval 为该时段的提醒间隔，None 表示使用设置中的间隔
+Segment = collections.namedtuple("Segment", "start end quiet interval")
+
+
+def parse_clock(text):
+    """把 "HH:MM" 解析为一天中的分钟数，"24:00" 表示当天结束"""
+    try:
+        hour, minute = str(text).split(":")
+        hour, minute = int(hour), int(minute)
+    except ValueError:
+        raise ValueError(f"时间格式错误：{text!r}") from None
+    if not (0 <= hour <= 24 and 0 <= minute < 60) or (hour == 24 and minute):
+        raise ValueError(f"时间超出范围：{text!r}")
+    return hour * 60 + minute
+
+
+def _parse_windows(windows):
+    """[["HH:MM", "HH:MM"], ...] -> [(开始分钟, 结束分钟)]，跨零点的时段拆成两段"""
+    if not isinstance(windows, (list, tuple)):
+        raise ValueError(f"时段列表格式错误：{windows!r}")
+    result = []
+    for window in windows:
+        if not isinstance(window, (list, tuple)) or len(window) != 2:
+            raise ValueError(f"时段格式错误：{window!r}")
+        start, end = parse_clock(window[0]), parse_clock(window[1])
+        if start < end:
+            result.append((start, end))
+        elif start > end:
+            result.extend([(start, 1440), (0, end)])
+    return result
+
+
+def _parse_days(key):
+    """"mon" 或 "mon-fri" -> 星期序号列表（0 = 周一）"""
+    first, _, last = str(key).lower().partition("-")
+    if first not in WEEKDAYS or (last and last not in WEEKDAYS):
+        raise ValueError(f"星期格式错误：{key!r}")
+    start = WEEKDAYS.index(first)
+    end = WEEKDAYS.index(last) if last else start
+    return [day % 7 for day in range(start, end + 1 if end >= start else end + 8)]
+
+
+class Rules:
+    """解析并校验后的规则，格式错误时抛出 ValueError"""
+
+    def __init__(self, data=None):
+        data = data or {}
+        if not isinstance(data, dict):
+            raise ValueError("schedule 必须是对象")
+        for key, kind in (("active", dict), ("quiet_hours", list), ("holidays", list), ("bands", list)):
+            if data.get(key) is not None and not isinstance(data[key], kind):
+                raise ValueError(f"{key} 必须是{'对象' if kind is dict else '列表'}")
+        self.active = {}
+        for key, windows in (data.get("active") or {}).items():
+            for day in _parse_days(key):
+                self.active[day] = _parse_windows(windows)
+        self.quiet = _parse_windows(data.get("quiet_hours") or [])
+        try:
+            self.holidays = {datetime.date.fromisoformat(day) for day in data.get("holidays") or []}
+        except (TypeError, ValueError):
+            raise ValueError("holidays 中的日期格式错误") from None
+        self.bands = []
+        for band in data.get("bands") or []:
+            interval = band.get("interval") if isinstance(band, dict) else None
+            if (not isinstance(interval, (int, float)) or isinstance(interval, bool)
+                    or not math.isfinite(interval) or interval < MIN_INTERVAL):
+                raise ValueError(f"bands 中的间隔错误：{band!r}")
+            for start, end in _parse_windows([[band.get("from"), band.get("to")]]):
+                self.bands.append((start, end, interval))
+
+    def is_empty(self):
+        return not (self.active or self.quiet or self.holidays or self.bands)
+
+    def day_segments(self, date):
+        """某一天按分钟划分的 [(开始分钟, 结束分钟, quiet, interval)]"""
+        if date in self.holidays:
+            return [(0, 1440, True, None)]
+        active = self.active.get(date.weekday(), [(0, 1440)])
+        bounds = {0, 1440}
+        for windows in (active, self.quiet, self.bands):
+            for window in windows:
+                bounds.update(window[:2])
+        bounds = sorted(bounds)
+        segments = []
+        for start, end in zip(bounds, bounds[1:]):
+            quiet = not any(a <= start < b for a, b in active) or any(a <= start < b for a, b in self.quiet)
+            interval = None
+            if not quiet:
+                interval = next((value for a, b, value in self.bands if a <= start < b), None)
+            segments.append((start, end, quiet, interval))
+        return segments
+
+
+def _timestamp(date, minute):
+    """本地日期 + 分钟数 -> 时间戳（按本地时区，夏令时切换日同样适用）"""
+    moment = datetime.datetime.combine(date, datetime.time()) + datetime.timedelta(minutes=minute)
+    return moment.timestamp()
+
+
+class Schedule:
+    """规则展开后的时段索引"""
+
+    def __init__(self, rules=None, horizon_days=HORIZON_DAYS):
+        self.rules = rules if isinstance(rules, Rules) else Rules(rules)
+        self.horizon_days = horizon_days
+        self.starts = []
+        self.segments = []
+
+    def is_empty(self):
+        return self.rules.is_empty()
+
+    def compile(self, now):
+        """从 now 的前一天开始展开 horizon_days 天，相邻且相同的时段合并"""
+        first = datetime.date.fromtimestamp(now) - datetime.timedelta(days=1)
+        segments = []
+        for offset in range(self.horizon_days + 1):
+            date = first + datetime.timedelta(days=offset)
+            for start, end, quiet, interval in self.rules.day_segments(date):
+                segment = Segment(_timestamp(date, start), _timestamp(date, end), quiet, interval)
+                last = segments[-1] if segments else None
+                if last is not None and (last.quiet, last.interval) == (quiet, interval):
+                    segments[-1] = last._replace(end=segment.end)
+                else:
+                    segments.append(segment)
+        self.segments = segments
+        self.starts = [segment.start for segment in segments]
+
+    def _index(self, ts):
+        # 离展开范围的末尾不足一天时重新展开
+        if not self.segments or ts < self.starts[0] or ts >= self.segments[-1].end - 86400:
+            self.compile(ts)
+        return bisect.bisect_right(self.starts, ts) - 1
+
+    def segment_at(self, ts):
+        """ts 所在的时段"""
+        if self.is_empty():
+            return Segment(float("-inf"), float("inf"), False, None)
+        index = self._index(ts)  # 可能重新展开，先取下标再取列表
+        return self.segments[index]
+
+    def is_quiet(self, ts):
+        return self.segment_at(ts).quiet
+
+    def next_transition(self, ts):
+        """ts 之后下一次进入不同时段的时间，没有规则时返回 None"""
+        if self.is_empty():
+            return None
+        index = self._index(ts)
+        return self.segments[index].end
+
+    def fire_time(self, ts, remaining):
+        """从 ts 起再累计 remaining 秒的非免打扰时间后的时刻
+
+        用于估计跳过免打扰时段之后的实际提醒时间。
+        """
+        if self.is_empty():
+            return ts + remaining
+        index = self._index(ts)
+        for _ in range(len(self.segments)):
+            segment = self.segments[index]
+            if not segment.quiet:
+                available = segment.end - ts
+                if remaining <= available:
+                    return ts + remaining
+                remaining -= available
+            ts = segment.end
+            index += 1
+            if index >= len(self.segments):
+                index = self._index(ts)
+        return None
+
+
+def describe(segment):
+    """时段的简短说明，用于托盘菜单和状态输出"""
+    if segment.quiet:
+        return "免打扰"
+    if segment.interval:
+        return f"提醒间隔 {segment.interval / 3600:g} 小时"
+    return "提醒中"
@@ -0,0 +1,281 @@
+"""墙钟调度器
+
+为日历事件（跨天、提醒到期）布置单次定时器，两次事件之间进程完全静默。
+系统唤醒、手动调整时钟、夏令时或时区变化之后会重新计算所有截止时间，
+错过的事件立即补发。
+
+Linux 上使用 CLOCK_REALTIME 的 timerfd（绝对时间 + TFD_TIMER_CANCEL_ON_SET），
+休眠期间到期或时钟被修改都会被内核直接唤醒；其他平台使用 QTimer，
+并通过系统电源/时间变化通知重新计算。
+"""
+import ctypes
+import ctypes.util
+import datetime
+import errno
+import math
+import os
+import sys
+import time
+
+from PyQt5 import QtCore
+
+# 没有任何唤醒/时钟变化通知时，定时器最长只布置这么久，作为兜底
+FALLBACK_MAX_ARM = 3600
+# QTimer 的间隔上限约为 24.8 天
+QTIMER_MAX_ARM = 24 * 86400
+
+
+def next_local_midnight(now):
+    """返回 now 之后下一个本地零点的时间戳"""
+    date = datetime.date.fromtimestamp(now) + datetime.timedelta(days=1)
+    return time.mktime(date.timetuple())
+
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+
+class _Itimerspec(ctypes.Structure):
+    _fields_ = [("it_interval", _Timespec), ("it_value", _Timespec)]
+
+
+class TimerFdBackend:
+    """Linux timerfd 后端，按墙钟绝对时间触发"""
+
+    CLOCK_REALTIME = 0
+    TFD_NONBLOCK = os.O_NONBLOCK if hasattr(os, "O_NONBLOCK") else 0o4000
+    TFD_CLOEXEC = 0o2000000
+    TFD_TIMER_ABSTIME = 1
+    TFD_TIMER_CANCEL_ON_SET = 2
+
+    # 能感知时钟修改，不需要兜底轮询
+    notifies_clock_changes = True
+
+    def __init__(self, scheduler):
+        if not sys.platform.startswith("linux"):
+            raise OSError("timerfd 仅在 Linux 上可用")
+        self.scheduler = scheduler
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.timerfd_create(self.CLOCK_REALTIME, self.TFD_NONBLOCK | self.TFD_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "timerfd_create 失败")
+        self.notifier = QtCore.QSocketNotifier(self.fd, QtCore.QSocketNotifier.Read, scheduler)
+        self.notifier.activated.connect(self._on_activated)
+        self.deadline = None
+
+    def arm(self, deadline):
+        """在墙钟时间 deadline 触发"""
+        self.deadline = deadline
+        # 全 0 表示解除定时，纳秒部分向上取整且至少为 1
+        sec = int(deadline)
+        nsec = min(int((deadline - sec) * 1e9) + 1, 999999999)
+        self._settime(_Timespec(sec, nsec), self.TFD_TIMER_ABSTIME | self.TFD_TIMER_CANCEL_ON_SET)
+
+    def disarm(self):
+        """取消定时"""
+        self.deadline = None
+        self._settime(_Timespec(0, 0), 0)
+
+    def _settime(self, value, flags):
+        spec = _Itimerspec(_Timespec(0, 0), value)
+        if self.libc.timerfd_settime(self.fd, flags, ctypes.byref(spec), None) < 0:
+            raise OSError(ctypes.get_errno(), "timerfd_settime 失败")
+
+    def _on_activated(self, _fd=None):
+        try:
+            os.read(self.fd, 8)
+        except OSError as e:
+            if e.errno == errno.ECANCELED:
+                # 墙钟被修改，所有截止时间需要重新计算
+                self.scheduler.reevaluate()
+            elif e.errno != errno.EAGAIN:
+                raise
+            return
+        self.scheduler.fire_due()
+
+    def close(self):
+        """关闭文件描述符"""
+        self.notifier.setEnabled(False)
+        os.close(self.fd)
+
+
+class QTimerBackend:
+    """通用后端，使用单次粗粒度 QTimer"""
+
+    def __init__(self, scheduler, notifies_clock_changes=False):
+        self.scheduler = scheduler
+        self.notifies_clock_changes = notifies_clock_changes
+        self.timer = QtCore.QTimer(scheduler)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(QtCore.Qt.VeryCoarseTimer)
+        self.timer.timeout.connect(scheduler.fire_due)
+
+    def arm(self, deadline):
+        """在墙钟时间 deadline 触发"""
+        limit = QTIMER_MAX_ARM if self.notifies_clock_changes else FALLBACK_MAX_ARM
+        delay = min(max(deadline - self.scheduler.clock(), 0), limit)
+        self.timer.start(int(math.ceil(delay * 1000)))
+
+    def disarm(self):
+        """取消定时"""
+        self.timer.stop()
+
+    def close(self):
+        """停止定时器"""
+        self.timer.stop()
+
+
+class WindowsTimeChangeFilter(QtCore.QAbstractNativeEventFilter):
+    """监听 Windows 的系统唤醒和时间/时区变化消息"""
+
+    WM_TIMECHANGE = 0x001E
+    WM_POWERBROADCAST = 0x0218
+    PBT_APMRESUMESUSPEND = 0x0007
+    PBT_APMRESUMEAUTOMATIC = 0x0012
+
+    def __init__(self, scheduler):
+        super().__init__()
+        from ctypes import wintypes
+        self.msg_type = wintypes.MSG
+        self.scheduler = scheduler
+
+    def nativeEventFilter(self, event_type, message):
+        if event_type == b"windows_generic_MSG":
+            msg = self.msg_type.from_address(int(message))
+            if msg.message == self.WM_TIMECHANGE or (
+                msg.message == self.WM_POWERBROADCAST
+                and msg.wParam in (self.PBT_APMRESUMESUSPEND, self.PBT_APMRESUMEAUTOMATIC)
+            ):
+                # 不在原生消息处理过程中直接执行回调
+                QtCore.QTimer.singleShot(0, self.scheduler.reevaluate)
+        return False, 0
+
+
+class LogindSleepWatcher(QtCore.QObject):
+    """通过 systemd-logind 的 PrepareForSleep 信号感知系统唤醒"""
+
+    def __init__(self, scheduler):
+        super().__init__(scheduler)
+        self.scheduler = scheduler
+        self.connected = False
+        try:
+            from PyQt5 import QtDBus
+        except ImportError:
+            return
+        bus = QtDBus.QDBusConnection.systemBus()
+        if bus.isConnected():
+            self.connected = bus.connect(
+                "org.freedesktop.login1", "/org/freedesktop/login1",
+                "org.freedesktop.login1.Manager", "PrepareForSleep", self.prepare_for_sleep
+            )
+
+    @QtCore.pyqtSlot(bool)
+    def prepare_for_sleep(self, sleeping):
+        if not sleeping:
+            self.scheduler.reevaluate()
+
+
+class WallClockScheduler(QtCore.QObject):
+    """按墙钟时间调度日历事件的调度器
+
+    每个事件由 next_fire(now) 给出下一次触发的时间戳（返回 None 表示暂不触发），
+    同一时刻只布置一个最早到期的单次定时器。
+    """
+
+    # 系统唤醒、时钟或时区变化后发出
+    clock_changed = QtCore.pyqtSignal()
+    # 事件实际执行比截止时间晚的秒数：(事件名, 秒)
+    fired_late = QtCore.pyqtSignal(str, float)
+
+    def __init__(self, parent=None, clock=time.time, backend=None):
+        super().__init__(parent)
+        self.clock = clock
+        self.entries = {}
+        self.watchers = []
+
+        if backend is None:
+            backend = self._create_backend()
+        self.backend = backend
+
+    def _create_backend(self):
+        """选择定时后端并安装唤醒、时区变化监听"""
+        notified = False
+        if sys.platform == "win32":
+            event_filter = WindowsTimeChangeFilter(self)
+            QtCore.QCoreApplication.instance().installNativeEventFilter(event_filter)
+            self.watchers.append(event_filter)
+            notified = True
+        else:
+            sleep_watcher = LogindSleepWatcher(self)
+            self.watchers.append(sleep_watcher)
+            notified = sleep_watcher.connected
+            if os.path.exists("/etc/localtime"):
+                self.tz_watcher = QtCore.QFileSystemWatcher(["/etc/localtime"], self)
+                self.tz_watcher.fileChanged.connect(self._on_timezone_changed)
+
+        try:
+            return TimerFdBackend(self)
+        except (OSError, AttributeError):
+            return QTimerBackend(self, notifies_clock_changes=notified)
+
+    def add(self, name, next_fire, callback):
+        """注册日历事件"""
+        self.entries[name] = [next_fire, callback, next_fire(self.clock())]
+        self._arm()
+
+    def update(self, name):
+        """重新计算某个事件的下一次触发时间"""
+        entry = self.entries[name]
+        entry[2] = entry[0](self.clock())
+        self._arm()
+
+    def remove(self, name):
+        """移除事件"""
+        self.entries.pop(name, None)
+        self._arm()
+
+    def next_deadline(self):
+        """返回最早的截止时间，没有时返回 None"""
+        deadlines = [entry[2] for entry in self.entries.values() if entry[2] is not None]
+        return min(deadlines) if deadlines else None
+
+    def fire_due(self):
+        """执行所有已到期的事件并布置下一次定时"""
+        now = self.clock()
+        for name, entry in list(self.entries.items()):
+            if entry[2] is not None and entry[2] <= now + 0.001:
+                self.fired_late.emit(name, max(now - entry[2], 0.0))
+                # 先算好下一次时间，回调中可以再调用 update
+                entry[2] = entry[0](now)
+                entry[1]()
+        self._arm()
+
+    def reevaluate(self):
+        """系统唤醒或时钟变化后补发错过的事件，并按新时间重新计算全部截止时间"""
+        if hasattr(time, "tzset"):
+            time.tzset()
+        now = self.clock()
+        for name, entry in list(self.entries.items()):
+            if entry[2] is not None and entry[2] <= now:
+                self.fired_late.emit(name, now - entry[2])
+                entry[1]()
+            entry[2] = entry[0](now)
+        self._arm()
+        self.clock_changed.emit()
+
+    def _on_timezone_changed(self, path):
+        # /etc/localtime 常被整体替换，需要重新加入监听
+        if path not in self.tz_watcher.files() and os.path.exists(path):
+            self.tz_watcher.addPath(path)
+        self.reevaluate()
+
+    def _arm(self):
+        deadline = self.next_deadline()
+        if deadline is None:
+            self.backend.disarm()
+        else:
+            self.backend.arm(deadline)
+
+    def close(self):
+        """释放定时后端"""
+        self.backend.close()
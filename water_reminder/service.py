@@ -0,0 +1,390 @@
+"""主机级调度服务
+
+多用户终端服务器上，每个会话都运行完整的 WaterReminderApp 会重复
+占用 Qt 界面栈、定时器和提醒逻辑。这里的服务进程只使用 QtCore，
+为每个用户维护一个 ReminderCore 和事件日志，所有用户共用一个单次
+定时器；各会话只运行很薄的浮层客户端（session_client），通过本地
+套接字订阅自己用户的状态。
+
+服务只推送状态变化：周期开始（墙钟起点和长度）、今日次数、到期。
+客户端根据周期起点自行计算进度，两次变化之间没有任何通信。
+
+所有用户都能连接服务，连接属于哪个用户由操作系统给出的对端凭据决定
+（Linux 的 SO_PEERCRED、macOS/BSD 的 LOCAL_PEERCRED、Windows 命名管道
+客户端进程的令牌），hello 中的用户名被忽略，每个账户只能读写自己的状态。
+用户的最后一个会话断开后释放它的状态，周期从事件日志的检查点恢复。
+
+    python -m water_reminder.service [--name 套接字路径] [--data-dir 目录]
+
+服务面向所有用户，套接字不能放在任何人都能写的 /tmp 里（别人可以抢先
+占用这个名字冒充服务），默认放在系统运行时目录下只有服务账户能写的
+目录中：systemd 服务用 RuntimeDirectory= 时为 $RUNTIME_DIRECTORY，
+否则为 /run/water-reminder。Windows 上为命名管道名。
+
+--trust-hello 只用于测试：套接字只允许服务自己的用户连接，用户名取自
+hello，用一个账户模拟多个用户（见 benchmarks/load_service.py）。
+
+协议（每行一个 JSON 对象）：
+    客户端 → 服务  {"type": "hello", "user": 用户名}
+                   {"type": "drink"} / {"type": "snooze"} / {"type": "set_interval", "interval": 秒}
+    服务 → 客户端  {"type": "state", "cycle_start", "length", "count", "due", "interval"}
+                   {"type": "cycle", "cycle_start", "length"} / {"type": "count", "count"} / {"type": "due"}
+                   {"type": "error", "error": 说明}
+"""
+import argparse
+import math
+import os
+import re
+import sqlite3
+import sys
+import time
+
+from PyQt5 import QtCore
+
+from water_reminder import core, events, ipc, settings
+from water_reminder.paths import data_dir
+from water_reminder.scheduler import next_local_midnight
+
+SERVICE_NAME = "water-reminder-service"
+# 事件日志合并写入的延迟（毫秒）
+FLUSH_DELAY = 2000
+# 同时维护状态的用户数上限
+MAX_USERS = 1024
+
+
+def default_name():
+    """服务套接字的默认路径（Windows 上为命名管道名）"""
+    if sys.platform == "win32":
+        return SERVICE_NAME
+    return os.path.join(os.environ.get("RUNTIME_DIRECTORY") or "/run/water-reminder", "service")
+
+
+def prepare_socket_dir(name):
+    """创建套接字所在的目录，目录不属于本账户或其他人可写时抛出 OSError"""
+    if sys.platform == "win32" or not os.path.isabs(name):
+        return
+    directory = os.path.dirname(name)
+    os.makedirs(directory, mode=0o755, exist_ok=True)
+    info = os.stat(directory)
+    if info.st_uid != os.geteuid() or info.st_mode & 0o022:
+        raise OSError(f"套接字目录 {directory} 不属于本账户或其他用户可写，拒绝在其中监听")
+
+
+def valid_interval(value):
+    """客户端或命令行给出的提醒间隔是否可用，范围与设置相同"""
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value) and settings.in_range("interval", value))
+
+
+def store_path(directory, user):
+    """用户事件日志的路径，用户名中的特殊字符替换为下划线"""
+    return os.path.join(directory, "events-" + re.sub(r"[^\w.-]", "_", user) + ".db")
+
+
+class UserState:
+    """一个用户的状态机、事件日志和已连接的会话"""
+
+    def __init__(self, user, store, interval):
+        self.user = user
+        self.store = store
+        self.clients = []
+        # 服务不绘制进度，只需要到期事件，可见格数取 1
+        self.core = core.ReminderCore(interval=interval, steps=1)
+        if store is not None:
+            self.core.water_count = store.day_counts()["drinks"]
+
+    def snapshot(self):
+        """完整状态，新会话连接时发送"""
+        return {
+            "type": "state",
+            "cycle_start": self.core.cycle_start_wall(),
+            "length": self.core.cycle_length,
+            "count": self.core.water_count,
+            "due": self.core.is_due(),
+            "interval": self.core.interval,
+        }
+
+
+class SchedulerService(QtCore.QObject):
+    """为多个用户驱动提醒状态机的服务"""
+
+    def __init__(self, parent=None, name=None, directory=None, interval=10800, trust_hello=False):
+        super().__init__(parent)
+        self.name = name = name or default_name()
+        prepare_socket_dir(name)
+        self.directory = directory or data_dir()
+        os.makedirs(self.directory, exist_ok=True)
+        self.interval = interval
+        self.trust_hello = trust_hello
+        self.users = {}
+
+        self.server = ipc.listen(name, self, world_access=not trust_hello, user_only=trust_hello)
+        if self.server is None:
+            raise OSError(f"无法监听 {name}，可能已有服务在运行")
+        self.server.newConnection.connect(self._on_connection)
+
+        # 所有用户共用一个单次定时器，布置到最早的到期时间或本地零点
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(QtCore.Qt.CoarseTimer)
+        self.timer.timeout.connect(self.tick)
+
+        self.flush_timer = QtCore.QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setTimerType(QtCore.Qt.VeryCoarseTimer)
+        self.flush_timer.timeout.connect(self.flush)
+
+    # 连接管理
+
+    def _on_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            channel = ipc.Channel(socket, self)
+            channel.user = None
+            channel.peer = None if self.trust_hello else ipc.peer_user(socket)
+            channel.message.connect(lambda message, channel=channel: self._on_message(channel, message))
+            channel.closed.connect(lambda channel=channel: self._on_closed(channel))
+            if not self.trust_hello and channel.peer is None:
+                channel.close()  # 无法确认对端用户时拒绝
+
+    def _on_closed(self, channel):
+        state = self.users.get(channel.user)
+        if state is not None and channel in state.clients:
+            state.clients.remove(channel)
+            if not state.clients:
+                self.release_user(state)
+        channel.deleteLater()
+
+    def _on_message(self, channel, message):
+        kind = message.get("type")
+        if kind == "hello":
+            user = str(message.get("user") or "") if self.trust_hello else channel.peer
+            if not user or channel.user is not None:
+                channel.close()
+                return
+            if user not in self.users and len(self.users) >= MAX_USERS:
+                channel.send({"type": "error", "error": "用户数已达上限"})
+                channel.flush()
+                channel.close()
+                return
+            channel.user = user
+            state = self.user_state(user)
+            state.clients.append(channel)
+            channel.send(state.snapshot())
+            return
+        state = self.users.get(channel.user)
+        if state is None:
+            return
+        if kind == "drink":
+            state.core.drink()
+        elif kind == "snooze":
+            state.core.snooze()
+        elif kind == "set_interval":
+            interval = message.get("interval")
+            if valid_interval(interval):
+                state.core.set_interval(interval)
+            else:
+                low = settings.RANGES["interval"][0]
+                channel.send({"type": "error", "error": f"提醒间隔必须是不小于 {low} 的秒数：{interval!r}"})
+
+    # 用户状态
+
+    def user_state(self, user):
+        """返回用户状态，第一次出现时打开事件日志并恢复周期"""
+        state = self.users.get(user)
+        if state is not None:
+            return state
+        try:
+            store = events.EventStore(store_path(self.directory, user))
+        except (OSError, sqlite3.Error):
+            store = None
+        state = UserState(user, store, self.interval)
+        self.users[user] = state
+        state.core.subscribe(lambda event, value, state=state: self._on_core_event(state, event, value))
+
+        checkpoint = store.load_checkpoint() if store is not None else None
+        elapsed = time.time() - checkpoint["cycle_start"] if checkpoint else -1
+        if elapsed < 0:
+            state.core.start_cycle()
+        else:
+            state.core.start_cycle(checkpoint["interval"], elapsed=min(elapsed, checkpoint["interval"]))
+        return state
+
+    def release_user(self, state):
+        """用户的会话都已断开：写入并关闭事件日志，释放状态"""
+        self.users.pop(state.user, None)
+        if state.store is not None:
+            state.store.close()
+
+    def _on_core_event(self, state, event, value):
+        if event == core.CYCLE_STARTED:
+            if state.store is not None:
+                state.store.set_checkpoint(state.core.cycle_start_wall(), value)
+            self.broadcast(state, {"type": "cycle", "cycle_start": state.core.cycle_start_wall(), "length": value})
+            self._arm()
+        elif event == core.COUNT:
+            self.broadcast(state, {"type": "count", "count": value})
+        elif event == core.DUE:
+            if state.store is not None:
+                state.store.append(events.REMINDER_SHOWN)
+            self.broadcast(state, {"type": "due"})
+        elif event in (core.DRINK, core.SNOOZE):
+            if state.store is not None:
+                state.store.append(event)
+        elif event == core.DAY_CHANGED and state.store is not None:
+            state.core.water_count = state.store.day_counts()["drinks"]
+        if state.store is not None and not self.flush_timer.isActive():
+            self.flush_timer.start(FLUSH_DELAY)
+
+    def broadcast(self, state, message):
+        """把变化发给该用户的所有会话"""
+        for channel in state.clients:
+            channel.send(message)
+
+    # 定时
+
+    def tick(self):
+        """推进所有用户的状态机（到期、跨天），再布置下一次定时"""
+        for state in list(self.users.values()):
+            state.core.advance()
+        self._arm()
+
+    def _arm(self):
+        now_mono = core.monotonic_seconds()
+        now_wall = time.time()
+        wakeups = [state.core.next_wakeup(visible=False) for state in self.users.values()]
+        wakeups = [wakeup - now_mono for wakeup in wakeups if wakeup is not None]
+        wakeups.append(next_local_midnight(now_wall) - now_wall)
+        delay = min(wakeups)
+        self.timer.start(max(int(math.ceil(delay * 1000)) + 1, 1))
+
+    def flush(self):
+        """写入所有用户的事件日志"""
+        for state in self.users.values():
+            if state.store is not None:
+                state.store.flush()
+
+    def close(self):
+        """停止服务并关闭事件日志"""
+        self.server.close()
+        for state in self.users.values():
+            if state.store is not None:
+                state.store.close()
+
+
+class ServiceClient(QtCore.QObject):
+    """会话端：订阅服务中某个用户的状态
+
+    收到的状态写入本地的 ReminderCore 镜像（只用于计算进度），
+    到期提醒以服务发来的 due 为准。
+    """
+
+    connected = QtCore.pyqtSignal()
+    disconnected = QtCore.pyqtSignal()
+    due = QtCore.pyqtSignal()
+
+    def __init__(self, mirror, user, parent=None, name=None):
+        super().__init__(parent)
+        self.mirror = mirror
+        self.user = user
+        self.name = name or default_name()
+        self.channel = None
+
+    def connect_to_service(self, timeout=1000):
+        """连接并订阅，成功时返回 True"""
+        socket = ipc.connect(self.name, timeout)
+        if socket is None:
+            return False
+        self.channel = ipc.Channel(socket, self)
+        self.channel.message.connect(self._on_message)
+        self.channel.closed.connect(self.disconnected)
+        self.channel.send({"type": "hello", "user": self.user})
+        self.connected.emit()
+        return True
+
+    def send(self, message):
+        if self.channel is not None:
+            self.channel.send(message)
+
+    def drink(self):
+        self.send({"type": "drink"})
+
+    def snooze(self):
+        self.send({"type": "snooze"})
+
+    def set_interval(self, interval):
+        self.send({"type": "set_interval", "interval": interval})
+
+    def _start_mirror(self, cycle_start, length):
+        if cycle_start is None or not length:
+            self.mirror.stop()
+            return
+        elapsed = max(time.time() - cycle_start, 0.0)
+        self.mirror.start_cycle(length, elapsed=min(elapsed, length))
+
+    def _on_message(self, message):
+        kind = message.get("type")
+        if kind == "state":
+            self.mirror.interval = message.get("interval") or self.mirror.interval
+            self.mirror.set_count(message.get("count", 0))
+            self._start_mirror(message.get("cycle_start"), message.get("length"))
+            if message.get("due"):
+                self.due.emit()
+        elif kind == "cycle":
+            self._start_mirror(message.get("cycle_start"), message.get("length"))
+        elif kind == "count":
+            self.mirror.set_count(message.get("count", 0))
+        elif kind == "due":
+            self.due.emit()
+
+
+def quit_on_signals(app):
+    """收到 SIGTERM/SIGINT 时退出事件循环（借助 wakeup fd，不需要轮询）"""
+    if sys.platform == "win32":
+        return
+    import signal
+    import socket
+
+    reader, writer = socket.socketpair()
+    reader.setblocking(False)
+    writer.setblocking(False)
+    signal.set_wakeup_fd(writer.fileno())
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *args: None)
+    notifier = QtCore.QSocketNotifier(reader.fileno(), QtCore.QSocketNotifier.Read, app)
+
+    def on_signal():
+        reader.recv(64)
+        app.quit()
+
+    notifier.activated.connect(on_signal)
+    # 保持套接字不被回收
+    app.signal_sockets = (reader, writer)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="喝水提醒主机级调度服务")
+    parser.add_argument("--name", help="套接字路径（默认为系统运行时目录下的 water-reminder/service）")
+    parser.add_argument("--data-dir", help="事件日志目录（默认为数据目录）")
+    parser.add_argument("--interval", type=int, default=10800, help="新用户的提醒间隔（秒）")
+    parser.add_argument("--trust-hello", action="store_true",
+                        help="测试用：只允许本用户连接，用户名取自客户端的 hello")
+    args = parser.parse_args(argv)
+    if not valid_interval(args.interval):
+        parser.error(f"提醒间隔必须至少为 {settings.RANGES['interval'][0]} 秒")
+
+    app = QtCore.QCoreApplication(sys.argv[:1])
+    try:
+        service = SchedulerService(name=args.name, directory=args.data_dir, interval=args.interval,
+                                   trust_hello=args.trust_hello)
+    except OSError as e:
+        print(e, file=sys.stderr)
+        return 1
+    app.aboutToQuit.connect(service.close)
+    quit_on_signals(app)
+    print(f"服务已启动：{service.server.fullServerName()}", flush=True)
+    return app.exec_()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
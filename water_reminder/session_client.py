@@ -0,0 +1,87 @@
+"""连接主机级调度服务的会话端浮层
+
+只包含浮层和提醒窗口，服务断开或会话结束时退出。提醒计时、跨天、
+统计和事件日志都在服务进程里（见 service.py）。本地的 ReminderCore 只是服务状态的镜像，
+用来按可见格数推进进度条。
+
+    python -m water_reminder.session_client [--name 套接字路径]
+"""
+import argparse
+import getpass
+import sys
+
+from PyQt5 import QtWidgets, QtGui, QtCore
+
+from water_reminder import core, overlay, service, theme
+from water_reminder.progress import ProgressEngine
+from water_reminder.reminder_window import ReminderWindow
+
+
+class SessionClient(QtCore.QObject):
+    """一个会话的浮层客户端"""
+
+    def __init__(self, name=None, user=None, reminder_text="该喝水了！", parent=None):
+        super().__init__(parent)
+        self.reminder_text = reminder_text
+        self.mirror = core.ReminderCore(steps=20)
+        self.mirror.subscribe(self.on_core_event)
+
+        self.overlays = overlay.OverlayManager(self)
+        self.progress_engine = ProgressEngine(self.mirror, self)
+        self.progress_engine.progress_changed.connect(
+            lambda value: self.overlays.setValue(value * self.overlays.maximum() // self.mirror.steps)
+        )
+        self.reminder_window = None
+
+        self.client = service.ServiceClient(self.mirror, user or getpass.getuser(), self, name)
+        self.client.due.connect(self.show_reminder)
+        self.client.disconnected.connect(QtWidgets.QApplication.quit)
+
+    def start(self):
+        """连接服务并显示浮层，连接失败时返回 False"""
+        if not self.client.connect_to_service():
+            return False
+        self.overlays.show()
+        return True
+
+    def on_core_event(self, event, value):
+        if event == core.COUNT:
+            self.overlays.set_counter_text(f"💧 今日喝水: {value}")
+
+    def show_reminder(self):
+        if self.reminder_window is None:
+            self.reminder_window = ReminderWindow()
+            self.reminder_window.drink_clicked.connect(self.on_drink)
+            self.reminder_window.snooze_clicked.connect(self.on_snooze)
+        if not self.reminder_window.isVisible():
+            screen = QtGui.QGuiApplication.screenAt(QtGui.QCursor.pos())
+            self.reminder_window.present(self.reminder_text, screen)
+
+    def on_drink(self):
+        self.reminder_window.hide()
+        self.client.drink()
+
+    def on_snooze(self):
+        self.reminder_window.hide()
+        self.client.snooze()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="喝水提醒会话端")
+    parser.add_argument("--name", help="服务的套接字路径（默认与服务相同）")
+    parser.add_argument("--text", default="该喝水了！", help="提醒文字")
+    args, qt_args = parser.parse_known_args(argv)
+
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
+    theme.install(app)
+    app.setQuitOnLastWindowClosed(False)
+    name = args.name or service.default_name()
+    client = SessionClient(name, reminder_text=args.text)
+    if not client.start():
+        print(f"无法连接到服务 {name}", file=sys.stderr)
+        return 1
+    return app.exec_()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
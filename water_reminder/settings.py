@@ -0,0 +1,215 @@
+"""设置的持久化
+
+设置保存在数据目录下带版本号的 settings.json 中，启动时读取一次到
+Settings 对象，界面只读写这个对象。短时间内的多次修改合并成一次写入，
+写入先写临时文件再原子替换，写入失败时稍后重试；外部编辑文件时通过
+文件监听热加载。同时监听设置文件和所在目录，启动时还没有的设置文件
+（例如之后分发的策略文件）和编辑器删除或改名后重新写入的文件同样会
+被重新加载；数据目录中其他文件的写入不会触发重新读取。
+"""
+import copy
+import json
+import os
+
+from PyQt5 import QtCore
+
+from water_reminder.paths import data_dir
+
+VERSION = 1
+FILE_NAME = "settings.json"
+# 合并写入的延迟（毫秒）
+WRITE_DELAY = 500
+# 写入失败后重试的间隔（毫秒）
+RETRY_DELAY = 30000
+
+DEFAULTS = {
+    "interval": 10800,  # 提醒间隔（秒）
+    "reminder_text": "该喝水了！",
+    "window_opacity": 0.8,
+    "progress_opacity": 0.5,
+    "thin_bar": False,
+    "disabled_screens": [],  # 不显示进度条的屏幕名称
+    "power_mode": "auto",  # auto / normal / low_power
+    "idle_threshold": 300,  # 无操作多少秒后暂停周期，0 表示不暂停
+    "idle_policy": "resume",  # 回来后 resume 继续 / reset 重新开始
+    "escalation": "tray:120,toast:300,fullscreen",  # 提醒升级策略，见 notify.py
+    "schedule": {},  # 提醒时段规则（免打扰、工作日、节假日、分时段间隔），见 rules.py
+}
+
+
+# 数值设置的取值范围（含端点），None 表示不限；超出范围的值用默认值
+RANGES = {
+    "interval": (1, None),
+    "window_opacity": (0.1, 1.0),
+    "progress_opacity": (0.0, 1.0),
+    "idle_threshold": (0, None),
+}
+# 只能取固定几个值的设置
+CHOICES = {
+    "power_mode": ("auto", "normal", "low_power"),
+    "idle_policy": ("resume", "reset"),
+}
+
+
+def in_range(key, value):
+    """数值是否在 RANGES 规定的范围内"""
+    low, high = RANGES.get(key, (None, None))
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+class Settings:
+    """普通的设置对象，属性与 DEFAULTS 的键一一对应"""
+
+    def __init__(self, **values):
+        for key, default in DEFAULTS.items():
+            value = values.get(key, default)
+            setattr(self, key, copy.deepcopy(value) if isinstance(value, (list, dict)) else value)
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in DEFAULTS}
+
+    def __eq__(self, other):
+        return isinstance(other, Settings) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"Settings({self.to_dict()!r})"
+
+
+def _coerce(data):
+    """按默认值的类型和取值范围校验字段，不合法的字段用默认值"""
+    values = {}
+    for key, default in DEFAULTS.items():
+        value = data.get(key, default)
+        if isinstance(default, bool):
+            ok = isinstance(value, bool)
+        elif isinstance(default, (int, float)):
+            ok = isinstance(value, (int, float)) and not isinstance(value, bool) and in_range(key, value)
+        else:
+            ok = isinstance(value, type(default)) and value in CHOICES.get(key, (value,))
+        values[key] = value if ok else default
+    return values
+
+
+def parse(text):
+    """解析设置文件内容，格式或版本不对时抛出 ValueError"""
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("设置文件格式错误")
+    version = data.get("version")
+    if not isinstance(version, int) or version > VERSION or version < 1:
+        raise ValueError(f"不支持的设置文件版本：{version!r}")
+    return Settings(**_coerce(data.get("settings") or {}))
+
+
+def dump(settings):
+    """序列化为设置文件内容"""
+    return json.dumps({"version": VERSION, "settings": settings.to_dict()},
+                      ensure_ascii=False, indent=2, sort_keys=True) + "\n"
+
+
+class SettingsStore(QtCore.QObject):
+    """设置文件的读写和热加载
+
+    valid 表示启动时是否读到了有效的设置文件。
+    """
+
+    # 文件被外部修改并成功解析后发出，参数为新的 Settings
+    changed = QtCore.pyqtSignal(object)
+
+    def __init__(self, parent=None, path=None):
+        super().__init__(parent)
+        self.path = path or os.path.join(data_dir(), FILE_NAME)
+        self.valid = False
+        self.pending = None
+        self.last_text = None  # 最近一次读到或写入的内容，用于忽略自己的写入
+
+        self.write_timer = QtCore.QTimer(self)
+        self.write_timer.setSingleShot(True)
+        self.write_timer.setTimerType(QtCore.Qt.CoarseTimer)
+        self.write_timer.timeout.connect(self.flush)
+
+        # 监听设置文件的内容变化，同时监听所在目录：文件启动时还不存在，或者
+        # 编辑器保存时先删除或改名再写入新文件，文件的监听会失效，目录里出现
+        # 这个文件时重新加入监听并读取。目录中其他文件的增删只多读一次设置文件
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._on_changed)
+        self.watcher.directoryChanged.connect(self._on_directory_changed)
+
+    def load(self):
+        """读取设置文件，文件不存在或无效时返回默认设置"""
+        self._watch()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                text = f.read()
+            settings = parse(text)
+        except (OSError, ValueError):
+            return Settings()
+        self.valid = True
+        self.last_text = text
+        return settings
+
+    def save(self, settings):
+        """稍后写入，短时间内多次保存只写最后一次"""
+        self.pending = Settings(**settings.to_dict())
+        self.write_timer.start(WRITE_DELAY)
+
+    def flush(self):
+        """立即写入待保存的设置：先写临时文件，再原子替换
+
+        写入失败（磁盘满、目录不可写）时保留待保存的设置，稍后重试，返回 False。
+        """
+        self.write_timer.stop()
+        if self.pending is None:
+            return True
+        text = dump(self.pending)
+        if text == self.last_text:
+            self.pending = None
+            return True
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except OSError:
+            self.write_timer.start(RETRY_DELAY)
+            return False
+        self.pending = None
+        self.last_text = text
+        self.valid = True
+        self._watch()
+        return True
+
+    def _watch(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if os.path.isdir(directory) and directory not in self.watcher.directories():
+            self.watcher.addPath(directory)
+        if os.path.exists(self.path) and self.path not in self.watcher.files():
+            self.watcher.addPath(self.path)
+
+    def _on_directory_changed(self, _path):
+        """目录中有文件增删或改名，只关心设置文件是否重新出现"""
+        if os.path.exists(self.path) and self.path not in self.watcher.files():
+            self._on_changed(self.path)
+
+    def _on_changed(self, _path):
+        self._watch()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            return
+        if text == self.last_text:
+            return
+        try:
+            settings = parse(text)
+        except ValueError:
+            return  # 编辑到一半或写错时保留当前设置
+        self.last_text = text
+        self.valid = True
+        self.changed.emit(settings)
+
+    def close(self):
+        """写入尚未保存的设置"""
+        self.flush()
@@ -0,0 +1,209 @@
+"""提醒策略的快进模拟
+
+用模拟时钟驱动 ReminderCore，只在到期和用户响应时推进时间，
+几个月的提醒可以在毫秒级回放完。用于评估不同的提醒/稍后间隔，
+以及在不等待真实时间的情况下回归测试调度逻辑。
+
+    result = simulate(Policy(interval=3600), ProbabilisticResponder(), days=30)
+    print(result.summary())
+"""
+import bisect
+import collections
+import datetime
+import random
+import time
+
+from water_reminder import core
+from water_reminder.events import DRINK, REMINDER_SHOWN, SNOOZE
+
+Policy = collections.namedtuple("Policy", "interval snooze_interval")
+Policy.__new__.__defaults__ = (None,)
+
+
+class SimulatedClock:
+    """可手动推进的模拟时钟，同时提供单调时钟和墙钟"""
+
+    def __init__(self, start_wall=None):
+        self.mono = 0.0
+        self.start_wall = time.time() if start_wall is None else start_wall
+
+    def monotonic(self):
+        """模拟的单调时钟"""
+        return self.mono
+
+    def wall(self):
+        """模拟的墙钟"""
+        return self.start_wall + self.mono
+
+    def advance_to(self, mono):
+        """推进到单调时钟时间 mono"""
+        self.mono = max(self.mono, mono)
+
+    def advance(self, seconds):
+        """向前推进 seconds 秒"""
+        self.mono += seconds
+
+
+class ProbabilisticResponder:
+    """按概率响应提醒的模拟用户
+
+    在 active_hours 内以 drink_probability 的概率喝水，否则点击稍后；
+    响应延迟服从均值为 mean_delay 秒的指数分布。不在活跃时段的提醒
+    要等到下一个活跃时段开始后才会被看到。
+    """
+
+    def __init__(self, drink_probability=0.75, mean_delay=120, active_hours=(9, 18), workdays_only=True):
+        self.drink_probability = drink_probability
+        self.mean_delay = mean_delay
+        self.active_hours = active_hours
+        self.workdays_only = workdays_only
+
+    def next_active(self, wall):
+        """返回不早于 wall 的下一个活跃时刻"""
+        moment = datetime.datetime.fromtimestamp(wall)
+        start, end = self.active_hours
+        while True:
+            workday = moment.weekday() < 5 or not self.workdays_only
+            if workday and start <= moment.hour < end:
+                return moment.timestamp()
+            if workday and moment.hour < start:
+                moment = moment.replace(hour=start, minute=0, second=0, microsecond=0)
+                continue
+            moment = (moment + datetime.timedelta(days=1)).replace(hour=start, minute=0, second=0, microsecond=0)
+
+    def __call__(self, wall, rng):
+        """返回 (DRINK 或 SNOOZE, 响应延迟秒数)"""
+        seen = self.next_active(wall)
+        action = DRINK if rng.random() < self.drink_probability else SNOOZE
+        return action, seen - wall + rng.expovariate(1 / self.mean_delay)
+
+
+class RecordedResponder:
+    """从记录的历史行为中按小时抽样的模拟用户
+
+    rows 为按时间排序的 (时间戳, 类型)，每次提醒之后的第一个喝水或稍后
+    视为对它的响应。模拟时从同一小时的历史响应中随机抽取一条。
+    """
+
+    def __init__(self, rows):
+        self.by_hour = collections.defaultdict(list)
+        self.samples = []
+        reminder_ts = None
+        for ts, kind in rows:
+            if kind == REMINDER_SHOWN:
+                reminder_ts = ts
+            elif kind in (DRINK, SNOOZE) and reminder_ts is not None:
+                sample = (kind, ts - reminder_ts)
+                self.by_hour[datetime.datetime.fromtimestamp(reminder_ts).hour].append(sample)
+                self.samples.append(sample)
+                reminder_ts = None
+        if not self.samples:
+            raise ValueError("历史记录中没有提醒响应")
+
+    @classmethod
+    def from_store(cls, store):
+        """从 EventStore 读取历史"""
+        return cls(store.load_events([REMINDER_SHOWN, DRINK, SNOOZE]))
+
+    def __call__(self, wall, rng):
+        """返回 (DRINK 或 SNOOZE, 响应延迟秒数)"""
+        hour = datetime.datetime.fromtimestamp(wall).hour
+        return rng.choice(self.by_hour.get(hour) or self.samples)
+
+
+class SimulationResult:
+    """一次模拟的结果"""
+
+    def __init__(self, policy, days):
+        self.policy = policy
+        self.days = days
+        self.reminders = []  # 每次提醒的墙钟时间
+        self.drinks = []  # 每次喝水的墙钟时间
+        self.snoozes = 0
+        self.response_delays = []
+        self.wakeups = 0  # 状态机被推进的次数
+
+    def daily_drinks(self):
+        """返回 {日期: 喝水次数}"""
+        result = collections.Counter(datetime.date.fromtimestamp(ts) for ts in self.drinks)
+        return dict(sorted(result.items()))
+
+    def drinks_between(self, start, end):
+        """统计墙钟时间 [start, end) 内的喝水次数"""
+        return bisect.bisect_left(self.drinks, end) - bisect.bisect_left(self.drinks, start)
+
+    def summary(self):
+        """汇总指标"""
+        responses = len(self.drinks) + self.snoozes
+        return {
+            "interval": self.policy.interval,
+            "snooze_interval": self.policy.snooze_interval,
+            "days": self.days,
+            "reminders": len(self.reminders),
+            "drinks": len(self.drinks),
+            "drinks_per_day": len(self.drinks) / self.days if self.days else 0.0,
+            "snooze_ratio": self.snoozes / responses if responses else 0.0,
+            "mean_response": (sum(self.response_delays) / len(self.response_delays)
+                              if self.response_delays else None),
+            "wakeups": self.wakeups,
+        }
+
+
+def simulate(policy, responder, days, start_wall=None, seed=0, visible_steps=None):
+    """用模拟时钟回放 days 天的提醒和用户响应
+
+    visible_steps 为 None 时只在到期和响应时推进；给定格数时同时模拟
+    每一格可见进度的唤醒，用于统计界面的唤醒次数。
+    """
+    rng = random.Random(seed)
+    clock = SimulatedClock(start_wall)
+    reminder = core.ReminderCore(
+        interval=policy.interval,
+        snooze_interval=policy.snooze_interval,
+        steps=visible_steps or 1,
+        clock=clock.monotonic,
+        wall_clock=clock.wall,
+    )
+    result = SimulationResult(policy, days)
+    pending = []  # [(响应的单调时钟时间, 动作, 提醒的墙钟时间)]
+
+    def on_event(event, value):
+        if event == core.DUE:
+            wall = clock.wall()
+            result.reminders.append(wall)
+            action, delay = responder(wall, rng)
+            pending.append((clock.monotonic() + max(delay, 0), action, wall))
+
+    reminder.subscribe(on_event)
+    reminder.start_cycle()
+    end = days * 86400
+
+    while True:
+        wakeup = reminder.next_wakeup(visible=visible_steps is not None)
+        response_at = pending[0][0] if pending else None
+        candidates = [t for t in (wakeup, response_at) if t is not None]
+        if not candidates or min(candidates) > end:
+            break
+        previous = clock.monotonic()
+        clock.advance_to(min(candidates))
+        if pending and clock.monotonic() >= pending[0][0]:
+            _, action, shown_at = pending.pop(0)
+            if action == DRINK:
+                result.drinks.append(clock.wall())
+                result.response_delays.append(clock.wall() - shown_at)
+                reminder.drink()
+            else:
+                result.snoozes += 1
+                reminder.snooze()
+        else:
+            if clock.monotonic() <= previous:
+                # 唤醒时间不在当前时间之后，继续推进只会原地空转
+                raise RuntimeError(f"模拟时钟没有前进：{previous!r}")
+            result.wakeups += 1
+            reminder.advance()
+    return result
+
+
+def evaluate_policies(policies, responder, days, **kwargs):
+    """对多个策略用同一个模拟用户回放，返回每个策略的汇总"""
+    return [simulate(policy, responder, days, **kwargs).summary() for policy in policies]
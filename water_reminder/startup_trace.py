@@ -0,0 +1,51 @@
+"""启动耗时追踪（--trace-startup）"""
+import json
+import os
+import sys
+import time
+
+from water_reminder.paths import data_dir
+
+
+class StartupTrace:
+    """按顺序记录启动各阶段的完成时间"""
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.marks = []
+
+    def mark(self, name):
+        """记录一个阶段在此刻完成"""
+        self.marks.append((name, time.perf_counter()))
+
+    def phases(self):
+        """返回 [(阶段, 本阶段耗时毫秒, 自启动起毫秒)]"""
+        result = []
+        previous = self.start
+        for name, moment in self.marks:
+            result.append((name, (moment - previous) * 1000, (moment - self.start) * 1000))
+            previous = moment
+        return result
+
+    def format(self):
+        """格式化为文本表格"""
+        lines = ["启动耗时："]
+        for name, duration, total in self.phases():
+            lines.append(f"  {name:<12}{duration:>9.1f} ms{total:>11.1f} ms")
+        return "\n".join(lines)
+
+    def to_json(self):
+        """格式化为 JSON"""
+        return json.dumps([
+            {"phase": name, "ms": round(duration, 3), "total_ms": round(total, 3)}
+            for name, duration, total in self.phases()
+        ], ensure_ascii=False)
+
+    def report(self, stream=None):
+        """输出报告；打包成无控制台程序时 stderr 不可用，改写到数据目录"""
+        stream = stream or sys.stderr
+        if stream is not None:
+            print(self.format(), file=stream, flush=True)
+            return
+        with open(os.path.join(data_dir(), "startup-trace.txt"), "a", encoding="utf-8") as f:
+            print(self.format(), file=f)
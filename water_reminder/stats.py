@@ -0,0 +1,201 @@
+"""喝水统计
+
+在事件日志之上维护每日、每周汇总和 7×24 小时热力图。运行期间每条事件
+增量更新汇总；从历史重建时如果安装了 NumPy 则整体向量化计算，
+否则逐条回放。
+"""
+import datetime
+import time
+
+try:
+    import numpy
+except ImportError:  # NumPy 是可选依赖
+    numpy = None
+
+from water_reminder import events
+
+KIND_CODES = {events.DRINK: 1, events.SNOOZE: 2, events.REMINDER_SHOWN: 3}
+# 每日/每周汇总中各类型所在的列：[喝水, 稍后, 提醒]
+COLUMNS = {events.DRINK: 0, events.SNOOZE: 1, events.REMINDER_SHOWN: 2}
+
+
+def local_hours(ts, midnights, day_index):
+    """每个时间戳的本地小时，与 datetime.fromtimestamp(ts).hour 一致
+
+    本地小时 = (时间戳 + 该时刻的 UTC 偏移) 在一天内的秒数 // 3600。偏移按每日
+    零点查表；当天零点和次日零点偏移不同（夏令时切换日）时，当天的事件
+    逐条取各自的偏移。
+    """
+    offsets = numpy.array([time.localtime(midnight).tm_gmtoff for midnight in midnights])
+    event_offsets = offsets[day_index]
+    for index in numpy.nonzero(offsets[day_index] != offsets[day_index + 1])[0]:
+        event_offsets[index] = time.localtime(ts[index]).tm_gmtoff
+    return (((ts + event_offsets) % 86400) // 3600).astype(numpy.int64)
+
+
+class HydrationStats:
+    """按事件增量更新的喝水统计"""
+
+    KINDS = tuple(KIND_CODES)
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """清空所有汇总"""
+        # 日期序号 -> [喝水, 稍后, 提醒]
+        self.daily = {}
+        # (ISO 年, ISO 周) -> [喝水, 稍后, 提醒]
+        self.weekly = {}
+        # 星期(0=周一) × 小时 的喝水次数
+        self.heatmap = [[0] * 24 for _ in range(7)]
+        self.drinks = 0
+        self.snoozes = 0
+        self.response_total = 0.0
+        self.response_count = 0
+        self.current_streak = 0
+        self.longest_streak = 0
+        self.last_drink_day = None
+        self.last_kind = None
+        self.last_ts = None
+
+    def add(self, ts, kind):
+        """增量加入一条事件"""
+        column = COLUMNS.get(kind)
+        if column is None:
+            return
+        local = datetime.datetime.fromtimestamp(ts)
+        date = local.date()
+        day = date.toordinal()
+        self.daily.setdefault(day, [0, 0, 0])[column] += 1
+        self.weekly.setdefault(date.isocalendar()[:2], [0, 0, 0])[column] += 1
+
+        if kind == events.DRINK:
+            self.drinks += 1
+            self.heatmap[date.weekday()][local.hour] += 1
+            if self.last_kind == events.REMINDER_SHOWN:
+                self.response_total += ts - self.last_ts
+                self.response_count += 1
+            self._add_drink_day(day)
+        elif kind == events.SNOOZE:
+            self.snoozes += 1
+
+        self.last_kind = kind
+        self.last_ts = ts
+
+    def _add_drink_day(self, day):
+        """更新连续喝水天数"""
+        if self.last_drink_day == day:
+            return
+        if self.last_drink_day is not None and day == self.last_drink_day + 1:
+            self.current_streak += 1
+        else:
+            self.current_streak = 1
+        self.last_drink_day = day
+        self.longest_streak = max(self.longest_streak, self.current_streak)
+
+    def rebuild(self, rows):
+        """从按时间排序的 (时间戳, 类型) 历史重建全部汇总"""
+        self.clear()
+        rows = [row for row in rows if row[1] in KIND_CODES]
+        if numpy is None or not rows:
+            for ts, kind in rows:
+                self.add(ts, kind)
+            return
+        self._rebuild_vectorized(rows)
+
+    def _rebuild_vectorized(self, rows):
+        """使用 NumPy 向量化重建"""
+        ts = numpy.fromiter((row[0] for row in rows), dtype=numpy.float64, count=len(rows))
+        kinds = numpy.fromiter((KIND_CODES[row[1]] for row in rows), dtype=numpy.int8, count=len(rows))
+
+        # 生成覆盖历史范围的每日本地零点，按零点二分查找得到日期
+        first = datetime.date.fromtimestamp(ts[0])
+        last = datetime.date.fromtimestamp(ts[-1])
+        dates = [first + datetime.timedelta(days=i) for i in range((last - first).days + 2)]
+        midnights = numpy.array([time.mktime(d.timetuple()) for d in dates])
+        day_index = numpy.searchsorted(midnights, ts, side='right') - 1
+        hours = local_hours(ts, midnights, day_index)
+        weekdays = numpy.array([d.weekday() for d in dates], dtype=numpy.int64)[day_index]
+
+        counts = numpy.zeros((len(dates), 3), dtype=numpy.int64)
+        for column, code in enumerate((1, 2, 3)):
+            mask = kinds == code
+            counts[:, column] = numpy.bincount(day_index[mask], minlength=len(dates))
+
+        base = first.toordinal()
+        for index in numpy.nonzero(counts.any(axis=1))[0]:
+            date = dates[index]
+            row = [int(value) for value in counts[index]]
+            self.daily[base + int(index)] = row
+            week = self.weekly.setdefault(date.isocalendar()[:2], [0, 0, 0])
+            for column in range(3):
+                week[column] += row[column]
+
+        drink_mask = kinds == 1
+        heatmap = numpy.zeros(7 * 24, dtype=numpy.int64)
+        numpy.add.at(heatmap, weekdays[drink_mask] * 24 + hours[drink_mask], 1)
+        self.heatmap = heatmap.reshape(7, 24).tolist()
+
+        self.drinks = int(drink_mask.sum())
+        self.snoozes = int((kinds == 2).sum())
+
+        # 提醒后紧接着的喝水视为对该提醒的响应
+        responded = (kinds[1:] == 1) & (kinds[:-1] == 3)
+        delays = (ts[1:] - ts[:-1])[responded]
+        self.response_total = float(delays.sum())
+        self.response_count = int(delays.size)
+
+        drink_days = numpy.nonzero(counts[:, 0])[0]
+        if drink_days.size:
+            # 按连续日期分段，求每段长度
+            breaks = numpy.nonzero(numpy.diff(drink_days) != 1)[0]
+            starts = numpy.concatenate(([0], breaks + 1))
+            ends = numpy.concatenate((breaks + 1, [drink_days.size]))
+            self.longest_streak = int((ends - starts).max())
+            self.current_streak = int(ends[-1] - starts[-1])
+            self.last_drink_day = base + int(drink_days[-1])
+
+        self.last_kind = {1: events.DRINK, 2: events.SNOOZE, 3: events.REMINDER_SHOWN}[int(kinds[-1])]
+        self.last_ts = float(ts[-1])
+
+    def day_totals(self, date=None):
+        """返回某天的 (喝水, 稍后, 提醒) 次数"""
+        if date is None:
+            date = datetime.date.today()
+        return tuple(self.daily.get(date.toordinal(), (0, 0, 0)))
+
+    def recent_days(self, count, today=None):
+        """返回最近 count 天的 [(日期, 喝水, 稍后, 提醒)]，最新的在前"""
+        if today is None:
+            today = datetime.date.today()
+        result = []
+        for offset in range(count):
+            date = today - datetime.timedelta(days=offset)
+            result.append((date,) + tuple(self.daily.get(date.toordinal(), (0, 0, 0))))
+        return result
+
+    def week_totals(self, date=None):
+        """返回某天所在 ISO 周的 (喝水, 稍后, 提醒) 次数"""
+        if date is None:
+            date = datetime.date.today()
+        return tuple(self.weekly.get(date.isocalendar()[:2], (0, 0, 0)))
+
+    def snooze_ratio(self):
+        """稍后次数占全部提醒响应的比例"""
+        total = self.drinks + self.snoozes
+        return self.snoozes / total if total else 0.0
+
+    def mean_response(self):
+        """从提醒到喝水的平均响应时间（秒），没有数据时返回 None"""
+        if not self.response_count:
+            return None
+        return self.response_total / self.response_count
+
+    def streak(self, today=None):
+        """截止今天（或昨天）仍在持续的连续喝水天数"""
+        if today is None:
+            today = datetime.date.today()
+        if self.last_drink_day is None or today.toordinal() - self.last_drink_day > 1:
+            return 0
+        return self.current_streak
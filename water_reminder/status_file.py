@@ -0,0 +1,263 @@
+"""内存映射的状态文件
+
+状态栏插件（polybar、waybar、tmux）和监控脚本每秒都要读进度、今日次数
+和下一次提醒时间，走命令通道每次都要一次套接字往返。运行中的实例把这些
+状态写成 $XDG_RUNTIME_DIR/water-reminder/ 下一个固定布局的小二进制
+记录，读取方映射同一个文件，读一页内存即可，不需要和进程通信。只在
+状态变化时写入；进度在两次写入之间由读取方按下一次提醒时间线性推算。
+
+布局（小端）：
+
+    头部  magic "WRST"、版本 u16、头部加记录的长度 u16、序号 u32
+    记录  pid u32、标志 u32、写入时间 f64、周期开始时间 f64、
+          下一次提醒时间 f64、写入时的进度 f32（0-1）、今日次数 u32、
+          提醒间隔 u32、提醒级别 u8（0 表示没有在提醒），3 字节保留
+
+时间都是 Unix 时间戳，没有时为 NaN。以后只在记录末尾追加字段并增大
+长度，不兼容的修改才增加版本号。序号是顺序锁：写入前加一变成奇数，
+写完再加一变回偶数；读取方在序号为偶数且读取前后不变时才采用读到的
+内容。
+
+命令行读取（不导入 Qt）：
+
+    python -m water_reminder.status_file                  💧 3  45%  14:30
+    python -m water_reminder.status_file --json
+    python -m water_reminder.status_file --format "{percent}% {count}"
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+
+from water_reminder.paths import runtime_dir, session_id
+
+MAGIC = b"WRST"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+RECORD = struct.Struct("<IIdddfIIB3x")
+SIZE = HEADER.size + RECORD.size
+SEQ_OFFSET = 8  # 头部中序号的位置
+
+# 标志位
+RUNNING = 1 << 0  # 实例在运行（正常退出时清除）
+DUE = 1 << 1  # 本周期已到期
+PAUSED = 1 << 2  # 周期暂停（离开、锁屏或免打扰）
+QUIET = 1 << 3  # 免打扰时段
+FULLSCREEN = 1 << 4  # 其他程序全屏
+DEFERRED = 1 << 5  # 有推迟到免打扰或全屏结束后的提醒
+FLAG_NAMES = (
+    (RUNNING, "running"), (DUE, "due"), (PAUSED, "paused"),
+    (QUIET, "quiet"), (FULLSCREEN, "fullscreen"), (DEFERRED, "deferred"),
+)
+# 提醒级别，与 notify.SINK_NAMES 一致，记录中存序号加一
+TIERS = ("tray", "desktop", "toast", "fullscreen")
+
+# 读取时遇到正在写入的次数上限
+READ_RETRIES = 100
+
+
+def status_path():
+    """当前用户会话的状态文件路径"""
+    session = "".join(char if char.isalnum() else "_" for char in session_id())
+    return os.path.join(runtime_dir(), f"status-{session}" if session else "status")
+
+
+def _time(value):
+    return float("nan") if value is None else float(value)
+
+
+# 周期起点由墙钟和单调时钟换算、下一次提醒时间由当前时间加剩余时间得出，
+# 每次计算都有微小差别，相差不到这么多（秒）时视为相同
+TIME_TOLERANCE = 1.0
+
+
+def _same_time(a, b):
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return abs(a - b) < TIME_TOLERANCE
+
+
+def _unchanged(values, last):
+    """除进度外的字段是否与上次写入的相同"""
+    return (
+        last is not None
+        and values[:2] == last[:2] and values[5:] == last[5:]
+        and _same_time(values[2], last[2]) and _same_time(values[3], last[3])
+    )
+
+
+class StatusWriter:
+    """写入状态文件的一方（运行中的实例）"""
+
+    def __init__(self, path=None):
+        self.path = path or status_path()
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            os.ftruncate(fd, SIZE)
+            self.map = mmap.mmap(fd, SIZE)
+        finally:
+            os.close(fd)
+        magic, version, size, seq = HEADER.unpack_from(self.map)
+        # 沿用上次运行留下的序号，正在读取的一方不会把新旧内容混在一起
+        self.seq = seq + (seq & 1) if (magic, version) == (MAGIC, VERSION) else 0
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, SIZE, self.seq)
+        self.last = None
+
+    def publish(self, flags=0, cycle_start=None, deadline=None, progress=0.0, count=0, interval=0, tier=None):
+        """写入一份状态，除进度外都与上次相同时不写，返回是否写入
+
+        进度由读取方推算，只作为快照随其他字段的变化一起写入。
+        """
+        values = (
+            os.getpid(), flags | RUNNING, _time(cycle_start), _time(deadline), round(progress, 4),
+            count, int(interval), TIERS.index(tier) + 1 if tier in TIERS else 0,
+        )
+        if self.map is None or _unchanged(values, self.last):
+            return False
+        self.last = values
+        self._write(values)
+        return True
+
+    def _write(self, values):
+        pid, flags, cycle_start, deadline, progress, count, interval, tier = values
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        struct.pack_into("<I", self.map, SEQ_OFFSET, self.seq)
+        RECORD.pack_into(self.map, HEADER.size, pid, flags, time.time(), cycle_start, deadline,
+                         progress, count, interval, tier)
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        struct.pack_into("<I", self.map, SEQ_OFFSET, self.seq)
+
+    def close(self):
+        """清除运行标志，文件保留，读取方可以一直映射着它"""
+        if self.map is None:
+            return
+        if self.last is not None:
+            self._write((self.last[0], 0) + self.last[2:])
+        self.map.close()
+        self.map = None
+
+
+class StatusReader:
+    """读取状态文件的一方，可以长期持有，每次 read() 只读一次映射"""
+
+    def __init__(self, path=None):
+        self.path = path or status_path()
+        self.map = None
+
+    def _open(self):
+        with open(self.path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < SIZE:
+            self.close()
+            raise ValueError("状态文件长度不对")
+
+    def read_raw(self):
+        """按顺序锁读一份记录，返回各字段的元组；文件不存在时抛出 OSError，格式不对时抛出 ValueError"""
+        if self.map is None:
+            self._open()
+        for _ in range(READ_RETRIES):
+            magic, version, size, seq = HEADER.unpack_from(self.map)
+            if magic != MAGIC or version != VERSION or size < SIZE:
+                raise ValueError(f"不支持的状态文件：{magic!r} 版本 {version}")
+            if seq & 1:
+                time.sleep(0)
+                continue
+            record = RECORD.unpack(self.map[HEADER.size:SIZE])
+            if struct.unpack_from("<I", self.map, SEQ_OFFSET)[0] == seq:
+                return record
+        raise ValueError("状态文件一直在写入")
+
+    def read(self, now=None):
+        """读取并解码为 dict，进度推算到 now；实例没有运行时 running 为 False"""
+        pid, flags, updated, cycle_start, deadline, progress, count, interval, tier = self.read_raw()
+        now = time.time() if now is None else now
+        running = bool(flags & RUNNING) and _alive(pid)
+        if running and not flags & (DUE | PAUSED) and math.isfinite(deadline) and deadline > updated:
+            progress += (1.0 - progress) * min(max(now - updated, 0.0) / (deadline - updated), 1.0)
+        status = {name: bool(flags & flag) for flag, name in FLAG_NAMES}
+        status.update(
+            running=running,
+            pid=pid,
+            progress=round(progress, 4),
+            count=count,
+            interval=interval,
+            cycle_start=cycle_start if math.isfinite(cycle_start) else None,
+            next_deadline=deadline if math.isfinite(deadline) else None,
+            remaining=round(max(deadline - now, 0.0), 1) if math.isfinite(deadline) else None,
+            reminder=TIERS[tier - 1] if 0 < tier <= len(TIERS) else None,
+            updated=updated,
+        )
+        return status
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+
+def _alive(pid):
+    """pid 对应的进程是否还在（实例异常退出时运行标志不会被清除）"""
+    if not pid or sys.platform == "win32":
+        return bool(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def format_status(status, template=None):
+    """格式化为一行文字，template 中可以使用 status 的键和 percent、next"""
+    if not status["running"]:
+        return "💧 未运行"
+    deadline = status["next_deadline"]
+    values = dict(
+        status,
+        percent=int(status["progress"] * 100),
+        next=time.strftime("%H:%M", time.localtime(deadline)) if deadline else "--:--",
+    )
+    if template is None:
+        template = "💧 {count}  提醒中" if status["reminder"] or status["due"] else "💧 {count}  {percent}%  {next}"
+    return template.format(**values)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="读取喝水提醒小助手的状态文件")
+    parser.add_argument("--path", help="状态文件路径（默认为当前会话的状态文件）")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--json", action="store_true", help="输出 JSON")
+    output.add_argument("--format", metavar="TEMPLATE",
+                        help="输出格式，例如 \"{percent}%% {count}\"，可用的键见 --json 的输出和 percent、next")
+    args = parser.parse_args(argv)
+
+    reader = StatusReader(args.path)
+    try:
+        status = reader.read()
+    except FileNotFoundError:
+        status = None
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        reader.close()
+    if args.json:
+        print(json.dumps(status or {"running": False}, ensure_ascii=False))
+    elif status is None:
+        print(format_status({"running": False}))
+    else:
+        try:
+            print(format_status(status, args.format))
+        except (KeyError, ValueError) as e:
+            print(f"输出格式错误：{e}", file=sys.stderr)
+            return 1
+    return 0 if status is not None and status["running"] else 3
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""应用级主题
+
+所有控件样式集中在一份样式表里，启动时解析并安装到 QApplication 一次。
+运行时的变化（触摸尺寸）通过动态属性选择规则，不再重新生成和解析样式表。
+进度浮层是自绘的，不经过样式表，颜色由 strip_colors() 提供。
+"""
+from PyQt5 import QtWidgets, QtGui
+
+FONT_FAMILY = "'Microsoft YaHei', Arial"
+
+# 进度条渐变的起止颜色
+ACCENT = '#2196F3'
+ACCENT_END = '#00BCD4'
+
+# 进度条底色透明度分为 10 档，对应设置中 0.1 - 1.0 的步长，只在档位变化时重绘
+OPACITY_LEVELS = 10
+
+LIGHT = {
+    'dialog_bg': '#f5f5f5',
+    'text': '#333333',
+    'hint_text': '#666666',
+    'hint_bg': '#e3f2fd',
+    'input_bg': 'white',
+    'input_border': '#e0e0e0',
+    'reminder_bg': 'white',
+    'trough': '255, 255, 255',
+}
+
+DARK = {
+    'dialog_bg': '#2b2b2b',
+    'text': '#e0e0e0',
+    'hint_text': '#bdbdbd',
+    'hint_bg': '#1e3a50',
+    'input_bg': '#3c3c3c',
+    'input_border': '#555555',
+    'reminder_bg': '#2b2b2b',
+    'trough': '43, 43, 43',
+}
+
+BASE_RULES = """
+QDialog#optionsDialog {
+    background-color: %(dialog_bg)s;
+    border-radius: 10px;
+}
+QDialog#optionsDialog QLabel {
+    color: %(text)s;
+    font-size: 15px;
+    font-family: %(font)s;
+    margin-top: 10px;
+}
+QDialog#optionsDialog QSpinBox,
+QDialog#optionsDialog QDoubleSpinBox,
+QDialog#optionsDialog QLineEdit {
+    padding: 10px;
+    border: 2px solid %(input_border)s;
+    border-radius: 6px;
+    background: %(input_bg)s;
+    color: %(text)s;
+    font-size: 14px;
+    min-height: 25px;
+    min-width: 200px;
+}
+QDialog#optionsDialog QSpinBox:focus,
+QDialog#optionsDialog QDoubleSpinBox:focus,
+QDialog#optionsDialog QLineEdit:focus {
+    border-color: #2196F3;
+}
+QDialog#optionsDialog[touch="true"] QSpinBox,
+QDialog#optionsDialog[touch="true"] QDoubleSpinBox,
+QDialog#optionsDialog[touch="true"] QLineEdit {
+    min-height: 40px;
+}
+QDialog#optionsDialog QLabel#titleLabel {
+    font-size: 24px;
+    font-weight: bold;
+    color: #2196F3;
+}
+QDialog#optionsDialog QFrame#separator {
+    background-color: %(input_border)s;
+    min-height: 2px;
+}
+QDialog#optionsDialog QLabel#helpText {
+    color: %(hint_text)s;
+    font-size: 13px;
+    padding: 15px;
+    background-color: %(hint_bg)s;
+    border-radius: 8px;
+}
+QPushButton#saveButton {
+    background-color: #2196F3;
+    color: white;
+    border: none;
+    border-radius: 8px;
+    padding: 12px;
+    font-size: 16px;
+    font-weight: bold;
+}
+QPushButton#saveButton:hover {
+    background-color: #1976D2;
+}
+QPushButton#saveButton:pressed {
+    background-color: #1565C0;
+}
+
+QDialog#reminderWindow {
+    background-color: rgba(200, 220, 255, 0.1);
+}
+QLabel#reminderLabel {
+    font-size: 72px;
+    color: #2196F3;
+    font-weight: bold;
+    font-family: %(font)s;
+    background-color: %(reminder_bg)s;
+    padding: 40px 80px;
+    border-radius: 40px;
+}
+QPushButton#drinkButton, QPushButton#snoozeButton {
+    color: white;
+    border: none;
+    border-radius: 40px;
+    padding: 25px 60px;
+    font-size: 28px;
+    font-weight: bold;
+    font-family: %(font)s;
+}
+QPushButton#drinkButton:pressed, QPushButton#snoozeButton:pressed {
+    padding: 28px 60px 22px 60px;
+}
+QPushButton#drinkButton {
+    background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #4CAF50, stop:1 #45A049);
+}
+QPushButton#drinkButton:hover {
+    background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #45A049, stop:1 #388E3C);
+}
+QPushButton#drinkButton:pressed {
+    background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #388E3C, stop:1 #2E7D32);
+}
+QPushButton#snoozeButton {
+    background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #FF5252, stop:1 #F44336);
+}
+QPushButton#snoozeButton:hover {
+    background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #F44336, stop:1 #D32F2F);
+}
+QPushButton#snoozeButton:pressed {
+    background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #D32F2F, stop:1 #B71C1C);
+}
+
+QFrame#reminderToast {
+    background-color: %(reminder_bg)s;
+    border: 1px solid %(input_border)s;
+}
+QLabel#toastLabel {
+    color: #2196F3;
+    font-size: 18px;
+    font-weight: bold;
+    font-family: %(font)s;
+}
+QPushButton#toastDrinkButton, QPushButton#toastSnoozeButton {
+    color: white;
+    border: none;
+    border-radius: 6px;
+    padding: 6px 18px;
+    font-size: 14px;
+    font-family: %(font)s;
+}
+QPushButton#toastDrinkButton {
+    background-color: #4CAF50;
+}
+QPushButton#toastSnoozeButton {
+    background-color: #F44336;
+}
+"""
+
+def is_dark_palette(palette=None):
+    """根据窗口底色亮度判断当前是否为深色模式"""
+    if palette is None:
+        palette = QtWidgets.QApplication.palette()
+    return palette.color(QtGui.QPalette.Window).lightness() < 128
+
+
+def compile_stylesheet(dark=False):
+    """生成完整的应用级样式表，每种深浅色模式只需生成一次"""
+    return BASE_RULES % dict(DARK if dark else LIGHT, font=FONT_FAMILY)
+
+
+def install(app, dark=None):
+    """将样式表安装到应用程序，重复调用时不会重新解析"""
+    if dark is None:
+        dark = is_dark_palette(app.palette())
+    if app.property('waterTheme') == ('dark' if dark else 'light'):
+        return
+    app.setProperty('waterTheme', 'dark' if dark else 'light')
+    app.setStyleSheet(compile_stylesheet(dark))
+
+
+def opacity_level(opacity):
+    """将 0.1 - 1.0 的透明度换算为进度条底色的档位"""
+    return min(max(int(round(opacity * OPACITY_LEVELS)), 1), OPACITY_LEVELS)
+
+
+def strip_colors(dark=False):
+    """自绘进度浮层使用的颜色"""
+    colors = DARK if dark else LIGHT
+    trough = QtGui.QColor(*(int(part) for part in colors['trough'].split(',')))
+    label_bg = QtGui.QColor(trough)
+    label_bg.setAlphaF(0.85)
+    return {
+        'trough': trough,
+        'label_bg': label_bg,
+        'accent': QtGui.QColor(ACCENT),
+        'accent_end': QtGui.QColor(ACCENT_END),
+    }
@@ -1,7 +1,23 @@
 import sys
+import time
+
+STARTUP_BEGIN = time.perf_counter()  # 用于 --trace-startup 统计导入耗时
+
+import argparse
 from PyQt5 import QtWidgets, QtGui, QtCore
-import winreg  # 添加到文件顶部的导入语句中
 import os
+import sqlite3
+
+from water_reminder import (
+    autostart, core, events, foreground, icons, idle, instance, kiosk, notify, overlay, power, rules, settings,
+    status_file, theme
+)
+from water_reminder.history_view import HistoryDialog
+from water_reminder.progress import ProgressEngine
+from water_reminder.reminder_window import ReminderWindow
+from water_reminder.scheduler import WallClockScheduler, next_local_midnight
+from water_reminder.startup_trace import StartupTrace
+from water_reminder.stats import HydrationStats
 
 def get_resource_path(relative_path):
     """获取资源文件的绝对路径"""
@@ -14,98 +30,251 @@ def get_resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 class WaterReminderApp(QtWidgets.QWidget):
-    def __init__(self):
+    # 提醒显示延迟钩子：从定时器触发到提醒窗口第一帧的毫秒数
+    reminder_shown = QtCore.pyqtSignal(float)
+
+    def __init__(self, trace=None, metrics=None, run_mode=None):
         super().__init__()
         self.setWindowTitle("喝水提醒小助手")
-        
-        # 初始化开机自启动相关的属性
-        self.startup_reg_path = r"Software\Microsoft\Windows\CurrentVersion\Run"
-        self.app_name = "WaterReminder"
-        self.app_path = sys.argv[0]
-        
-        # 获取当前屏幕，支持多屏和平板
-        screen = QtWidgets.QApplication.primaryScreen()
-        screen_geometry = screen.geometry()
-        available_geometry = screen.availableGeometry()
-        self.screen_width = screen_geometry.width()
-        self.screen_height = screen_geometry.height()
-        
-        # 计算任务栏高度，如果是平板可能没有任务栏
-        taskbar_height = max(screen_geometry.height() - available_geometry.height(), 0)
-        
-        # 设置窗口位置，考虑平板屏幕
-        self.setGeometry(
-            0,  
-            self.screen_height - taskbar_height - 60,  # 增加高度以适应触摸
-            self.screen_width,  
-            60  # 增加高度以适应触摸
-        )
-        
-        # 修改窗口属性以支持触摸
-        self.setWindowFlags(
-            QtCore.Qt.FramelessWindowHint |
-            QtCore.Qt.WindowStaysOnTopHint |
-            QtCore.Qt.Tool
-        )
-        self.setAttribute(QtCore.Qt.WA_TranslucentBackground)
-        
-        # 只在非触摸设备上启用鼠标穿透
-        if not self.is_touch_device():
-            self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
-        
-        # 初始化托盘图标
+        self.trace = trace
+        self.metrics = metrics
+        self.run_mode = run_mode or kiosk.RunMode()
+        
+        # 开机自启动：后端按平台延迟加载，读写都在后台线程
+        self.autostart = autostart.AutostartManager(self)
+        self.autostart.state_changed.connect(self.on_autostart_state)
+        self.autostart.failed.connect(self.on_autostart_failed)
+        self.autostart_toggled = False  # 最近一次操作是否由用户切换触发
+        self.dialogs = {}  # 打开中的临时窗口，关闭时销毁并移除
+        
+        # 初始化托盘图标，图标只解码一次，托盘、设置面板和提醒窗口共用缩放缓存
         self.icon_path = get_resource_path("喝水提醒小助手.ico")
+        self.pixmaps = icons.PixmapCache(self.icon_path, self)
+        self.app_icon = self.pixmaps.icon()
         self.setup_tray_icon()
         
-        # 初始化喝水计数器和计时器
-        self.water_count = 0
-        self.progress_value = 0
-        self.timer = QtCore.QTimer(self)
-        self.timer.timeout.connect(self.update_progress)
-        self.reminder_interval = 10800  # 3小时 = 3 * 60 * 60 秒
-        self.timer.start(100)  # 每0.1秒更新一次进度条
-        
-        # 美化进度条
-        self.progress_bar = QtWidgets.QProgressBar(self)
-        self.progress_bar.setGeometry(10, 5, screen_geometry.width() - 170, 30)  # 调整进度条宽度
-        self.progress_bar.setTextVisible(False)  # 隐藏进度条文字
-        self.update_progress_bar_style(0.5)
-        
-        # 美化计数器标签
-        self.counter_label = QtWidgets.QLabel(self)
-        self.counter_label.setGeometry(screen_geometry.width() - 150, 5, 140, 30)  # 增加宽度到140，左移20像素
-        self.counter_label.setStyleSheet("""
-            QLabel {
-                color: #2196F3;
-                background-color: rgba(255, 255, 255, 0.85);
-                border-radius: 15px;
-                padding: 0 15px;
-                font-size: 14px;
-                font-weight: bold;
-                font-family: 'Microsoft YaHei', Arial;
-            }
-        """)
+        # 打开事件日志，恢复今日喝水次数
+        try:
+            self.event_store = events.EventStore()
+        except (OSError, sqlite3.Error):
+            self.event_store = None  # 数据目录不可用时只在内存中计数
+        self.flush_timer = QtCore.QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setTimerType(QtCore.Qt.VeryCoarseTimer)
+        self.flush_timer.timeout.connect(self.flush_events)
+        self.stats = None  # 首次打开统计面板时从历史重建，之后增量更新
+        
+        # 设置只在启动时读取一次，对话框和托盘菜单只读写 self.settings；
+        # stored_settings 是设置文件中的设置，self.settings 在它上面叠加命令行和环境变量覆盖的值
+        self.settings_store = settings.SettingsStore(self)
+        self.stored_settings = self.settings_store.load()
+        self.settings = self.run_mode.apply(self.stored_settings)
+        self.settings_store.changed.connect(self.on_settings_file_changed)
+        
+        # 提醒状态机：间隔、进度、稍后、计数和跨天重置，界面只订阅它的事件
+        self.core = core.ReminderCore(interval=self.settings.interval)
+        self.core.water_count = self.today_drinks()
+        
+        # 每个屏幕底部一个自绘浮层，共用同一份进度和计数；只在非触摸设备上启用鼠标穿透
+        self.overlays = overlay.OverlayManager(
+            self,
+            disabled=self.settings.disabled_screens,
+            thin=self.settings.thin_bar,
+            click_through=not self.is_touch_device()
+        )
+        self.overlays.first_painted.connect(self.on_first_paint)
+        self.update_progress_bar_style(self.settings.progress_opacity)
         self.update_counter_display()
         
-        # 设置午夜重置计时器
-        self.reset_timer = QtCore.QTimer(self)
-        self.reset_timer.timeout.connect(self.check_midnight_reset)
-        self.reset_timer.start(60000)  # 每分钟检查一次
-        
-        # 显示选项面板
-        self.show_options()
-        self.show()
+        # 电源状态：电池供电时切换到节能配置
+        self.power = power.PowerMonitor(self, mode=self.settings.power_mode)
+        self.power.profile_changed.connect(self.apply_power_profile)
+        
+        # 提醒先用托盘气泡、桌面通知等便宜的方式，被忽略时才逐级升级到全屏提醒窗口；
+        # 第一级用到的窗口在首次绘制之后空闲时构建，之后重复使用
+        self.reminder_window = None
+        self.escalator = notify.Escalator([
+            notify.TraySink(self.tray_icon, self),
+            notify.DesktopSink(self, icon=self.icon_path),
+            notify.ToastSink(self),
+            notify.FullScreenSink(self.build_reminder_window, self),
+        ], self.settings.escalation, self)
+        self.escalator.drink_clicked.connect(self.drink_water)
+        self.escalator.snooze_clicked.connect(self.no_drink)
+        self.escalator.escalated.connect(self.publish_status)
+        # 离开/锁屏检测和全屏程序检测在首次绘制之后启动
+        self.idle = None
+        self.foreground = None
+        self.status_writer = None
+        
+        # 进度引擎：按截止时间计算进度，只在进度条可见变化时唤醒
+        self.core.steps = self.power.settings()["steps"]
+        self.progress_engine = ProgressEngine(self.core, self)
+        self.progress_engine.set_timer_type(self.power.settings()["timer_type"])
+        self.progress_engine.progress_changed.connect(self.update_progress)
+        self.progress_engine.due.connect(self.show_reminder)
+        
+        # 墙钟调度器：跨天和提醒到期各布置一次单次定时，唤醒或调整时钟后重新计算
+        self.scheduler = WallClockScheduler(self)
+        self.scheduler.clock_changed.connect(self.progress_engine.refresh)
+        self.scheduler.clock_changed.connect(self.publish_status)
+        self.scheduler.add("reminder", self.next_reminder_time, self.progress_engine.refresh)
+        self.scheduler.add("midnight", next_local_midnight, self.core.check_day)
+        self.core.subscribe(self.on_core_event)
+        
+        # 提醒时段规则：只在时段变化时唤醒一次，免打扰时段内周期暂停
+        self.schedule = self.load_schedule(self.settings.schedule)
+        self.reminder_deferred = False  # 免打扰或其他程序全屏时已到期，结束后再提醒
+        self.scheduler.clock_changed.connect(self.refresh_schedule)
+        self.scheduler.add("schedule", self.schedule.next_transition, self.apply_schedule)
+        self.apply_schedule()
+        if self.metrics is not None:
+            self.progress_engine.fired_late.connect(lambda seconds: self.metrics.timer_late("tick", seconds))
+            self.scheduler.fired_late.connect(self.metrics.timer_late)
+            self.reminder_shown.connect(self.metrics.reminder_shown)
+        # 状态文件：状态栏插件和脚本映射读取，不经过命令通道；只在状态变化时写入
+        try:
+            self.status_writer = status_file.StatusWriter()
+        except OSError:
+            self.status_writer = None
+        self.resume_cycle()
+        
+        # 先显示进度条，设置面板等首次绘制完成后再打开；不显示进度条时直接进入延迟初始化
+        if self.run_mode.overlay:
+            self.overlays.show()
+        else:
+            QtCore.QTimer.singleShot(0, self.finish_startup)
+        if self.trace is not None:
+            self.trace.mark("构建窗口")
+
+    def load_schedule(self, data):
+        """解析设置中的提醒时段规则，格式错误时不使用规则"""
+        try:
+            return rules.Schedule(data)
+        except ValueError as error:
+            print(f"提醒时段规则无效，不使用规则：{error}", file=sys.stderr)
+            return rules.Schedule()
+
+    def apply_schedule(self):
+        """进入新时段：切换提醒间隔，免打扰时段开始或结束时暂停或继续周期"""
+        segment = self.schedule.segment_at(time.time())
+        # 时段的间隔从下一个周期开始生效
+        self.core.interval = segment.interval or self.settings.interval
+        quiet = "quiet" in self.core.pause_reasons
+        if segment.quiet and not quiet:
+            if self.core.is_due():
+                self.escalator.stop()
+                self.reminder_deferred = True
+            self.core.pause(reason="quiet")
+        elif quiet and not segment.quiet:
+            self.core.resume(reason="quiet")
+            self.show_deferred_reminder()
+        self.publish_status()
+
+    def refresh_schedule(self):
+        """时区或时钟变化后按新的本地时间重新展开规则"""
+        if not self.schedule.is_empty():
+            self.schedule.compile(time.time())
+        self.apply_schedule()
+        self.scheduler.update("schedule")
+
+    def on_first_paint(self):
+        """任意屏幕的进度条第一次绘制完成"""
+        if self.trace is not None:
+            self.trace.mark("首次绘制")
+        QtCore.QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        """首次绘制之后再做的初始化：提醒窗口、离开检测和设置面板"""
+        self.escalator.prepare()
+        self.apply_power_profile()
+        self.start_idle_monitor()
+        self.start_foreground_monitor()
+        if self.trace is not None:
+            self.trace.mark("延迟初始化")
+            self.trace.report()
+        # 还没有保存过设置时显示选项面板（kiosk 模式下不显示）
+        if not self.settings_store.valid and not self.run_mode.kiosk:
+            self.show_options()
+
+    def start_idle_monitor(self):
+        """用户离开或锁屏时暂停提醒周期，暂停期间进度条不再唤醒"""
+        self.idle = idle.IdleMonitor(self, threshold=self.settings.idle_threshold, source=idle.create_source())
+        self.idle.away.connect(self.on_away)
+        self.idle.returned.connect(self.on_returned)
+        self.idle.check()
+
+    def start_foreground_monitor(self):
+        """其他程序全屏时隐藏进度条并推迟提醒，只在前台状态变化时唤醒"""
+        self.foreground = foreground.ForegroundMonitor(self, source=foreground.create_source())
+        self.foreground.fullscreen_changed.connect(self.on_fullscreen_changed)
+        self.foreground.start()
+
+    def on_fullscreen_changed(self, fullscreen):
+        """其他程序进入或退出全屏"""
+        self.overlays.set_suspended(fullscreen)
+        if fullscreen:
+            # 正在进行的提醒收起，全屏结束后重新提醒，避免中途升级到全屏提醒
+            if self.escalator.is_active():
+                self.escalator.stop()
+                self.reminder_deferred = True
+        else:
+            self.show_deferred_reminder()
+        self.publish_status()
+
+    def on_away(self, idle_for):
+        """用户离开：进度停在开始空闲的时刻"""
+        self.core.pause(self.core.clock() - idle_for)
+
+    def on_returned(self):
+        """用户回来：按设置继续或重新开始本周期"""
+        self.core.resume(reset=self.settings.idle_policy == idle.RESET)
 
     def setup_tray_icon(self):
         """设置托盘图标"""
         self.tray_icon = QtWidgets.QSystemTrayIcon(self)
-        self.tray_icon.setIcon(QtGui.QIcon(self.icon_path))
+        self.tray_icon.setIcon(self.app_icon)
         
         # 创建托盘菜单
         tray_menu = QtWidgets.QMenu()
         
-        # 基础设置子菜单
-        settings_menu = QtWidgets.QMenu("基础设置", tray_menu)
+        # 基础设置子菜单，第一次展开时才填充
+        self.settings_menu = QtWidgets.QMenu("基础设置", tray_menu)
+        self.settings_menu.aboutToShow.connect(self.populate_settings_menu)
+        self.startup_action = None
+        
+        # 将基础设置子菜单添加到主菜单
+        tray_menu.addMenu(self.settings_menu)
+        
+        # 显示屏幕子菜单，每次展开时按当前接入的屏幕重建
+        self.screens_menu = QtWidgets.QMenu("显示屏幕", tray_menu)
+        self.screens_menu.aboutToShow.connect(self.populate_screens_menu)
+        tray_menu.addMenu(self.screens_menu)
+        self.screens_menu.menuAction().setVisible(self.run_mode.overlay)
+        
+        # 当前电源模式，只用于显示
+        self.power_action = tray_menu.addAction("")
+        self.power_action.setEnabled(False)
+        
+        # 添加喝水统计选项
+        history_action = tray_menu.addAction("喝水统计")
+        history_action.triggered.connect(self.show_history)
+        
+        # 添加分隔线
+        tray_menu.addSeparator()
+        
+        # 添加退出选项
+        quit_action = tray_menu.addAction("退出")
+        quit_action.triggered.connect(self.quit_application)
+        
+        self.tray_icon.setContextMenu(tray_menu)
+        self.tray_icon.show()
+
+    def populate_settings_menu(self):
+        """填充基础设置子菜单"""
+        if self.startup_action is not None:
+            return
+        settings_menu = self.settings_menu
         
         # 添加提醒间隔设置选项
         interval_action = settings_menu.addAction("提醒间隔")
@@ -122,74 +291,81 @@ class WaterReminderApp(QtWidgets.QWidget):
         # 添加开机自启动选项
         self.startup_action = settings_menu.addAction("开机自启")
         self.startup_action.setCheckable(True)  # 使其可以切换选中状态
-        self.startup_action.setChecked(self.is_auto_start())  # 设置初始状态
+        # 状态在后台线程读取，读到之前先禁用
+        self.startup_action.setEnabled(False)
         self.startup_action.triggered.connect(self.toggle_auto_start)
-        
-        # 将基础设置子菜单添加到主菜单
-        tray_menu.addMenu(settings_menu)
-        
-        # 添加分隔线
-        tray_menu.addSeparator()
-        
-        # 添加退出选项
-        quit_action = tray_menu.addAction("退出")
-        quit_action.triggered.connect(self.quit_application)
-        
-        self.tray_icon.setContextMenu(tray_menu)
-        self.tray_icon.show()
+        self.autostart.probe()
+
+    def populate_screens_menu(self):
+        """列出所有屏幕，勾选的屏幕显示进度条"""
+        self.screens_menu.clear()
+        for name, enabled in self.overlays.screens():
+            action = self.screens_menu.addAction(name)
+            action.setCheckable(True)
+            action.setChecked(enabled)
+            action.toggled.connect(lambda checked, name=name: self.set_screen_enabled(name, checked))
+
+    def set_screen_enabled(self, name, enabled):
+        """在某个屏幕上显示或隐藏进度条"""
+        self.overlays.set_screen_enabled(name, enabled)
+        self.update_settings(disabled_screens=sorted(self.overlays.disabled))
+
+    def apply_power_profile(self, profile=None):
+        """按当前电源配置调整进度格数、定时器精度、半透明和提醒插图"""
+        power_settings = self.power.settings()
+        if self.core.steps != power_settings["steps"]:
+            self.core.set_steps(power_settings["steps"])
+        self.progress_engine.set_timer_type(power_settings["timer_type"])
+        self.apply_window_opacity()
+        if self.reminder_window is not None:
+            self.reminder_window.set_art_visible(power_settings["reminder_art"])
+        self.power_action.setText(f"电源模式：{power_settings['name']}")
+        self.tray_icon.setToolTip(f"喝水提醒小助手（{power_settings['name']}模式）")
+
+    def apply_window_opacity(self):
+        """设置浮层透明度，节能模式下关闭半透明"""
+        translucent = self.power.settings()["translucent"]
+        self.overlays.set_window_opacity(self.settings.window_opacity if translucent else 1.0)
 
     def quit_application(self):
         """安全退出应用程序"""
         self.tray_icon.hide()  # 隐藏托盘图标
+        if self.event_store is not None:
+            self.event_store.close()
+            self.event_store = None
+        self.scheduler.close()
+        if self.idle is not None:
+            self.idle.close()
+        if self.foreground is not None:
+            self.foreground.close()
+        if self.status_writer is not None:
+            self.status_writer.close()
+        self.escalator.close()
+        self.settings_store.close()
+        self.autostart.wait(2000)  # 不打断正在写入的自启动设置
+        if self.metrics is not None:
+            self.metrics.close()
+        self.overlays.close()
         QtWidgets.QApplication.quit()
 
     def update_progress_bar_style(self, opacity):
-        """更新进度条样式"""
-        self.progress_bar.setStyleSheet(f"""
-            QProgressBar {{
-                background-color: rgba(255, 255, 255, {opacity});
-                border-radius: 15px;
-                text-align: center;
-                border: none;
-            }}
-            QProgressBar::chunk {{
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
-                                          stop:0 #2196F3, stop:1 #00BCD4);
-                border-radius: 15px;
-            }}
-        """)
+        """更新进度条底色透明度，只重绘进度条区域"""
+        self.overlays.set_trough_opacity(opacity)
 
     def show_options(self):
+        """显示设置面板（不阻塞事件循环）"""
+        self.open_dialog("options", self.build_options)
+
+    def build_options(self):
+        """构建设置面板"""
         options_window = QtWidgets.QDialog(self)
         options_window.setWindowTitle("设置选项")
         options_window.setFixedSize(500, 600)  # 增加窗口尺寸
-        options_window.setWindowIcon(QtGui.QIcon(self.icon_path))
+        options_window.setWindowIcon(self.app_icon)
         
-        # 更新窗口样式
-        options_window.setStyleSheet("""
-            QDialog {
-                background-color: #f5f5f5;
-                border-radius: 10px;
-            }
-            QLabel {
-                color: #333333;
-                font-size: 15px;
-                font-family: 'Microsoft YaHei', Arial;
-                margin-top: 10px;
-            }
-            QSpinBox, QDoubleSpinBox, QLineEdit {
-                padding: 10px;
-                border: 2px solid #e0e0e0;
-                border-radius: 6px;
-                background: white;
-                font-size: 14px;
-                min-height: 25px;
-                min-width: 200px;
-            }
-            QSpinBox:focus, QDoubleSpinBox:focus, QLineEdit:focus {
-                border-color: #2196F3;
-            }
-        """)
+        # 样式来自应用级主题，触摸设备通过动态属性放大输入框
+        options_window.setObjectName("optionsDialog")
+        options_window.setProperty("touch", self.is_touch_device())
 
         layout = QtWidgets.QVBoxLayout(options_window)
         layout.setSpacing(20)  # 增加间距
@@ -198,17 +374,11 @@ class WaterReminderApp(QtWidgets.QWidget):
         # 调整图标和标题
         header_layout = QtWidgets.QHBoxLayout()
         icon_label = QtWidgets.QLabel()
-        icon_label.setPixmap(QtGui.QPixmap(self.icon_path).scaled(80, 80, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation))  # 增大图标
+        icon_label.setPixmap(self.pixmaps.pixmap(icons.HEADER_SIZE, icons.widget_pixel_ratio(self)))  # 增大图标
         header_layout.addWidget(icon_label)
         
         title_label = QtWidgets.QLabel("喝水提醒小助手设置")
-        title_label.setStyleSheet("""
-            QLabel {
-                font-size: 24px;
-                font-weight: bold;
-                color: #2196F3;
-            }
-        """)
+        title_label.setObjectName("titleLabel")
         header_layout.addWidget(title_label)
         header_layout.addStretch()
         layout.addLayout(header_layout)
@@ -216,7 +386,7 @@ class WaterReminderApp(QtWidgets.QWidget):
         # 分隔线
         line = QtWidgets.QFrame()
         line.setFrameShape(QtWidgets.QFrame.HLine)
-        line.setStyleSheet("background-color: #e0e0e0; min-height: 2px;")
+        line.setObjectName("separator")
         layout.addWidget(line)
 
         # 表单布局
@@ -226,34 +396,35 @@ class WaterReminderApp(QtWidgets.QWidget):
         form_layout.setFormAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter)  # 输入框左对齐
 
         # 喝水提醒频率设置
-        self.frequency_label = QtWidgets.QLabel("喝水提醒频率：")
-        self.frequency_input = QtWidgets.QDoubleSpinBox()  # 改用 QDoubleSpinBox 支持小数
-        self.frequency_input.setRange(0.5, 4)  # 范围从0.5小时到4小时
-        self.frequency_input.setSingleStep(0.5)  # 步长为0.5小时
-        self.frequency_input.setValue(3)  # 默认3小时
-        self.frequency_input.setSuffix(" 小时")
-        form_layout.addRow(self.frequency_label, self.frequency_input)
+        frequency_input = QtWidgets.QDoubleSpinBox()  # 改用 QDoubleSpinBox 支持小数
+        frequency_input.setRange(0.5, 4)  # 范围从0.5小时到4小时
+        frequency_input.setSingleStep(0.5)  # 步长为0.5小时
+        frequency_input.setValue(self.settings.interval / 3600)  # 默认3小时
+        frequency_input.setSuffix(" 小时")
+        form_layout.addRow(QtWidgets.QLabel("喝水提醒频率："), frequency_input)
 
         # 提醒文字设置
-        self.reminder_text_label = QtWidgets.QLabel("提醒文字：")
-        self.reminder_text_input = QtWidgets.QLineEdit("该喝水了！")
-        form_layout.addRow(self.reminder_text_label, self.reminder_text_input)
+        reminder_text_input = QtWidgets.QLineEdit(self.settings.reminder_text)
+        form_layout.addRow(QtWidgets.QLabel("提醒文字："), reminder_text_input)
 
         # 窗口透明度设置
-        self.transparency_label = QtWidgets.QLabel("窗口透明度：")
-        self.transparency_input = QtWidgets.QDoubleSpinBox()
-        self.transparency_input.setRange(0.1, 1.0)
-        self.transparency_input.setSingleStep(0.1)
-        self.transparency_input.setValue(0.8)
-        form_layout.addRow(self.transparency_label, self.transparency_input)
+        transparency_input = QtWidgets.QDoubleSpinBox()
+        transparency_input.setRange(0.1, 1.0)
+        transparency_input.setSingleStep(0.1)
+        transparency_input.setValue(self.settings.window_opacity)
+        form_layout.addRow(QtWidgets.QLabel("窗口透明度："), transparency_input)
 
         # 进度条透明度设置
-        self.progress_opacity_label = QtWidgets.QLabel("进度条透明度：")
-        self.progress_opacity_input = QtWidgets.QDoubleSpinBox()
-        self.progress_opacity_input.setRange(0.1, 1.0)
-        self.progress_opacity_input.setSingleStep(0.1)
-        self.progress_opacity_input.setValue(0.5)
-        form_layout.addRow(self.progress_opacity_label, self.progress_opacity_input)
+        progress_opacity_input = QtWidgets.QDoubleSpinBox()
+        progress_opacity_input.setRange(0.1, 1.0)
+        progress_opacity_input.setSingleStep(0.1)
+        progress_opacity_input.setValue(self.settings.progress_opacity)
+        form_layout.addRow(QtWidgets.QLabel("进度条透明度："), progress_opacity_input)
+
+        # 细进度条
+        thin_bar_input = QtWidgets.QCheckBox("使用细进度条")
+        thin_bar_input.setChecked(self.settings.thin_bar)
+        form_layout.addRow("", thin_bar_input)
 
         layout.addLayout(form_layout)
         
@@ -264,448 +435,378 @@ class WaterReminderApp(QtWidgets.QWidget):
             "• 默认提醒间隔为3小时，建议设置在0.5-4小时之间\n"
             "• 可以随时通过托盘图标右键菜单修改设置"
         )
-        help_text.setStyleSheet("""
-            QLabel {
-                color: #666666;
-                font-size: 13px;
-                padding: 15px;
-                background-color: #e3f2fd;
-                border-radius: 8px;
-                line-height: 1.5;
-            }
-        """)
+        help_text.setObjectName("helpText")
         layout.addWidget(help_text)
 
         # 调整保存按钮
         save_button = QtWidgets.QPushButton("保存设置")
         save_button.setFixedSize(160, 45)  # 增大按钮尺寸
-        save_button.clicked.connect(lambda: self.save_settings(options_window))
-        save_button.setStyleSheet("""
-            QPushButton {
-                background-color: #2196F3;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 12px;
-                font-size: 16px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #1976D2;
-            }
-            QPushButton:pressed {
-                background-color: #1565C0;
-            }
-        """)
+        save_button.clicked.connect(lambda: self.save_settings(
+            options_window,
+            interval=int(frequency_input.value() * 3600),  # 将小时转换为秒
+            reminder_text=reminder_text_input.text(),
+            window_opacity=transparency_input.value(),
+            progress_opacity=progress_opacity_input.value(),
+            thin_bar=thin_bar_input.isChecked(),
+        ))
+        save_button.setObjectName("saveButton")
         layout.addWidget(save_button, alignment=QtCore.Qt.AlignCenter)
 
-        # 调整输入控件大小以适应触摸
-        self.frequency_input.setMinimumHeight(40)
-        self.reminder_text_input.setMinimumHeight(40)
-        self.transparency_input.setMinimumHeight(40)
-        self.progress_opacity_input.setMinimumHeight(40)
-        
         # 增加触摸反馈
         save_button.setMinimumSize(180, 60)
 
-        options_window.exec_()
+        return options_window
 
-    def update_progress(self):
-        """更新进度条"""
-        # 如果提醒窗口已经显示，则不再更新进度
-        if hasattr(self, 'reminder_window') and self.reminder_window.isVisible():
+    def record_event(self, kind, data=None):
+        """记录事件，稍后批量写入磁盘"""
+        if self.event_store is None:
             return
-        
-        step = 100 * 0.1 / self.reminder_interval  # 计算每0.1秒应该增加的进度值
-        self.progress_value += step
-        
-        if self.progress_value >= 100:
-            self.progress_value = 100
-            self.progress_bar.setValue(100)
-            self.show_reminder()
-        else:
-            self.progress_bar.setValue(int(self.progress_value))
+        self.event_store.append(kind, data)
+        if self.stats is not None:
+            self.stats.add(time.time(), kind)
+        self.schedule_flush()
+
+    def flush_events(self):
+        """把攒下的事件一次性写入磁盘"""
+        if self.event_store is not None:
+            self.event_store.flush()
+
+    def hydration_stats(self):
+        """返回喝水统计，首次调用时从事件日志重建"""
+        if self.stats is None:
+            self.stats = HydrationStats()
+            if self.event_store is not None:
+                self.stats.rebuild(self.event_store.load_events(list(HydrationStats.KINDS)))
+        return self.stats
+
+    def show_history(self):
+        """显示喝水统计面板"""
+        self.open_dialog("history", lambda: HistoryDialog(self.hydration_stats(), self))
+
+    def schedule_flush(self):
+        """在稍后把攒下的事件和检查点一起写入磁盘"""
+        if self.event_store is not None and not self.flush_timer.isActive():
+            self.flush_timer.start(2000)
+
+    def today_drinks(self):
+        """从事件日志读取今日喝水次数"""
+        return self.event_store.day_counts()["drinks"] if self.event_store else 0
+
+    def on_core_event(self, event, value):
+        """把状态机事件同步到界面、调度器和事件日志"""
+        if event == core.CYCLE_STARTED:
+            self.scheduler.update("reminder")
+            if self.event_store is not None:
+                self.event_store.set_checkpoint(self.core.cycle_start_wall(), value)
+                self.schedule_flush()
+        elif event in (core.DRINK, core.SNOOZE):
+            self.record_event(event)
+            self.escalator.stop()
+        elif event == core.COUNT:
+            self.update_counter_display()
+        elif event == core.DAY_CHANGED:
+            # 以事件日志为准，避免时钟回拨时把当天的记录清零
+            self.core.water_count = self.today_drinks()
+        elif event == core.PAUSED:
+            self.scheduler.update("reminder")
+        elif event == core.RESUMED:
+            # 周期起点顺延了暂停的时长
+            self.scheduler.update("reminder")
+            if self.event_store is not None:
+                self.event_store.set_checkpoint(self.core.cycle_start_wall(), value)
+                self.schedule_flush()
+        # 进度由读取方按下一次提醒时间推算，进度变化不用写状态文件
+        if event != core.PROGRESS:
+            self.publish_status()
+
+    def publish_status(self, *args):
+        """把当前状态写入状态文件，与上次相同时不写"""
+        if self.status_writer is None:
+            return
+        flags = 0
+        for flag, on in (
+            (status_file.DUE, self.core.is_due()),
+            (status_file.PAUSED, self.core.is_paused()),
+            (status_file.QUIET, "quiet" in self.core.pause_reasons),
+            (status_file.FULLSCREEN, self.foreground is not None and self.foreground.fullscreen),
+            (status_file.DEFERRED, self.reminder_deferred),
+        ):
+            if on:
+                flags |= flag
+        self.status_writer.publish(
+            flags=flags,
+            cycle_start=self.core.cycle_start_wall(),
+            deadline=self.next_reminder_time(time.time()),
+            progress=self.core.progress() / 100,
+            count=self.core.water_count,
+            interval=self.core.interval,
+            tier=self.escalator.current(),
+        )
 
-    def show_reminder(self):
-        """显示提醒窗口，适配触摸设备"""
-        if hasattr(self, 'reminder_window') and self.reminder_window.isVisible():
+    def resume_cycle(self):
+        """从上次的检查点恢复提醒周期，没有检查点或间隔已改变时开始新周期"""
+        checkpoint = self.event_store.load_checkpoint() if self.event_store else None
+        if checkpoint is None:
+            self.core.start_cycle()
             return
-        
-        self.reminder_window = QtWidgets.QDialog(self)
-        self.reminder_window.setWindowTitle("喝水提醒")
-        
-        # 适配屏幕尺寸
-        self.reminder_window.setGeometry(0, 0, self.screen_width, self.screen_height)
-        
-        # 设置为非模态
-        self.reminder_window.setModal(False)
-        
-        # 设置整个窗口的背景样式
-        self.reminder_window.setStyleSheet("""
-            QDialog {
-                background-color: rgba(200, 220, 255, 0.1);  /* 非常淡的蓝色背景 */
-            }
-        """)
-        
-        # 创建内容容器，居中显示内容
-        content_container = QtWidgets.QWidget()
-        layout = QtWidgets.QVBoxLayout(content_container)
-        layout.setAlignment(QtCore.Qt.AlignCenter)
-        layout.setSpacing(30)
-
-        # 提醒文字
-        label = QtWidgets.QLabel(self.reminder_text_input.text())
-        label.setStyleSheet("""
-            QLabel {
-                font-size: 72px;  /* 增大字体 */
-                color: #2196F3;
-                font-weight: bold;
-                font-family: 'Microsoft YaHei', Arial;
-                background-color: white;
-                padding: 40px 80px;  /* 增大内边距 */
-                border-radius: 40px;
-                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-            }
-        """)
-        layout.addWidget(label)
-
-        # 按钮容器
-        button_container = QtWidgets.QWidget()
-        button_layout = QtWidgets.QHBoxLayout(button_container)
-        button_layout.setSpacing(30)
-
-        # 喝水按钮
-        yes_button = QtWidgets.QPushButton("喝水")
-        yes_button.clicked.connect(self.drink_water)
-        yes_button.setStyleSheet("""
-            QPushButton {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #4CAF50, stop:1 #45A049);
-                color: white;
-                border: none;
-                border-radius: 40px;
-                padding: 25px 60px;
-                font-size: 28px;
-                font-weight: bold;
-                font-family: 'Microsoft YaHei', Arial;
-            }
-            QPushButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #45A049, stop:1 #388E3C);
-            }
-            QPushButton:pressed {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #388E3C, stop:1 #2E7D32);
-                padding: 28px 60px 22px 60px;
-            }
-        """)
-        button_layout.addWidget(yes_button)
-
-        # 稍后按钮
-        no_button = QtWidgets.QPushButton("稍后")
-        no_button.clicked.connect(self.no_drink)
-        no_button.setStyleSheet("""
-            QPushButton {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #FF5252, stop:1 #F44336);
-                color: white;
-                border: none;
-                border-radius: 40px;
-                padding: 25px 60px;
-                font-size: 28px;
-                font-weight: bold;
-                font-family: 'Microsoft YaHei', Arial;
-            }
-            QPushButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #F44336, stop:1 #D32F2F);
-            }
-            QPushButton:pressed {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #D32F2F, stop:1 #B71C1C);
-                padding: 28px 60px 22px 60px;
-            }
-        """)
-        button_layout.addWidget(no_button)
+        length = checkpoint["interval"]
+        elapsed = time.time() - checkpoint["cycle_start"]
+        if elapsed < 0 or length != self.core.interval:
+            # 时钟被回拨，无法判断已过去多久；或者设置、命令行或当前时段改了间隔，
+            # 与运行中修改间隔一样重新开始
+            self.core.start_cycle()
+        else:
+            self.core.start_cycle(length, elapsed=min(elapsed, length))
 
-        layout.addWidget(button_container)
+    def update_progress(self, value):
+        """更新进度条"""
+        self.overlays.setValue(value * self.overlays.maximum() // self.core.steps)
 
-        # 调整按钮大小和样式以适应触摸
-        yes_button.setMinimumSize(200, 80)
-        no_button.setMinimumSize(200, 80)
-        
-        # 增加触摸反馈效果
-        yes_button.setStyleSheet("""
-            QPushButton {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #4CAF50, stop:1 #45A049);
-                color: white;
-                border: none;
-                border-radius: 40px;
-                padding: 25px 60px;
-                font-size: 28px;
-                font-weight: bold;
-                font-family: 'Microsoft YaHei', Arial;
-            }
-            QPushButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #45A049, stop:1 #388E3C);
-            }
-            QPushButton:pressed {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #388E3C, stop:1 #2E7D32);
-                padding: 28px 60px 22px 60px;
-            }
-        """)
-        
-        no_button.setStyleSheet("""
-            QPushButton {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #FF5252, stop:1 #F44336);
-                color: white;
-                border: none;
-                border-radius: 40px;
-                padding: 25px 60px;
-                font-size: 28px;
-                font-weight: bold;
-                font-family: 'Microsoft YaHei', Arial;
-            }
-            QPushButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #F44336, stop:1 #D32F2F);
-            }
-            QPushButton:pressed {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                                          stop:0 #D32F2F, stop:1 #B71C1C);
-                padding: 28px 60px 22px 60px;
-            }
-        """)
-
-        # 调整提醒文字大小
-        label.setStyleSheet("""
-            QLabel {
-                font-size: 72px;  /* 增大字体 */
-                color: #2196F3;
-                font-weight: bold;
-                font-family: 'Microsoft YaHei', Arial;
-                background-color: white;
-                padding: 40px 80px;  /* 增大内边距 */
-                border-radius: 40px;
-                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-            }
-        """)
+    def build_reminder_window(self):
+        """构建可复用的全屏提醒窗口（升级的最后一级）"""
+        if self.reminder_window is None:
+            self.reminder_window = ReminderWindow(self, self.pixmaps)
+            self.reminder_window.set_art_visible(self.power.settings()["reminder_art"])
+            self.reminder_window.shown_latency.connect(self.reminder_shown)
+        return self.reminder_window
 
-        # 设置主布局
-        main_layout = QtWidgets.QVBoxLayout(self.reminder_window)
-        main_layout.addWidget(content_container)
+    def show_reminder(self):
+        """按升级策略提醒，已经在提醒中时不重复开始"""
+        triggered_at = time.perf_counter()
+        if self.escalator.is_active():
+            return
+        if "quiet" in self.core.pause_reasons or (self.foreground is not None and self.foreground.fullscreen):
+            self.reminder_deferred = True
+            self.publish_status()
+            return
+        self.record_event(events.REMINDER_SHOWN)
+
+        # 在鼠标所在的屏幕上提醒
+        screen = QtGui.QGuiApplication.screenAt(QtGui.QCursor.pos())
+        self.escalator.start(
+            self.settings.reminder_text,
+            screen or QtGui.QGuiApplication.primaryScreen(),
+            triggered_at
+        )
 
-        self.reminder_window.show()
-        self.reminder_window.windowHandle().setScreen(QtGui.QGuiApplication.primaryScreen())
-        self.reminder_window.showFullScreen()
+    def show_deferred_reminder(self):
+        """补上免打扰或全屏期间推迟的提醒，仍不能提醒时继续推迟"""
+        if self.reminder_deferred:
+            self.reminder_deferred = False
+            if self.core.is_due():
+                self.show_reminder()
 
     def drink_water(self):
         """点击喝水按钮的处理函数"""
-        self.water_count += 1
-        self.update_counter_display()
-        self.progress_value = 0  # 重置进度值
-        self.progress_bar.setValue(0)
-        self.reminder_window.close()
-        # 确保计时器在运行
-        if not self.timer.isActive():
-            self.timer.start(100)
-
-    def save_settings(self, options_window):
-        """保存设置"""
-        # 将小时转换为秒
-        hours = self.frequency_input.value()
-        self.reminder_interval = int(hours * 3600)  # 转换为秒
-        self.progress_value = 0
-        self.progress_bar.setValue(0)
-        
-        # 更新进度条透明度
-        opacity = self.progress_opacity_input.value()
-        self.update_progress_bar_style(opacity)
-        
-        # 更新窗口透明度
-        window_opacity = self.transparency_input.value()
-        self.setWindowOpacity(window_opacity)
-        
+        self.core.drink()  # 计数并开始新的提醒周期
+
+    def save_settings(self, options_window, **values):
+        """保存设置面板中的设置"""
+        self.update_settings(**values)
         options_window.close()
 
+    def update_settings(self, **values):
+        """修改设置：应用到界面、记录事件，并稍后写入设置文件"""
+        self.run_mode.release(values)
+        self.stored_settings = settings.Settings(**dict(self.stored_settings.to_dict(), **values))
+        self.apply_settings(self.run_mode.apply(self.stored_settings))
+        self.record_event(events.SETTINGS_CHANGED, values)
+        self.settings_store.save(self.stored_settings)
+
+    def on_settings_file_changed(self, new_settings):
+        """设置文件被外部修改，命令行和环境变量覆盖的值仍然生效"""
+        self.stored_settings = new_settings
+        self.apply_settings(self.run_mode.apply(new_settings))
+
+    def apply_settings(self, new_settings):
+        """应用一份设置（保存或设置文件被外部修改时）"""
+        old_settings, self.settings = self.settings, new_settings
+        if new_settings.schedule != old_settings.schedule:
+            self.schedule = self.load_schedule(new_settings.schedule)
+            self.scheduler.add("schedule", self.schedule.next_transition, self.apply_schedule)
+        self.apply_schedule()
+        if new_settings.interval != old_settings.interval or not self.core.is_running():
+            # 间隔不变时保留从上次运行恢复的周期；当前时段有自己的间隔时使用时段的间隔
+            self.core.set_interval(self.core.interval)
+        self.update_progress_bar_style(new_settings.progress_opacity)
+        self.overlays.set_thin(new_settings.thin_bar)
+        for name, enabled in self.overlays.screens():
+            if enabled == (name in new_settings.disabled_screens):
+                self.overlays.set_screen_enabled(name, not enabled)
+        self.power.set_mode(new_settings.power_mode)
+        self.apply_window_opacity()
+        self.escalator.set_policy(new_settings.escalation)
+        if self.idle is not None:
+            self.idle.set_threshold(new_settings.idle_threshold)
+
     def update_counter_display(self):
         """更新计数器显示"""
-        self.counter_label.setText(f"💧 今日喝水: {self.water_count}")
+        self.overlays.set_counter_text(f"💧 今日喝水: {self.core.water_count}")
 
-    def check_midnight_reset(self):
-        current_time = QtCore.QTime.currentTime()
-        if current_time.hour() == 0 and current_time.minute() == 0:
-            self.water_count = 0
-            self.update_counter_display()
+    def next_reminder_time(self, now):
+        """返回本周期提醒到期的墙钟时间，已到期、暂停或未计时时返回 None"""
+        if not self.core.is_running() or self.core.is_due() or self.core.is_paused():
+            return None
+        # 跳过之后的免打扰时段
+        return self.schedule.fire_time(now, self.core.remaining())
 
     def no_drink(self):
         """点击稍后按钮的处理函数"""
-        self.progress_value = 0  # 重置进度值
-        self.progress_bar.setValue(0)
-        self.reminder_window.close()
-        # 确保计时器在运行
-        if not self.timer.isActive():
-            self.timer.start(100)
+        self.core.snooze()  # 按稍后间隔开始新的提醒周期
 
     def show_interval_dialog(self):
         """显示提醒间隔设置对话框"""
-        dialog = QtWidgets.QDialog(self)
-        dialog.setWindowTitle("设置提醒间隔")
-        dialog.setFixedSize(300, 150)
-        
-        layout = QtWidgets.QVBoxLayout(dialog)
-        
-        spinbox = QtWidgets.QDoubleSpinBox(dialog)
-        spinbox.setRange(0.5, 4)  # 0.5到4小时
-        spinbox.setSingleStep(0.5)
-        spinbox.setValue(self.reminder_interval / 3600)  # 将秒转换为小时
-        spinbox.setSuffix(" 小时")
-        
-        layout.addWidget(QtWidgets.QLabel("请设置提醒间隔："))
-        layout.addWidget(spinbox)
-        
-        buttons = QtWidgets.QDialogButtonBox(
-            QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel,
-            dialog
-        )
-        buttons.accepted.connect(lambda: self.save_interval(int(spinbox.value() * 3600), dialog))
-        buttons.rejected.connect(dialog.reject)
-        
-        layout.addWidget(buttons)
-        dialog.exec_()
+        def build():
+            spinbox = QtWidgets.QDoubleSpinBox()
+            spinbox.setRange(0.5, 4)  # 0.5到4小时
+            spinbox.setSingleStep(0.5)
+            spinbox.setValue(self.core.interval / 3600)  # 将秒转换为小时
+            spinbox.setSuffix(" 小时")
+            return self.build_value_dialog(
+                "设置提醒间隔", "请设置提醒间隔：", spinbox,
+                lambda dialog: self.save_interval(int(spinbox.value() * 3600), dialog)
+            )
+        self.open_dialog("interval", build)
 
     def show_text_dialog(self):
         """显示提醒文字设置对话框"""
-        dialog = QtWidgets.QDialog(self)
-        dialog.setWindowTitle("设置提醒文字")
-        dialog.setFixedSize(300, 150)
-        
-        layout = QtWidgets.QVBoxLayout(dialog)
-        
-        text_input = QtWidgets.QLineEdit(dialog)
-        text_input.setText(self.reminder_text_input.text())
-        
-        layout.addWidget(QtWidgets.QLabel("请输入提醒文字："))
-        layout.addWidget(text_input)
-        
-        buttons = QtWidgets.QDialogButtonBox(
-            QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel,
-            dialog
-        )
-        buttons.accepted.connect(lambda: self.save_text(text_input.text(), dialog))
-        buttons.rejected.connect(dialog.reject)
-        
-        layout.addWidget(buttons)
-        dialog.exec_()
+        def build():
+            text_input = QtWidgets.QLineEdit()
+            text_input.setText(self.settings.reminder_text)
+            return self.build_value_dialog(
+                "设置提醒文字", "请输入提醒文字：", text_input,
+                lambda dialog: self.save_text(text_input.text(), dialog)
+            )
+        self.open_dialog("text", build)
 
     def show_opacity_dialog(self):
         """显示透明度设置对话框"""
+        def build():
+            spinbox = QtWidgets.QDoubleSpinBox()
+            spinbox.setRange(0.1, 1.0)
+            spinbox.setSingleStep(0.1)
+            spinbox.setValue(self.settings.window_opacity)
+            return self.build_value_dialog(
+                "设置透明度", "请设置透明度（0.1-1.0）：", spinbox,
+                lambda dialog: self.save_opacity(spinbox.value(), dialog)
+            )
+        self.open_dialog("opacity", build)
+
+    def build_value_dialog(self, title, prompt, editor, save):
+        """构建只有一个输入框和确定/取消按钮的小对话框"""
         dialog = QtWidgets.QDialog(self)
-        dialog.setWindowTitle("设置透明度")
+        dialog.setWindowTitle(title)
         dialog.setFixedSize(300, 150)
         
         layout = QtWidgets.QVBoxLayout(dialog)
-        
-        spinbox = QtWidgets.QDoubleSpinBox(dialog)
-        spinbox.setRange(0.1, 1.0)
-        spinbox.setSingleStep(0.1)
-        spinbox.setValue(self.transparency_input.value())
-        
-        layout.addWidget(QtWidgets.QLabel("请设置透明度（0.1-1.0）："))
-        layout.addWidget(spinbox)
+        layout.addWidget(QtWidgets.QLabel(prompt))
+        layout.addWidget(editor)
         
         buttons = QtWidgets.QDialogButtonBox(
             QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel,
             dialog
         )
-        buttons.accepted.connect(lambda: self.save_opacity(spinbox.value(), dialog))
+        buttons.accepted.connect(lambda: save(dialog))
         buttons.rejected.connect(dialog.reject)
-        
         layout.addWidget(buttons)
-        dialog.exec_()
+        return dialog
+
+    def open_dialog(self, key, build):
+        """打开临时窗口（不启动嵌套事件循环），关闭后即销毁
+
+        同一种窗口同时只保留一个，重复打开时把已有的窗口提到前面。
+        """
+        dialog = self.dialogs.get(key)
+        if dialog is None:
+            dialog = build()
+            dialog.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+            dialog.destroyed.connect(lambda *args, key=key: self.dialogs.pop(key, None))
+            self.dialogs[key] = dialog
+            dialog.open()
+        dialog.raise_()
+        dialog.activateWindow()
+        return dialog
+
+    def show_message(self, icon, title, text):
+        """显示提示框，不启动嵌套事件循环"""
+        box = QtWidgets.QMessageBox(icon, title, text, QtWidgets.QMessageBox.Ok, self)
+        box.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+        box.open()
+        return box
 
     def save_interval(self, value, dialog):
         """保存提醒间隔设置"""
-        self.reminder_interval = value
-        self.progress_value = 0
-        self.progress_bar.setValue(0)
+        self.update_settings(interval=value)
         dialog.accept()
 
     def save_text(self, text, dialog):
         """保存提醒文字设置"""
-        self.reminder_text_input.setText(text)
+        self.update_settings(reminder_text=text)
         dialog.accept()
 
     def save_opacity(self, value, dialog):
         """保存透明度设置"""
-        self.transparency_input.setValue(value)
-        self.setWindowOpacity(value)
+        self.update_settings(window_opacity=value)
         dialog.accept()
 
-    def is_auto_start(self):
-        """检查是否已设置开机自启"""
-        try:
-            key = winreg.OpenKey(
-                winreg.HKEY_CURRENT_USER,
-                self.startup_reg_path,
-                0,
-                winreg.KEY_READ
-            )
-            value, _ = winreg.QueryValueEx(key, self.app_name)
-            winreg.CloseKey(key)
-            return value == self.app_path
-        except WindowsError:
-            return False
-
     def toggle_auto_start(self):
-        """切换开机自启动状态"""
-        try:
-            key = winreg.OpenKey(
-                winreg.HKEY_CURRENT_USER,
-                self.startup_reg_path,
-                0,
-                winreg.KEY_ALL_ACCESS
-            )
-            
-            if self.startup_action.isChecked():
-                # 添加到开机自启
-                winreg.SetValueEx(
-                    key,
-                    self.app_name,
-                    0,
-                    winreg.REG_SZ,
-                    self.app_path
-                )
-                QtWidgets.QMessageBox.information(
-                    self,
-                    "提示",
-                    "已添加到开机自启动"
-                )
-            else:
-                # 从开机自启动中移除
-                try:
-                    winreg.DeleteValue(key, self.app_name)
-                    QtWidgets.QMessageBox.information(
-                        self,
-                        "提示",
-                        "已取消开机自启动"
-                    )
-                except WindowsError:
-                    pass
-                    
-            winreg.CloseKey(key)
-        except Exception as e:
-            QtWidgets.QMessageBox.warning(
-                self,
-                "错误",
-                f"设置开机自启动失败：{str(e)}"
+        """切换开机自启动状态，结果由 on_autostart_state 处理"""
+        self.autostart_toggled = True
+        self.startup_action.setEnabled(False)
+        self.autostart.set_enabled(self.startup_action.isChecked())
+
+    def on_autostart_state(self, enabled):
+        """后台读取或切换完成，同步菜单勾选状态"""
+        if self.startup_action is None:
+            return
+        self.startup_action.setChecked(enabled)
+        self.startup_action.setEnabled(True)
+        if self.autostart_toggled:
+            self.autostart_toggled = False
+            self.show_message(
+                QtWidgets.QMessageBox.Information,
+                "提示",
+                "已添加到开机自启动" if enabled else "已取消开机自启动"
             )
-            # 恢复复选框状态
-            self.startup_action.setChecked(not self.startup_action.isChecked())
+
+    def on_autostart_failed(self, error):
+        """切换失败时提示并恢复复选框状态"""
+        self.autostart_toggled = False
+        if self.startup_action is not None:
+            self.startup_action.setChecked(bool(self.autostart.enabled))
+            self.startup_action.setEnabled(True)
+        self.show_message(
+            QtWidgets.QMessageBox.Warning,
+            "错误",
+            f"设置开机自启动失败：{error}"
+        )
+
+    def handle_command(self, command):
+        """处理命令通道收到的命令，返回回复内容"""
+        if command == "status":
+            now = time.time()
+            return {
+                "progress": round(self.core.progress(), 2),
+                "count": self.core.water_count,
+                "interval": self.core.interval,
+                "due": self.core.is_due(),
+                "paused": self.core.is_paused(),
+                "fullscreen": bool(self.foreground and self.foreground.fullscreen),
+                "reminder": self.escalator.current(),
+                "schedule": rules.describe(self.schedule.segment_at(now)),
+                "next_deadline": self.next_reminder_time(now),
+                "remaining": round(self.core.remaining(), 1),
+                "power_profile": self.power.profile,
+            }
+        # 先把回复发出去，再在事件循环里执行操作
+        action = {
+            "drink": self.core.drink,
+            "snooze": self.core.snooze,
+            "settings": self.show_options,
+            "quit": self.quit_application,
+        }[command]
+        QtCore.QTimer.singleShot(0, action)
+        return {}
 
     def is_touch_device(self):
         """检测是否为触摸设备"""
@@ -715,9 +816,69 @@ class WaterReminderApp(QtWidgets.QWidget):
         return False
 
 
+def parse_args(argv):
+    """解析命令行参数，未识别的参数留给 Qt"""
+    parser = argparse.ArgumentParser(description="喝水提醒小助手")
+    parser.add_argument("--trace-startup", action="store_true",
+                        help="输出导入、创建 QApplication、构建窗口和首次绘制的耗时")
+    parser.add_argument("--metrics-file", nargs="?", const="", metavar="PATH",
+                        help="定期把运行指标写成 Prometheus 文本文件（默认写到运行时目录的 metrics.prom）")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="在 127.0.0.1:PORT 上提供 /metrics")
+    # 控制正在运行的实例
+    commands = parser.add_mutually_exclusive_group()
+    commands.add_argument("--status", dest="command", action="store_const", const="status",
+                          help="输出正在运行的实例的状态（JSON）")
+    commands.add_argument("--drink", dest="command", action="store_const", const="drink",
+                          help="记一次喝水并开始新周期")
+    commands.add_argument("--snooze", dest="command", action="store_const", const="snooze",
+                          help="稍后提醒")
+    commands.add_argument("--settings", dest="command", action="store_const", const="settings",
+                          help="打开设置面板")
+    commands.add_argument("--quit", dest="command", action="store_const", const="quit",
+                          help="退出正在运行的实例")
+    kiosk.add_arguments(parser)
+    args, qt_args = parser.parse_known_args(argv[1:])
+    try:
+        args.run_mode = kiosk.resolve(args)
+    except ValueError as error:
+        parser.error(str(error))
+    return args, qt_args
+
+
 if __name__ == "__main__":
-    app = QtWidgets.QApplication(sys.argv)
+    args, qt_args = parse_args(sys.argv)
+    if args.command:
+        sys.exit(instance.run_command(args.command))
+    trace = StartupTrace(STARTUP_BEGIN) if args.trace_startup else None
+    if trace is not None:
+        trace.mark("导入模块")
+    # 每个用户会话只运行一个实例，重复启动时让已有实例打开设置面板（kiosk 模式下只确认它在运行），
+    # 在创建 QApplication 之前完成，重复启动不需要初始化界面
+    forward = "status" if args.run_mode.kiosk else "settings"
+    if instance.send_command(forward) is not None:
+        sys.exit(0)
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
+    instance_server = instance.acquire(lambda command: reminder_app.handle_command(command))
+    if instance_server is None:
+        # 检查之后另一个实例抢先启动
+        instance.send_command(forward)
+        sys.exit(0)
+    app.aboutToQuit.connect(instance_server.close)
+    # 一次性安装应用级样式表
+    theme.install(app)
     # 设置应用程序不随最后一个窗口关闭而退出
     app.setQuitOnLastWindowClosed(False)
-    reminder_app = WaterReminderApp()
+    if trace is not None:
+        trace.mark("创建 QApplication")
+    metrics = None
+    if args.metrics_file is not None or args.metrics_port:
+        from water_reminder.metrics import Metrics, default_path
+        metrics_path = (args.metrics_file or default_path()) if args.metrics_file is not None else None
+        try:
+            metrics = Metrics(path=metrics_path, port=args.metrics_port)
+        except OSError as error:
+            # 指标是可选的，端口被占用时照常运行
+            print(f"运行指标不可用：{error}", file=sys.stderr)
+    reminder_app = WaterReminderApp(trace, metrics, args.run_mode)
     sys.exit(app.exec_())